@@ -1,7 +1,84 @@
 # core/admin.py
+#
+# The ops changelists for bookings, transactions, reviews and disputes are
+# built for tables of millions of rows:
+#   - list_display reads columns and list_select_related joins what they
+#     show, instead of a __str__ that walks relations row by row
+#   - list filters, date hierarchies and the default ordering all lead with
+#     an indexed column
+#   - relations are raw id inputs, so a change form doesn't render every
+#     gig and profile into a <select>
+#   - EstimatedCountPaginator takes the row count from the planner on
+#     Postgres when it is large, and show_full_result_count is off, so a
+#     page costs no full COUNT(*)
+#   - the bulk actions are one UPDATE each; as they send no signals they
+#     keep the analytics rollup in step themselves, like the other bulk
+#     paths (core/analytics.py)
+
+import json
+
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from . import analytics
+from .models import Profile, Gig, Booking, Transaction, Review, Dispute, WebhookEvent
+
+
+# below this many estimated rows an exact count is cheap enough to run
+ESTIMATE_THRESHOLD = 10000
+
+
+def _plan_rows(queryset):
+    """The planner's row estimate for a queryset, or None where unavailable."""
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Counts exactly up to ESTIMATE_THRESHOLD rows and estimates beyond."""
+
+    @cached_property
+    def count(self):
+        estimate = _plan_rows(self.object_list)
+        if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+            return estimate
+        return super().count
+
+
+class FixedValuesFilter(admin.SimpleListFilter):
+    """A list filter over a fixed set of values. The default filter of a
+    field without choices lists them with a SELECT DISTINCT over the table."""
+    values = ()
+
+    def lookups(self, request, model_admin):
+        return [(str(value), str(value)) for value in self.values]
+
+    def queryset(self, request, queryset):
+        if self.value() is not None:
+            return queryset.filter(**{self.parameter_name: self.value()})
+        return queryset
+
+
+class TransactionStatusFilter(FixedValuesFilter):
+    title = parameter_name = 'status'
+    values = Transaction.STATUSES
+
+
+class RatingFilter(FixedValuesFilter):
+    title = parameter_name = 'rating'
+    values = range(1, 6)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
 
-from django.contrib import admin
-from .models import Profile, Gig, Booking, Transaction, Review, Dispute
 
 # Custom admin for Gig
 class GigAdmin(admin.ModelAdmin):
@@ -21,12 +98,117 @@ class GigAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
 
-# Register all models
+@admin.display(description='booking')
+def booking_ref(obj):
+    # the id itself; a ForeignKey column would render the booking's __str__
+    return obj.booking_id
+
+
+def _set_booking_status(queryset, from_status, to_status):
+    """Move the selected bookings in `from_status` to `to_status` in one
+    UPDATE, with the rollup moved along. Returns how many changed."""
+    with transaction.atomic():
+        bookings = list(
+            queryset.select_related(None).filter(status=from_status).select_for_update()
+            .only('pk', 'gig_id', 'booked_at', 'status')
+        )
+        if not bookings:
+            return 0
+        before = analytics.snapshot(bookings)
+        Booking.objects.filter(pk__in=[b.pk for b in bookings]).update(
+            status=to_status, updated_at=timezone.now()
+        )
+        for booking in bookings:
+            booking.status = to_status
+        analytics.record_bookings(bookings, before)
+    return len(bookings)
+
+
+@admin.register(Booking)
+class BookingAdmin(LargeTableAdmin):
+    list_display = ('id', 'gig_title', 'client_username', 'status', 'booked_at')
+    list_select_related = ('gig', 'client__user')
+    list_filter = ('status',)
+    date_hierarchy = 'booked_at'
+    ordering = ('-booked_at',)
+    sortable_by = ('booked_at',)
+    raw_id_fields = ('gig', 'client')
+    actions = ['mark_completed', 'cancel_pending']
+
+    @admin.display(description='gig')
+    def gig_title(self, obj):
+        return obj.gig.title
+
+    @admin.display(description='client')
+    def client_username(self, obj):
+        return obj.client.user.username
+
+    @admin.action(description='Mark selected paid bookings completed')
+    def mark_completed(self, request, queryset):
+        changed = _set_booking_status(queryset, 'PAID', 'COMPLETED')
+        self.message_user(request, f'{changed} booking(s) marked completed.', messages.SUCCESS)
+
+    @admin.action(description='Cancel selected pending bookings')
+    def cancel_pending(self, request, queryset):
+        changed = _set_booking_status(queryset, 'PENDING', 'CANCELLED')
+        self.message_user(request, f'{changed} booking(s) cancelled.', messages.SUCCESS)
+
+
+@admin.register(Transaction)
+class TransactionAdmin(LargeTableAdmin):
+    list_display = ('id', booking_ref, 'razorpay_order_id', 'razorpay_payment_id',
+                    'amount', 'status', 'created_at')
+    list_filter = (TransactionStatusFilter,)
+    date_hierarchy = 'created_at'
+    ordering = ('-created_at',)
+    sortable_by = ('created_at',)
+    raw_id_fields = ('booking',)
+
+
+@admin.register(Review)
+class ReviewAdmin(LargeTableAdmin):
+    list_display = ('id', booking_ref, 'username', 'rating', 'reviewed_at')
+    list_select_related = ('user',)
+    list_filter = (RatingFilter,)
+    date_hierarchy = 'reviewed_at'
+    ordering = ('-reviewed_at',)
+    sortable_by = ('reviewed_at',)
+    raw_id_fields = ('booking', 'user')
+
+    @admin.display(description='user')
+    def username(self, obj):
+        return obj.user.username
+
+
+@admin.register(Dispute)
+class DisputeAdmin(LargeTableAdmin):
+    list_display = ('id', booking_ref, 'resolution_status', 'opened_at', 'resolved_at')
+    list_filter = ('resolution_status',)
+    date_hierarchy = 'opened_at'
+    ordering = ('-opened_at',)
+    sortable_by = ('opened_at',)
+    raw_id_fields = ('booking',)
+    actions = ['resolve', 'reject']
+
+    def _close(self, request, queryset, resolution):
+        now = timezone.now()
+        changed = queryset.filter(resolution_status='OPEN').update(
+            resolution_status=resolution, resolved_at=now, updated_at=now
+        )
+        self.message_user(request, f'{changed} dispute(s) marked {resolution.lower()}.', messages.SUCCESS)
+
+    @admin.action(description='Resolve selected open disputes')
+    def resolve(self, request, queryset):
+        self._close(request, queryset, 'RESOLVED')
+
+    @admin.action(description='Reject selected open disputes')
+    def reject(self, request, queryset):
+        self._close(request, queryset, 'REJECTED')
+
+
+# Register the remaining models
 admin.site.register(Profile)
-admin.site.register(Booking)
-admin.site.register(Transaction)
-admin.site.register(Review)
-admin.site.register(Dispute)
+admin.site.register(WebhookEvent)
 
 # **Register the Gig model with your custom GigAdmin**
 admin.site.register(Gig, GigAdmin)
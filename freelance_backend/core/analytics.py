@@ -0,0 +1,288 @@
+# core/analytics.py
+#
+# Daily booking rollup behind /api/profiles/me/analytics/.
+#
+# Every booking counts once in the BookingDailyStat row for (its gig's
+# freelancer, its gig, the day it was booked, its current status), and its
+# captured payment adds to that row's revenue. Booking/Transaction saves
+# move those contributions with F() deltas; the bulk paths, which send no
+# signals (BulkWriteMixin, webhooks.process_batch), report their changes
+# through record_bookings() / apply_deltas(); and
+# `manage.py rebuild_booking_stats` recomputes the table from scratch.
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Booking, BookingDailyStat, Gig, Transaction
+
+
+PAID = "PAID"
+CONVERTED = ("PAID", "COMPLETED")
+ZERO = Decimal("0.00")
+
+
+def booking_day(booked_at):
+    # same day boundaries as TruncDate in rebuild_booking_stats()
+    return timezone.localdate(booked_at) if timezone.is_aware(booked_at) else booked_at.date()
+
+
+def paid_amount(txn_status, amount):
+    return amount if txn_status == PAID else ZERO
+
+
+def contribution(freelancer_id, gig_id, booked_at, status, paid=ZERO):
+    """(rollup key, revenue) that one booking adds to the table."""
+    return (freelancer_id, gig_id, booking_day(booked_at), status), paid
+
+
+def txn_contribution(txn):
+    """contribution() of txn.booking; expects booking__gig to be loaded."""
+    booking = txn.booking
+    return contribution(
+        booking.gig.freelancer_id, booking.gig_id, booking.booked_at,
+        booking.status, paid_amount(txn.status, txn.amount),
+    )
+
+
+def new_deltas():
+    return defaultdict(lambda: [0, ZERO])
+
+
+def move(deltas, before, after):
+    """Record a booking going from one contribution to another; either
+    side may be None (created / deleted)."""
+    if before == after:
+        return
+    for side, sign in ((before, -1), (after, 1)):
+        if side is None:
+            continue
+        key, revenue = side
+        deltas[key][0] += sign
+        deltas[key][1] += sign * revenue
+
+
+def apply_deltas(deltas):
+    """One UPDATE per touched row; rows are created on first use."""
+    for (freelancer_id, gig_id, day, status), (count, revenue) in deltas.items():
+        if not count and not revenue:
+            continue
+        key = {"freelancer_id": freelancer_id, "gig_id": gig_id, "day": day, "status": status}
+        changes = {"bookings": F("bookings") + count, "revenue": F("revenue") + revenue}
+        if BookingDailyStat.objects.filter(**key).update(**changes) or count <= 0:
+            continue
+        try:
+            with transaction.atomic():
+                BookingDailyStat.objects.create(bookings=count, revenue=revenue, **key)
+        except IntegrityError:
+            # created concurrently
+            BookingDailyStat.objects.filter(**key).update(**changes)
+
+
+def _booking_state(booking_id):
+    row = (
+        Booking.objects.filter(pk=booking_id)
+        .values_list("gig__freelancer_id", "gig_id", "booked_at", "status",
+                     "transaction__status", "transaction__amount")
+        .first()
+    )
+    if row is None:
+        return None
+    freelancer_id, gig_id, booked_at, status, txn_status, amount = row
+    return contribution(freelancer_id, gig_id, booked_at, status, paid_amount(txn_status, amount))
+
+
+def _freelancers(bookings):
+    gig_ids = {b.gig_id for b in bookings}
+    return dict(Gig.objects.filter(pk__in=gig_ids).values_list("id", "freelancer_id"))
+
+
+def snapshot(bookings):
+    """{booking pk: contribution} for existing bookings, in two queries."""
+    bookings = list(bookings)
+    if not bookings:
+        return {}
+    freelancers = _freelancers(bookings)
+    paid = dict(
+        Transaction.objects.filter(booking__in=bookings, status=PAID)
+        .values_list("booking_id", "amount")
+    )
+    return {
+        b.pk: contribution(freelancers.get(b.gig_id), b.gig_id, b.booked_at,
+                           b.status, paid.get(b.pk, ZERO))
+        for b in bookings
+    }
+
+
+def record_bookings(bookings, before=None):
+    """Apply bulk-written bookings; `before` is their snapshot() taken
+    before the write (None for bulk_create)."""
+    before = before or {}
+    freelancers = _freelancers(bookings)
+    deltas = new_deltas()
+    for b in bookings:
+        old = before.get(b.pk)
+        move(deltas, old, contribution(
+            freelancers.get(b.gig_id), b.gig_id, b.booked_at, b.status,
+            old[1] if old else ZERO,
+        ))
+    apply_deltas(deltas)
+
+
+@receiver(pre_save, sender=Booking)
+def remember_booking_state(sender, instance, update_fields=None, **kwargs):
+    instance._rollup_before = None
+    if instance.pk and not (update_fields and {"status", "gig"}.isdisjoint(update_fields)):
+        instance._rollup_before = _booking_state(instance.pk)
+
+
+@receiver(post_save, sender=Booking)
+def update_rollup_on_booking_save(sender, instance, created, update_fields=None, **kwargs):
+    before = getattr(instance, "_rollup_before", None)
+    if not created and before is None:
+        return
+    (freelancer_id, gig_id, _, _), paid = before or ((None, None, None, None), ZERO)
+    if gig_id != instance.gig_id:
+        freelancer_id = Gig.objects.filter(pk=instance.gig_id).values_list("freelancer_id", flat=True).first()
+    deltas = new_deltas()
+    move(deltas, before, contribution(
+        freelancer_id, instance.gig_id, instance.booked_at, instance.status, paid
+    ))
+    apply_deltas(deltas)
+
+
+@receiver(post_delete, sender=Booking)
+def update_rollup_on_booking_delete(sender, instance, **kwargs):
+    # a deleted booking's transaction goes first and takes its revenue along
+    freelancer_id = Gig.objects.filter(pk=instance.gig_id).values_list("freelancer_id", flat=True).first()
+    if freelancer_id is None:
+        return    # the gig (and its rollup rows) are being deleted too
+    deltas = new_deltas()
+    move(deltas, contribution(freelancer_id, instance.gig_id, instance.booked_at, instance.status), None)
+    apply_deltas(deltas)
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_payment(sender, instance, update_fields=None, **kwargs):
+    instance._rollup_paid = ZERO
+    if instance.pk and not (update_fields and {"status", "amount"}.isdisjoint(update_fields)):
+        row = Transaction.objects.filter(pk=instance.pk).values_list("status", "amount").first()
+        instance._rollup_paid = paid_amount(*row) if row else ZERO
+
+
+def _shift_revenue(booking_id, delta):
+    state = _booking_state(booking_id)
+    if state is None:
+        return
+    key, _ = state
+    apply_deltas({key: [0, delta]})
+
+
+@receiver(post_save, sender=Transaction)
+def update_rollup_on_payment(sender, instance, **kwargs):
+    paid = paid_amount(instance.status, instance.amount)
+    delta = paid - getattr(instance, "_rollup_paid", ZERO)
+    if delta:
+        _shift_revenue(instance.booking_id, delta)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_rollup_on_payment_delete(sender, instance, **kwargs):
+    paid = paid_amount(instance.status, instance.amount)
+    if paid:
+        _shift_revenue(instance.booking_id, -paid)
+
+
+# ── dashboard read
+
+def freelancer_analytics(profile, start, end):
+    """Totals, per-day and per-gig breakdowns for start..end (inclusive),
+    read from the rollup only."""
+    rows = BookingDailyStat.objects.filter(freelancer=profile, day__range=(start, end))
+
+    def breakdown(*group_by):
+        grouped = {}
+        for row in rows.values(*group_by, "status").annotate(n=Sum("bookings"), r=Sum("revenue")):
+            key = tuple(row[g] for g in group_by)
+            entry = grouped.setdefault(key, {"bookings": 0, "revenue": ZERO, "by_status": {}})
+            entry["bookings"] += row["n"]
+            entry["revenue"] += row["r"] or ZERO
+            entry["by_status"][row["status"]] = row["n"]
+        return grouped
+
+    def shaped(entry):
+        converted = sum(entry["by_status"].get(s, 0) for s in CONVERTED)
+        return {
+            "bookings": entry["bookings"],
+            "revenue": str(entry["revenue"].quantize(ZERO)),
+            "by_status": entry["by_status"],
+            "conversion_rate": round(converted / entry["bookings"], 4) if entry["bookings"] else 0.0,
+        }
+
+    totals = breakdown().get((), {"bookings": 0, "revenue": ZERO, "by_status": {}})
+    daily = breakdown("day")
+    gigs = breakdown("gig_id", "gig__title")
+    return {
+        "from": start,
+        "to": end,
+        "totals": shaped(totals),
+        "daily": [{"day": day, **shaped(entry)} for (day,), entry in sorted(daily.items())],
+        "gigs": [
+            {"gig": gig_id, "title": title, **shaped(entry)}
+            for (gig_id, title), entry in sorted(gigs.items(), key=lambda kv: -kv[1]["bookings"])
+        ],
+    }
+
+
+# ── backfill (manage.py rebuild_booking_stats)
+
+def expected_rows():
+    rows = (
+        Booking.objects
+        .values("gig__freelancer_id", "gig_id", "status", day=TruncDate("booked_at"))
+        .annotate(
+            n=Count("id"),
+            r=Sum("transaction__amount", filter=Q(transaction__status=PAID)),
+        )
+    )
+    return {
+        (row["gig__freelancer_id"], row["gig_id"], row["day"], row["status"]):
+            (row["n"], (row["r"] or ZERO).quantize(ZERO))
+        for row in rows
+    }
+
+
+def rebuild_booking_stats(batch_size=1000, dry_run=False):
+    """
+    Recompute the rollup with one GROUP BY over Booking and write only the
+    rows that differ. Returns {"created": n, "updated": n, "deleted": n}.
+    """
+    expected = expected_rows()
+    stale, stray = [], []
+    for stat in BookingDailyStat.objects.order_by("pk").iterator(chunk_size=batch_size):
+        key = (stat.freelancer_id, stat.gig_id, stat.day, stat.status)
+        want = expected.pop(key, None)
+        if want is None:
+            if stat.bookings or stat.revenue:
+                stray.append(stat.pk)
+            continue
+        if (stat.bookings, stat.revenue) != want:
+            stat.bookings, stat.revenue = want
+            stale.append(stat)
+    missing = [
+        BookingDailyStat(freelancer_id=f, gig_id=g, day=d, status=s, bookings=n, revenue=r)
+        for (f, g, d, s), (n, r) in expected.items()
+    ]
+
+    if not dry_run:
+        with transaction.atomic():
+            BookingDailyStat.objects.filter(pk__in=stray).delete()
+            BookingDailyStat.objects.bulk_update(stale, ["bookings", "revenue"], batch_size=batch_size)
+            BookingDailyStat.objects.bulk_create(missing, batch_size=batch_size)
+    return {"created": len(missing), "updated": len(stale), "deleted": len(stray)}
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # signal receivers that live outside models.py
+        from . import ratings, caching, images, analytics, skills, auth, trending  # noqa: F401
@@ -0,0 +1,166 @@
+# core/async_views.py
+#
+# Native async endpoints, served without a worker thread per request under
+# asgi.py (they still work under WSGI, where Django runs them in a loop).
+#
+# The read endpoints mirror their DRF viewset actions: same querysets,
+# filters, keyset pagination and serializers (list projections), with the
+# database work done through the async ORM and authentication through
+# AsyncJWTAuthentication (cached like the viewsets', core/auth.py).
+# Serializers run after select_related has loaded everything they touch,
+# so they never hit the database from the event loop.
+
+import json
+from types import SimpleNamespace
+
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import APIException, AuthenticationFailed
+from rest_framework.request import Request
+
+from . import payments
+from .auth import CachedJWTAuthentication
+from .fieldsets import parse_shape
+from .filters import filter_bookings, filter_gigs, gig_ordering
+from .models import Booking, Gig, Profile
+from .pagination import KeysetPagination
+from .projections import BOOKING_PROJECTION, GIG_PROJECTION
+from .renderers import FastJSONRenderer
+from .serializers import GigSerializer, ProfileSerializer
+
+
+class AsyncJWTAuthentication(CachedJWTAuthentication):
+    """CachedJWTAuthentication with the user lookup on the async cache and
+    ORM. Token validation itself is pure CPU and stays as it is."""
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+
+async def authenticate(request):
+    """The user behind the request's Bearer token, or None."""
+    try:
+        result = await AsyncJWTAuthentication().aauthenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+def _error(detail, status):
+    return JsonResponse({'detail': detail}, status=status)
+
+
+def _render(data, status=200):
+    # same renderer (and so the same bytes) as the DRF views
+    return HttpResponse(FastJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def _api_error(exc):
+    detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+    return _render(detail, exc.status_code)
+
+
+NOT_AUTHENTICATED = 'Authentication credentials were not provided.'
+
+GIGS = Gig.objects.select_related('freelancer__user', 'image_asset')
+BOOKINGS = Booking.objects.select_related('gig__freelancer__user', 'gig__image_asset')
+
+
+async def _paginated(request, queryset, projection, cursor_ordering):
+    # row dicts, like ProjectionListMixin on the viewsets
+    paginator = KeysetPagination()
+    shape = parse_shape(request.query_params)
+    rows = projection.project(queryset, [field.lstrip('-') for field in cursor_ordering], shape)
+    page = await paginator.apaginate_queryset(
+        rows, request, view=SimpleNamespace(cursor_ordering=cursor_ordering)
+    )
+    data = projection.dump(page, request, shape)
+    return _render(paginator.get_paginated_response(data).data)
+
+
+@require_GET
+async def gig_list(request):
+    if await authenticate(request) is None:
+        return _error(NOT_AUTHENTICATED, 401)
+    request = Request(request)
+    try:
+        queryset = filter_gigs(GIGS.all(), request.query_params)
+        return await _paginated(request, queryset, GIG_PROJECTION, gig_ordering(request.query_params))
+    except APIException as exc:
+        return _api_error(exc)
+
+
+@require_GET
+async def gig_detail(request, pk):
+    if await authenticate(request) is None:
+        return _error(NOT_AUTHENTICATED, 401)
+    request = Request(request)
+    try:
+        shape = parse_shape(request.query_params)
+        queryset = GIGS if shape is None else GIG_PROJECTION.shape_queryset(GIGS, shape)
+        gig = await queryset.filter(pk=pk).afirst()
+        if gig is None:
+            return _error('No Gig matches the given query.', 404)
+        return _render(GigSerializer(gig, shape=shape, context={'request': request}).data)
+    except APIException as exc:
+        return _api_error(exc)
+
+
+@require_GET
+async def profile_detail(request, pk):
+    # public, like ProfileViewSet.retrieve
+    profile = await Profile.objects.select_related('user').filter(pk=pk).afirst()
+    if profile is None:
+        return _error('No Profile matches the given query.', 404)
+    return _render(ProfileSerializer(profile, context={'request': Request(request)}).data)
+
+
+@require_GET
+async def booking_list(request):
+    user = await authenticate(request)
+    if user is None:
+        return _error(NOT_AUTHENTICATED, 401)
+    request = Request(request)
+    try:
+        queryset = filter_bookings(BOOKINGS.filter(client__user=user), request.query_params)
+        return await _paginated(request, queryset, BOOKING_PROJECTION, ('-booked_at', '-id'))
+    except APIException as exc:
+        return _api_error(exc)
+
+
+@csrf_exempt
+@require_POST
+async def create_order(request):
+    user = await authenticate(request)
+    if user is None:
+        return _error(NOT_AUTHENTICATED, 401)
+
+    try:
+        booking_id = json.loads(request.body or b'{}').get('booking')
+    except (ValueError, AttributeError):
+        return _error('Invalid JSON body', 400)
+
+    booking = await Booking.objects.filter(
+        id=booking_id,
+        client__user=user
+    ).select_related('gig').afirst()
+    if not booking:
+        return _error('Invalid booking', 400)
+
+    try:
+        txn = await payments.acreate_order(booking)
+    except payments.OrderInProgress:
+        return _error('Order creation already in progress for this booking.', 409)
+    except payments.GatewayTimeout:
+        return _error('Payment gateway timed out.', 504)
+    except payments.GatewayError:
+        return _error('Payment gateway error.', 502)
+    return JsonResponse(payments.order_payload(txn))
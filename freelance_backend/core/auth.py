@@ -0,0 +1,158 @@
+# core/auth.py
+#
+# JWT authentication with the user and their profile cached.
+#
+# simplejwt's JWTAuthentication loads the User row on every request and most
+# views then load request.user.profile on top. CachedJWTAuthentication keeps
+# both rows' column values in the API cache for AUTH_CACHE_TIMEOUT seconds,
+# keyed by the token's user id claim, and rebuilds the instances from them
+# with the profile already attached, so request.user.profile costs nothing
+# and a warm request authenticates without touching the database. A miss
+# loads both rows in one joined query.
+#
+# User and Profile saves/deletes (which covers deactivation) and reviews,
+# which move the profile's rating, evict the entry: immediately and again on
+# commit, as in caching.py. Eviction leaves a short-lived marker that stops
+# a request which read the old rows from caching them again. Writes that
+# send no signals (queryset.update(), `rebuild_ratings`) show up when the
+# entry expires. The password hash is never cached: the user is built with
+# `password` deferred, and only its MD5 is kept when CHECK_REVOKE_TOKEN
+# needs it.
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import router, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import Booking, Profile, Review
+
+
+# seconds an eviction blocks re-caching: longer than a request takes to get
+# from reading the rows to storing them
+EVICTION_GRACE = 10
+_EVICTED = "evicted"
+
+
+def _cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def _key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def _fields(model):
+    return [field.attname for field in model._meta.concrete_fields if field.attname != "password"]
+
+
+def _entry(user):
+    profile = getattr(user, "profile", None)
+    return {
+        "user": [getattr(user, name) for name in _fields(User)],
+        "revoke": get_md5_hash_password(user.password) if api_settings.CHECK_REVOKE_TOKEN else None,
+        "profile": None if profile is None else [getattr(profile, name) for name in _fields(Profile)],
+    }
+
+
+def _build(entry):
+    db = router.db_for_read(User)
+    user = User.from_db(db, _fields(User), entry["user"])
+    if entry["profile"] is not None:
+        # sets the cache on both sides: user.profile and profile.user
+        user.profile = Profile.from_db(db, _fields(Profile), entry["profile"])
+    return user
+
+
+def forget_user(user_id):
+    """Drop the cached authentication entry for this user."""
+    def evict():
+        _cache().set(_key(user_id), _EVICTED, EVICTION_GRACE)
+    evict()
+    transaction.on_commit(evict)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication with the user lookup served from the cache, and
+    request.user.profile resolved along with it."""
+
+    def _user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def _lookup(self, user_id):
+        return self.user_model.objects.select_related("profile").filter(
+            **{api_settings.USER_ID_FIELD: user_id}
+        )
+
+    def _check(self, validated_token, entry):
+        user = _build(entry)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != entry["revoke"]:
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+    def get_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        cached = _cache().get(_key(user_id)) if settings.AUTH_CACHE_TIMEOUT else None
+        if cached is None or cached == _EVICTED:
+            user = self._lookup(user_id).first()
+            if user is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            entry = _entry(user)
+            if cached is None and settings.AUTH_CACHE_TIMEOUT:
+                # add(), not set(): an eviction marker stays until it expires
+                _cache().add(_key(user_id), entry, settings.AUTH_CACHE_TIMEOUT)
+            cached = entry
+        return self._check(validated_token, cached)
+
+    async def aget_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        cached = await _cache().aget(_key(user_id)) if settings.AUTH_CACHE_TIMEOUT else None
+        if cached is None or cached == _EVICTED:
+            user = await self._lookup(user_id).afirst()
+            if user is None:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            entry = _entry(user)
+            if cached is None and settings.AUTH_CACHE_TIMEOUT:
+                await _cache().aadd(_key(user_id), entry, settings.AUTH_CACHE_TIMEOUT)
+            cached = entry
+        return self._check(validated_token, cached)
+
+
+# ── invalidation receivers
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_saved_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def forget_profile_owner(sender, instance, **kwargs):
+    forget_user(instance.user_id)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def forget_reviewed_freelancer(sender, instance, **kwargs):
+    # the freelancer's rating aggregates moved (core/ratings.py)
+    user_id = (
+        Booking.objects.filter(pk=instance.booking_id)
+        .values_list("gig__freelancer__user_id", flat=True)
+        .first()
+    )
+    if user_id is not None:
+        forget_user(user_id)
@@ -0,0 +1,370 @@
+# core/benchmarks.py
+#
+# Endpoint benchmark suite (`manage.py benchmark`).
+#
+# Drives every route in freelance_backend/urls.py (admin aside) through the
+# in-process test client against the current database, usually one filled
+# by `manage.py seed_marketplace`. Per endpoint it records latency
+# percentiles, sequential throughput and the number of SQL queries one
+# request issues, and writes them to a JSON baseline. compare() diffs two
+# baselines, so a change can be checked against the previous commit's.
+#
+# Writes (registration, bookings, create-order against FakeGateway,
+# webhooks, ...) run too: the whole run happens in one transaction that is
+# rolled back at the end, leaving the database as it was.
+#
+# json_benchmark() (`manage.py bench_json`) is a micro-benchmark of the JSON
+# renderers and parsers alone, on a large in-memory GigSerializer payload.
+
+import hashlib
+import hmac
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+from itertools import count
+from unittest import mock
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from . import renderers, similar
+from .models import Booking, Gig, Profile, Review, Transaction
+from .serializers import GigSerializer
+from .synthetic import SEED_PASSWORD, SKILLS
+
+
+WEBHOOK_SECRET = "benchmark-webhook-secret"
+# a p50 or query-count change smaller than this is noise, not a regression
+DEFAULT_THRESHOLD = 10.0
+
+
+class Endpoint:
+    """
+    One benchmarked request. `path` and `body` may be callables taking the
+    iteration number, for requests that must differ every time (a fresh
+    booking to order, a new username to register, ...).
+    """
+
+    def __init__(self, name, method, path, body=None, auth=True, headers=None, expect=200,
+                 token=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.auth = auth
+        self.headers = headers or (lambda n: {})
+        self.expect = expect
+        self.token = token      # instead of the suite user's, e.g. a staff user's
+
+    def request(self, client, n, token):
+        path = self.path(n) if callable(self.path) else self.path
+        body = self.body(n) if callable(self.body) else self.body
+        headers = dict(self.headers(n))
+        if self.auth:
+            headers["HTTP_AUTHORIZATION"] = f"Bearer {self.token or token}"
+        if self.method == "get":
+            response = client.get(path, **headers)
+        else:
+            data = body if isinstance(body, (bytes, str)) else json.dumps(body)
+            response = getattr(client, self.method)(path, data, content_type="application/json", **headers)
+        if response.streaming:
+            # a streamed body is rendered (and queried for) as it is read
+            for _ in response.streaming_content:
+                pass
+        return response
+
+
+def _percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _signed_webhook(n, txn_id):
+    body = json.dumps({
+        "event": "payment.captured",
+        "payload": {"payment": {"entity": {
+            "id": f"pay_bench{n:08d}", "status": "captured",
+            "notes": {"transaction_id": str(txn_id)},
+        }}},
+    }).encode()
+    signature = hmac.new(WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    return body, {"HTTP_X_RAZORPAY_SIGNATURE": signature, "HTTP_X_RAZORPAY_EVENT_ID": f"bench-{n}"}
+
+
+def endpoints(user, iterations):
+    """The suite, for `user` (a freelancer with bookings of their own)."""
+    profile = user.profile
+    gig = Gig.objects.filter(freelancer=profile).order_by("id").first()
+    other_gig = Gig.objects.exclude(freelancer=profile).order_by("-rating_count", "id").first()
+    booking = Booking.objects.filter(client=profile).order_by("id").first()
+    txn = Transaction.objects.order_by("id").first()
+    review = Review.objects.order_by("id").first()
+    skill = (profile.skills or ["Python"])[0]
+    refresh = str(RefreshToken.for_user(user))
+    # the exports are staff only; this user goes with the run's rollback
+    staff = User.objects.create_user("bench-staff", is_staff=True)
+    staff_token = str(AccessToken.for_user(staff))
+
+    # create-order needs a booking without an order each time; pre-create
+    # them outside the timed loop (the run is rolled back anyway)
+    warm = iterations + 1
+    fresh = Booking.objects.bulk_create(
+        [Booking(gig=other_gig, client=profile) for _ in range(2 * warm)]
+    )
+    sync_orders, async_orders = fresh[:warm], fresh[warm:]
+    usernames = count()
+
+    webhook_bodies = {}
+
+    def webhook(n):
+        if n not in webhook_bodies:
+            webhook_bodies[n] = _signed_webhook(n, txn.pk if txn else 0)
+        return webhook_bodies[n]
+
+    return [
+        Endpoint("register", "post", "/api/register/", auth=False, expect=201,
+                 body=lambda n: {"username": f"bench-new-{next(usernames)}",
+                                 "email": "bench@example.com", "password": SEED_PASSWORD}),
+        Endpoint("token_obtain", "post", "/api/token/", auth=False,
+                 body={"username": user.username, "password": SEED_PASSWORD}),
+        Endpoint("token_refresh", "post", "/api/token/refresh/", auth=False,
+                 body={"refresh": refresh}),
+        Endpoint("profile_list", "get", "/api/profiles/"),
+        Endpoint("profile_skill_search", "get", f"/api/profiles/?skills={skill}"),
+        Endpoint("profile_detail", "get", f"/api/profiles/{other_gig.freelancer_id}/"),
+        Endpoint("profile_me", "get", "/api/profiles/me/"),
+        Endpoint("profile_analytics", "get", "/api/profiles/me/analytics/?days=90"),
+        Endpoint("gig_list", "get", "/api/gigs/"),
+        Endpoint("gig_search", "get", "/api/gigs/?search=logo"),
+        Endpoint("gig_top_rated", "get", "/api/gigs/?ordering=rating"),
+        Endpoint("gig_trending", "get", "/api/gigs/?ordering=trending"),
+        Endpoint("gig_detail", "get", f"/api/gigs/{other_gig.pk}/"),
+        # served from the index seed_marketplace builds; 503 without numpy
+        Endpoint("gig_similar", "get", f"/api/gigs/{other_gig.pk}/similar/",
+                 expect=200 if similar.np is not None else 503),
+        Endpoint("gig_create", "post", "/api/gigs/", expect=201,
+                 body={"title": "Benchmark gig", "description": "Created by the benchmark",
+                       "price": "49.00", "delivery_time": 3}),
+        Endpoint("gig_bulk_update", "patch", "/api/gigs/bulk/",
+                 body=lambda n: [{"id": gig.pk, "price": f"{50 + n % 50}.00"}]),
+        Endpoint("booking_list", "get", "/api/bookings/"),
+        Endpoint("booking_detail", "get", f"/api/bookings/{booking.pk}/"),
+        Endpoint("booking_create", "post", "/api/bookings/", expect=201,
+                 body={"gig": other_gig.pk}),
+        Endpoint("transaction_list", "get", "/api/transactions/"),
+        Endpoint("review_list", "get", "/api/reviews/"),
+        Endpoint("review_detail", "get", f"/api/reviews/{review.pk}/" if review else "/api/reviews/"),
+        Endpoint("dispute_list", "get", "/api/disputes/"),
+        Endpoint("dispute_create", "post", "/api/disputes/", expect=201,
+                 body={"booking": booking.pk, "description": "Benchmark dispute"}),
+        Endpoint("create_order", "post", "/api/create-order/",
+                 body=lambda n: {"booking": sync_orders[n].pk}),
+        Endpoint("create_order_async", "post", "/api/create-order/async/",
+                 body=lambda n: {"booking": async_orders[n].pk}),
+        Endpoint("export_transactions", "get", "/api/exports/transactions.csv.gz",
+                 token=staff_token),
+        Endpoint("webhook", "post", "/api/webhook/razorpay/", auth=False,
+                 body=lambda n: webhook(n)[0], headers=lambda n: webhook(n)[1]),
+        Endpoint("async_gig_list", "get", "/api/async/gigs/"),
+        Endpoint("async_gig_detail", "get", f"/api/async/gigs/{other_gig.pk}/"),
+        Endpoint("async_profile_detail", "get", f"/api/async/profiles/{other_gig.freelancer_id}/"),
+        Endpoint("async_booking_list", "get", "/api/async/bookings/"),
+    ]
+
+
+def bench_user(username=None):
+    """A freelancer who also has bookings: every endpoint has data to return."""
+    profiles = Profile.objects.select_related("user").filter(gigs__isnull=False, bookings__isnull=False)
+    if username:
+        profiles = profiles.filter(user__username=username)
+    profile = profiles.order_by("id").first()
+    return profile.user if profile else None
+
+
+def measure(endpoint, client, token, iterations):
+    """Time `iterations` requests (after one warm-up) and count their queries."""
+    response = endpoint.request(client, iterations, token)    # warm-up, uses the spare slot
+    if response.status_code != endpoint.expect:
+        raise AssertionError(
+            f"{endpoint.name}: expected {endpoint.expect}, got {response.status_code}: "
+            f"{response.content[:200]!r}"
+        )
+
+    latencies, queries, errors = [], [], 0
+    for n in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = endpoint.request(client, n, token)
+            latencies.append(time.perf_counter() - started)
+        queries.append(len(captured))
+        errors += response.status_code != endpoint.expect
+
+    ordered = sorted(latencies)
+    return {
+        "requests": iterations,
+        "errors": errors,
+        "throughput_rps": round(iterations / sum(latencies), 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p95_ms": round(_percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(_percentile(ordered, 99) * 1000, 2),
+        "queries": statistics.median(queries),
+        "queries_max": max(queries),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=settings.BASE_DIR, timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def run(iterations=50, username=None, only=(), use_cache=False):
+    """Run the suite; returns the baseline dict. The database is left untouched."""
+    overrides = {
+        "ALLOWED_HOSTS": ["testserver"],
+        "RAZORPAY_GATEWAY": "core.payments.FakeGateway",
+        "RAZORPAY_FAKE_LATENCY": 0,
+        "RAZORPAY_KEY_SECRET": WEBHOOK_SECRET,
+    }
+    if not use_cache:
+        overrides["API_CACHE_TIMEOUT"] = 0    # measure the views, not the response cache
+
+    results = {}
+    with override_settings(**overrides), transaction.atomic():
+        user = bench_user(username)
+        if user is None:
+            raise LookupError("no freelancer with bookings; run `manage.py seed_marketplace` first")
+        # known password for the token endpoint, whatever the seed was
+        user.set_password(SEED_PASSWORD)
+        user.save(update_fields=["password"])
+        token = str(AccessToken.for_user(user))
+        client = Client()
+
+        meta = {
+            "commit": _git_commit(),
+            "created_at": timezone.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "iterations": iterations,
+            "response_cache": use_cache,
+            "rows": {model.__name__: model.objects.count()
+                     for model in (Profile, Gig, Booking, Transaction, Review)},
+        }
+        for endpoint in endpoints(user, iterations):
+            if only and endpoint.name not in only:
+                continue
+            results[endpoint.name] = measure(endpoint, client, token, iterations)
+        transaction.set_rollback(True)
+
+    return {"meta": meta, "endpoints": results}
+
+
+def _change(old, new):
+    if not old:
+        return 0.0 if not new else float("inf")
+    return (new - old) / old * 100
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Per-endpoint changes between two baselines. Returns (rows, regressions):
+    a regression is a p50 more than `threshold` percent slower, or more
+    queries per request than before.
+    """
+    rows, regressions = [], []
+    old_endpoints = baseline.get("endpoints", {})
+    for name, new in current.get("endpoints", {}).items():
+        old = old_endpoints.get(name)
+        if old is None:
+            rows.append((name, None, None, None))
+            continue
+        p50 = _change(old["p50_ms"], new["p50_ms"])
+        rps = _change(old["throughput_rps"], new["throughput_rps"])
+        queries = new["queries"] - old["queries"]
+        rows.append((name, p50, rps, queries))
+        if p50 > threshold or queries > 0:
+            regressions.append(name)
+    return rows, regressions
+
+
+# ── JSON micro-benchmark
+
+def gig_payload(rows):
+    """GigSerializer output for `rows` unsaved gigs (no database access)."""
+    now = timezone.now()
+    gigs = []
+    for n in range(rows):
+        user = User(id=n % 200 + 1, username=f"freelancer-{n % 200:04d}")
+        profile = Profile(
+            id=user.id, user=user, bio="Full-stack developer, 8 years of Django and React. " * 3,
+            skills=SKILLS[n % 20:n % 20 + 4], portfolio_url="https://example.com/portfolio",
+            contact_email=f"{user.username}@example.com", contact_phone="+91 98765 43210",
+            rating_avg=4.5 + (n % 5) / 10, rating_count=n % 97,
+        )
+        gigs.append(Gig(
+            id=n + 1, freelancer=profile, title=f"I will build your landing page #{n} — fast ✓",
+            description="Responsive, accessible, SEO-friendly pages. " * 6,
+            price=Decimal(n * 37 % 50000) / 100 + 5, delivery_time=n % 30 + 1,
+            created_at=now - timedelta(minutes=n), image=f"gig_images/{n}.jpg" if n % 3 else "",
+            rating_avg=(n % 50) / 10, rating_count=n % 41,
+            last_reviewed_at=now - timedelta(hours=n) if n % 4 else None,
+        ))
+    return GigSerializer(gigs, many=True).data
+
+
+def _time(func, rounds):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+def json_benchmark(rows=1000, rounds=20):
+    """
+    Median milliseconds to render `rows` serialized gigs and to parse them
+    back, with DRF's classes, FastJSONRenderer/Parser on orjson and the
+    same without orjson (the stdlib fallback).
+    """
+    data = {"next": None, "previous": None, "results": gig_payload(rows)}
+    expected = JSONRenderer().render(data)
+    fast = renderers.FastJSONRenderer()
+    results = {"rows": rows, "bytes": len(expected), "orjson": renderers.orjson is not None}
+
+    def parse(parser):
+        return lambda: parser.parse(BytesIO(expected), parser_context={})
+
+    candidates = {
+        "drf": (JSONRenderer(), JSONParser()),
+        "fast": (fast, renderers.FastJSONParser()),
+    }
+    for name, (renderer, parser) in candidates.items():
+        results[f"{name}_render_ms"] = _time(lambda: renderer.render(data), rounds)
+        results[f"{name}_parse_ms"] = _time(parse(parser), rounds)
+    results["fast_identical"] = fast.render(data) == expected
+    results["stream_identical"] = b"".join(fast.stream(data)) == expected
+
+    with mock.patch.object(renderers, "orjson", None):
+        results["fallback_render_ms"] = _time(lambda: fast.render(data), rounds)
+        results["fallback_parse_ms"] = _time(parse(renderers.FastJSONParser()), rounds)
+        results["fallback_identical"] = fast.render(data) == expected
+    return results
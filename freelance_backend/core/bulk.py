@@ -0,0 +1,74 @@
+# core/bulk.py
+
+from django.db import transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+
+class BulkWriteMixin:
+    """
+    POST   /<resource>/bulk/  [{...}, ...]           -> bulk_create
+    PATCH  /<resource>/bulk/  [{"id": 1, ...}, ...]  -> bulk_update
+
+    The whole batch is validated by the serializer's BulkListSerializer and
+    written in one transaction; if any item is invalid nothing is written
+    and the 400 body maps item index -> errors. A PATCH locks its rows and
+    reads them once, so the rows validated, snapshotted by
+    before_bulk_write() and written are the same, and a concurrent write to
+    one of them waits rather than being overwritten.
+    """
+    bulk_max_items = 500
+
+    def get_bulk_save_kwargs(self):
+        """Fields shared by every row in the batch, resolved once."""
+        return {}
+
+    def get_bulk_queryset(self):
+        """Rows a PATCH may touch."""
+        return self.get_queryset()
+
+    def before_bulk_write(self, instances):
+        """PATCH only: the rows about to change, before any field is assigned."""
+
+    def after_bulk_write(self, objs, created):
+        """Bulk writes send no model signals; do their side effects here."""
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'non_field_errors': ['Expected a non-empty list of items.']})
+        if len(items) > self.bulk_max_items:
+            raise ValidationError(
+                {'non_field_errors': [f'At most {self.bulk_max_items} items per request.']}
+            )
+
+        created = request.method == 'POST'
+        with transaction.atomic():
+            if created:
+                serializer = self.get_serializer(data=items, many=True)
+            else:
+                ids = [item.get('id') for item in items if isinstance(item, dict)]
+                ids = [i for i in ids if isinstance(i, int)]
+                # in pk order, so two overlapping batches lock in the same order
+                instances = list(
+                    self.get_bulk_queryset().select_for_update(of=('self',))
+                    .filter(pk__in=ids).order_by('pk')
+                )
+                serializer = self.get_serializer(instances, data=items, many=True, partial=True)
+            serializer.is_valid(raise_exception=True)
+
+            if not created:
+                self.before_bulk_write(instances)
+            objs = serializer.save(**self.get_bulk_save_kwargs())
+            self.after_bulk_write(objs, created)
+
+        # re-read through the viewset queryset so the response uses its
+        # select_related plan instead of one query per nested relation
+        saved = self.get_queryset().filter(pk__in=[obj.pk for obj in objs]).order_by('pk')
+        return Response(
+            self.get_serializer(saved, many=True).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
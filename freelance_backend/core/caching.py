@@ -0,0 +1,268 @@
+# core/caching.py
+#
+# Response cache for the read-heavy gig and profile endpoints.
+#
+# Entries are keyed by a per-object version (gig / profile) or a per-resource
+# list version, so invalidation is just bumping a version number: stale
+# entries are never read again and simply age out of the backend. Versions
+# are bumped from post_save / post_delete receivers below, both immediately
+# and again on commit, so a reader racing the writing transaction can't pin
+# pre-commit data under the new version.
+#
+# A gig detail embeds its freelancer's profile, so its key also carries that
+# profile's version: a profile or username change is one bump, however many
+# gigs the freelancer has.
+
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.response import Response
+
+from .conditional import get_validators, not_modified, set_validators
+from .models import Booking, Gig, Profile, Review
+from .routers import pin_primary, reading_from_replicas
+
+
+def _cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+# ── hit / miss counters (per process)
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(resource, outcome):
+    with _stats_lock:
+        _stats[(resource, outcome)] += 1
+
+
+def cache_stats():
+    """{"gig": {"hit": n, "miss": n}, "profile": {...}} for this process."""
+    with _stats_lock:
+        snapshot = dict(_stats)
+    result = {}
+    for (resource, outcome), n in snapshot.items():
+        result.setdefault(resource, {"hit": 0, "miss": 0})[outcome] = n
+    return result
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+# ── versions
+
+def _version_key(resource, ident):
+    return f"api:v:{resource}:{ident}"
+
+
+def get_version(resource, ident):
+    key = _version_key(resource, ident)
+    version = _cache().get(key)
+    if version is None:
+        # Seed from the clock: if a version key is evicted we must not fall
+        # back to a number an older entry was stored under.
+        _cache().add(key, time.time_ns(), timeout=None)
+        version = _cache().get(key)
+    return version
+
+
+def _bump_now(resource, ident):
+    key = _version_key(resource, ident)
+    try:
+        _cache().incr(key)
+    except ValueError:
+        _cache().set(key, time.time_ns(), timeout=None)
+    if settings.DATABASE_REPLICAS:
+        _cache().set(_written_key(resource, ident), True, settings.DATABASE_REPLICA_LAG)
+
+
+def _written_key(resource, ident):
+    return f"api:w:{resource}:{ident}"
+
+
+def recently_written(resource, ident):
+    """True within DATABASE_REPLICA_LAG seconds of a bump: a replica may not
+    have the change yet, and caching its answer would pin stale data under
+    the new version."""
+    return _cache().get(_written_key(resource, ident)) is not None
+
+
+def bump_version(resource, ident):
+    _bump_now(resource, ident)
+    transaction.on_commit(lambda: _bump_now(resource, ident))
+
+
+def invalidate_gig(gig_id):
+    bump_version("gig", gig_id)
+    bump_version("gig", "list")
+
+
+def invalidate_gigs(gig_ids):
+    """For bulk writes, which send no post_save."""
+    for gig_id in gig_ids:
+        bump_version("gig", gig_id)
+    bump_version("gig", "list")
+
+
+def invalidate_profile(profile_id):
+    # gig payloads embed the freelancer profile: the details through their
+    # key (CachedReadMixin.cache_embeds), the list pages through its version
+    bump_version("profile", profile_id)
+    bump_version("profile", "list")
+    bump_version("gig", "list")
+
+
+# ── viewset mixin
+
+class CachedReadMixin:
+    """
+    Serve list/retrieve from the response cache. Authentication and
+    permissions still run first (in initial()); only the ORM work and
+    serialization are skipped on a hit. Payloads must not depend on the
+    requesting user.
+    """
+    cache_resource = None
+    # (resource, field) of the one related object a detail payload embeds,
+    # e.g. ("profile", "freelancer_id"); its version is part of the key
+    cache_embeds = None
+
+    def _embedded(self, ident, version):
+        """(resource, ident) of the object the detail embeds; None if unknown."""
+        resource, field = self.cache_embeds
+        cache = _cache()
+        # under the object's version: a save that points it elsewhere bumps that
+        pointer = f"api:{self.cache_resource}:{ident}:{version}:{field}"
+        related = cache.get(pointer)
+        if related is None:
+            if reading_from_replicas() and recently_written(self.cache_resource, ident):
+                pin_primary()
+            try:
+                related = (
+                    self.queryset.model._default_manager.filter(**{self.lookup_field: ident})
+                    .values_list(field, flat=True).first()
+                )
+            except (TypeError, ValueError, ValidationError):
+                return None
+            if related is None:
+                return None
+            cache.set(pointer, related, settings.API_CACHE_TIMEOUT)
+        return resource, related
+
+    def _cache_key(self, request, ident):
+        """(key, embedded); key is None when the response can't be cached."""
+        version = get_version(self.cache_resource, ident)
+        # full URI: pagination links embed host + query string
+        digest = hashlib.md5(request.build_absolute_uri().encode(), usedforsecurity=False).hexdigest()
+        if self.cache_embeds is None or ident == "list":
+            return f"api:{self.cache_resource}:{ident}:{version}:{digest}", None
+        embedded = self._embedded(ident, version)
+        if embedded is None:
+            return None, None
+        resource, related = embedded
+        related_version = get_version(resource, related)
+        key = f"api:{self.cache_resource}:{ident}:{version}:{resource}:{related}:{related_version}"
+        return f"{key}:{digest}", embedded
+
+    def _cached_response(self, request, ident, render):
+        cache = _cache()
+        key, embedded = self._cache_key(request, ident)
+        if key is None:
+            # e.g. a missing object: nothing to cache
+            _count(self.cache_resource, "miss")
+            response = render()
+            response["X-Cache"] = "MISS"
+            return response
+        entry = cache.get(key)
+        if entry is not None:
+            _count(self.cache_resource, "hit")
+            data, etag, last_modified = entry
+            # validators are cached with the body and invalidated with it,
+            # so conditional requests are answered without touching the DB
+            response = None
+            if etag is not None:
+                response = not_modified(request, etag, last_modified)
+            if response is None:
+                response = Response(data)
+                if etag is not None:
+                    set_validators(response, etag, last_modified)
+            response["X-Cache"] = "HIT"
+            return response
+
+        _count(self.cache_resource, "miss")
+        if reading_from_replicas() and (
+            recently_written(self.cache_resource, ident)
+            or (embedded is not None and recently_written(*embedded))
+        ):
+            pin_primary()
+        response = render()
+        if response.status_code == status.HTTP_200_OK:
+            entry = (response.data, *get_validators(response))
+            cache.set(key, entry, settings.API_CACHE_TIMEOUT)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(
+            request, "list", lambda: super(CachedReadMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        ident = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        return self._cached_response(
+            request, ident, lambda: super(CachedReadMixin, self).retrieve(request, *args, **kwargs)
+        )
+
+
+# ── invalidation receivers
+
+@receiver(post_save, sender=Gig)
+@receiver(post_delete, sender=Gig)
+def invalidate_gig_cache(sender, instance, **kwargs):
+    invalidate_gig(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_cache(sender, instance, **kwargs):
+    invalidate_profile(instance.pk)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, update_fields=None, **kwargs):
+    # every login saves last_login; that doesn't change any payload
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    for profile_id in Profile.objects.filter(user_id=instance.pk).values_list("id", flat=True):
+        invalidate_profile(profile_id)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_rating_cache(sender, instance, **kwargs):
+    # rating aggregates are written with queryset.update(), which sends no
+    # Gig/Profile signals of its own
+    row = (
+        Booking.objects.filter(pk=instance.booking_id)
+        .values_list("gig_id", "gig__freelancer_id")
+        .first()
+    )
+    if row:
+        gig_id, profile_id = row
+        invalidate_gig(gig_id)
+        bump_version("profile", profile_id)
+        bump_version("profile", "list")
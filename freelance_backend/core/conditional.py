@@ -0,0 +1,98 @@
+# core/conditional.py
+#
+# Conditional GET (ETag / Last-Modified -> 304 Not Modified).
+#
+# Freshness comes from one aggregate query (COUNT + MAX(updated_at) over the
+# rows and the related rows the serializer embeds), so a poll that hasn't
+# changed costs neither serialization nor a response body.
+
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+
+def not_modified(request, etag, last_modified):
+    """A 304 carrying the validators if the client's copy is current, else None."""
+    response = get_conditional_response(
+        request._request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    if not (200 <= response.status_code < 300 or response.status_code == 304):
+        return
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+
+
+def get_validators(response):
+    """(etag, last_modified) previously set on a response, e.g. to cache them."""
+    return response.get('ETag'), parse_http_date_safe(response.get('Last-Modified'))
+
+
+class ConditionalGetMixin:
+    """
+    Add to a viewset and declare:
+      conditional_actions  which actions answer conditionally ('list', 'retrieve')
+      freshness_fields     timestamp fields whose MAX() changes with the payload,
+                           e.g. ('updated_at', 'freelancer__updated_at')
+    """
+    conditional_actions = ('retrieve',)
+    freshness_fields = ('updated_at',)
+
+    def _freshness_queryset(self, kwargs):
+        queryset = self.get_queryset()
+        if self.action == 'list':
+            return self.filter_queryset(queryset)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+
+    def _validators(self, request, kwargs):
+        aggregates = {f'max_{i}': Max(f) for i, f in enumerate(self.freshness_fields)}
+        state = self._freshness_queryset(kwargs).aggregate(rows=Count('pk'), **aggregates)
+        if self.action != 'list' and not state['rows']:
+            return None, None   # let the normal path raise 404
+
+        stamps = [state[k] for k in aggregates if state[k] is not None]
+        last_modified = int(max(stamps).timestamp()) if stamps else None
+
+        # Strong validator: the representation also depends on the query
+        # string (cursor, filters) and on the negotiated renderer.
+        fingerprint = repr((
+            state['rows'],
+            [state[k] and state[k].isoformat() for k in aggregates],
+            request.get_full_path(),
+            request.accepted_media_type,
+        ))
+        etag = quote_etag(hashlib.sha1(fingerprint.encode(), usedforsecurity=False).hexdigest())
+        return etag, last_modified
+
+    def _conditional(self, request, kwargs, render):
+        if self.action not in self.conditional_actions:
+            return render()
+
+        etag, last_modified = self._validators(request, kwargs)
+        if etag is None:
+            return render()
+
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = render()
+        set_validators(response, etag, last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(
+            request, kwargs, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(
+            request, kwargs, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        )
@@ -0,0 +1,188 @@
+# core/exports.py
+#
+# Full Transaction / Booking exports for finance, as CSV or NDJSON, behind
+# /api/exports/<name>.<csv|ndjson>[.gz] (staff only) and
+# `manage.py export_data`.
+#
+# An export never holds more than a chunk of rows: the rows are read with
+# values_list() + iterator(chunk_size=EXPORT_CHUNK_SIZE), a server-side
+# cursor on Postgres, encoded a chunk at a time and, for .gz, compressed as
+# they go. The HTTP response is a StreamingHttpResponse over the same
+# generator, so memory stays flat from ten rows to ten million. Rows come
+# in (date, id) order, which the (created_at, id) / (booked_at, id) indexes
+# and their status-led counterparts serve, and are read from a replica when
+# there is one.
+#
+# Filters (query parameters, or the command's options of the same names):
+#   since / until   ISO date or datetime; until is exclusive
+#   status          the row's status
+
+import csv
+import datetime
+import zlib
+
+from django.conf import settings
+from django.db import router
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import Booking, Transaction
+from .renderers import FastJSONRenderer
+from .routers import release, use_replicas
+
+
+class Export:
+    """One exportable table: `columns` maps each output column to the
+    values_list() path it is read from; `date_field` is what since/until
+    and the ordering apply to."""
+
+    def __init__(self, model, date_field, columns, statuses=None):
+        self.model = model
+        self.date_field = date_field
+        self.columns = columns
+        self.statuses = statuses
+
+    def queryset(self, params):
+        queryset = self.model.objects.all()
+        since = _datetime_param(params, "since")
+        if since is not None:
+            queryset = queryset.filter(**{f"{self.date_field}__gte": since})
+        until = _datetime_param(params, "until")
+        if until is not None:
+            queryset = queryset.filter(**{f"{self.date_field}__lt": until})
+        status = params.get("status")
+        if status:
+            if self.statuses is not None and status not in self.statuses:
+                raise ValidationError({"status": f"Choose one of: {', '.join(self.statuses)}."})
+            queryset = queryset.filter(status=status)
+        return queryset.order_by(self.date_field, "id")
+
+    def rows(self, params):
+        """Every matching row as a tuple, in `columns` order, a chunk at a time."""
+        queryset = self.queryset(params)
+        token = use_replicas()
+        try:
+            queryset = queryset.using(router.db_for_read(self.model))
+        finally:
+            release(token)
+        return queryset.values_list(*self.columns.values()).iterator(
+            chunk_size=settings.EXPORT_CHUNK_SIZE
+        )
+
+
+EXPORTS = {
+    "transactions": Export(Transaction, "created_at", {
+        "id": "id",
+        "created_at": "created_at",
+        "status": "status",
+        "amount": "amount",
+        "razorpay_order_id": "razorpay_order_id",
+        "razorpay_payment_id": "razorpay_payment_id",
+        "booking_id": "booking_id",
+        "booking_status": "booking__status",
+        "gig_id": "booking__gig_id",
+        "gig_title": "booking__gig__title",
+        "freelancer": "booking__gig__freelancer__user__username",
+        "client": "booking__client__user__username",
+    }, statuses=Transaction.STATUSES),
+    "bookings": Export(Booking, "booked_at", {
+        "id": "id",
+        "booked_at": "booked_at",
+        "status": "status",
+        "gig_id": "gig_id",
+        "gig_title": "gig__title",
+        "price": "gig__price",
+        "freelancer": "gig__freelancer__user__username",
+        "client": "client__user__username",
+        "transaction_status": "transaction__status",
+        "amount_paid": "transaction__amount",
+    }, statuses=[value for value, _ in Booking._meta.get_field("status").choices]),
+}
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _datetime_param(params, name):
+    raw = params.get(name)
+    if raw in (None, ""):
+        return None
+    try:
+        value = parse_datetime(raw)
+        if value is None:
+            day = parse_date(raw)
+            value = day and datetime.datetime.combine(day, datetime.time())
+    except ValueError:
+        value = None
+    if value is None:
+        raise ValidationError({name: "Use an ISO date or datetime, e.g. 2026-01-31."})
+    if settings.USE_TZ and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+class _Lines:
+    """csv.writer target that keeps what is written."""
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+
+    def take(self):
+        text, self.parts = "".join(self.parts), []
+        return text.encode()
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _csv(columns, rows):
+    lines = _Lines()
+    writer = csv.writer(lines)
+    writer.writerow(columns)
+    yield lines.take()
+    for chunk in _chunks(rows, settings.EXPORT_CHUNK_SIZE):
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime.datetime) else value for value in row]
+            for row in chunk
+        )
+        yield lines.take()
+
+
+def _ndjson(columns, rows):
+    # the API's own encoder: Decimals as strings, datetimes with a "Z"
+    dumps = FastJSONRenderer().dumps
+    for chunk in _chunks(rows, settings.EXPORT_CHUNK_SIZE):
+        yield b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in chunk)
+
+
+def _gzip(pieces):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for piece in pieces:
+        compressed = compressor.compress(piece)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream(name, fmt, params, gzip=False):
+    """The export as an iterator of bytes. Filters are checked up front, so
+    a bad one raises ValidationError before anything is sent."""
+    export = EXPORTS[name]
+    rows = export.rows(params)
+    columns = list(export.columns)
+    pieces = _csv(columns, rows) if fmt == "csv" else _ndjson(columns, rows)
+    return _gzip(pieces) if gzip else pieces
@@ -0,0 +1,130 @@
+# core/fieldsets.py
+#
+# Sparse fieldsets for the gig and booking reads:
+#
+#   ?fields=id,title,price               only these fields
+#   ?expand=freelancer                   embed the relation instead of its id
+#   ?fields=id,gig_detail.title          a dotted path implies the expansion
+#   ?expand=gig_detail.freelancer        nested expansions
+#
+# Without either parameter the representation is the full one it has
+# always been. With one, relations are collapsed to their primary key
+# unless expanded, so a screen gets exactly what it lists. The projections
+# (core/projections.py) and, for retrieve, only()/select_related() are
+# derived from the shaped serializer, so the database reads no more than is
+# sent.
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+MAX_PATHS = 50
+MAX_DEPTH = 3
+
+
+class Shape:
+    """
+    fields  names to keep, or None for all of them
+    expand  {relation name: Shape of the embedded serializer}
+    Hashable, so compiled projections can be cached per shape.
+    """
+    __slots__ = ("fields", "expand", "_key")
+
+    def __init__(self, fields=None, expand=None):
+        self.fields = frozenset(fields) if fields is not None else None
+        self.expand = dict(expand or {})
+        self._key = (
+            None if self.fields is None else tuple(sorted(self.fields)),
+            tuple(sorted((name, shape._key) for name, shape in self.expand.items())),
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, Shape) and self._key == other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __repr__(self):
+        return f"Shape(fields={self._key[0]}, expand={self.expand})"
+
+
+def _paths(params, name):
+    paths = [p.strip() for p in (params.get(name) or "").split(",") if p.strip()]
+    if len(paths) > MAX_PATHS:
+        raise ValidationError({name: f"At most {MAX_PATHS} entries."})
+    split = [path.split(".") for path in paths]
+    if any(len(parts) > MAX_DEPTH or not all(parts) for parts in split):
+        raise ValidationError({name: f"Use names or dotted paths up to {MAX_DEPTH} levels deep."})
+    return split
+
+
+def parse_shape(params):
+    """The Shape asked for by ?fields= / ?expand=, or None for the full representation."""
+    fields, expand = _paths(params, "fields"), _paths(params, "expand")
+    if not fields and not expand:
+        return None
+
+    def node():
+        return {"fields": None, "expand": {}}
+
+    root = node()
+    for parts in expand:
+        current = root
+        for part in parts:
+            current = current["expand"].setdefault(part, node())
+    if fields:
+        root["fields"] = set()
+        for parts in fields:
+            current = root
+            for part in parts[:-1]:
+                current["fields"].add(part)
+                current = current["expand"].setdefault(part, node())
+                if current["fields"] is None:
+                    current["fields"] = set()
+            current["fields"].add(parts[-1])
+
+    def build(tree):
+        return Shape(tree["fields"], {name: build(sub) for name, sub in tree["expand"].items()})
+    return build(root)
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin: SomeSerializer(..., shape=Shape(...)) renders only the
+    shape's fields. `expandable_fields` maps each nested relation to the
+    attribute holding its primary key, which is rendered when the relation
+    isn't expanded. shape=None (the default) keeps every field.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, shape=None, **kwargs):
+        self.shape = shape
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        shape = self.shape
+        if shape is None:
+            return fields
+
+        readable = [name for name, field in fields.items() if not field.write_only]
+        errors = {}
+        if shape.fields is not None and not shape.fields.issubset(readable):
+            unknown = ", ".join(sorted(shape.fields.difference(readable)))
+            errors["fields"] = f"Unknown field(s): {unknown}. Choose from: {', '.join(readable)}."
+        if not set(shape.expand).issubset(self.expandable_fields):
+            unknown = ", ".join(sorted(set(shape.expand).difference(self.expandable_fields)))
+            errors["expand"] = (f"Can't expand {unknown}. "
+                                f"Expandable: {', '.join(self.expandable_fields) or 'nothing'}.")
+        if errors:
+            raise ValidationError(errors)
+
+        for name in readable:
+            if name in shape.expand:
+                nested = fields[name]
+                fields[name] = type(nested)(*nested._args, **{**nested._kwargs, "shape": shape.expand[name]})
+            elif shape.fields is not None and name not in shape.fields:
+                del fields[name]
+            elif name in self.expandable_fields:
+                fields[name] = serializers.IntegerField(source=self.expandable_fields[name], read_only=True)
+        return fields
@@ -0,0 +1,144 @@
+# core/filters.py
+
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connection
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from .models import Booking
+from .skills import SKILL_MATCH_MODES, normalize_skill, profiles_with_skills
+
+
+# Must stay identical to the expression indexed in
+# migrations/0006_gig_search_indexes.py, otherwise Postgres won't use the GIN index.
+SEARCH_CONFIG = "english"
+
+
+def gig_search_vector():
+    return SearchVector("title", "description", config=SEARCH_CONFIG)
+
+
+# ?ordering= values for /api/gigs/ -> cursor ordering (see core/pagination.py).
+# Each leading column has a matching (column, id) index on Gig.
+GIG_ORDERINGS = {
+    "newest": ("-created_at", "-id"),
+    "rating": ("-rating_avg", "-id"),
+    "trending": ("-trending_score", "-id"),
+}
+
+
+def gig_ordering(params):
+    key = params.get("ordering") or "newest"
+    if key not in GIG_ORDERINGS:
+        raise ValidationError(
+            {"ordering": f"Choose one of: {', '.join(GIG_ORDERINGS)}."}
+        )
+    return GIG_ORDERINGS[key]
+
+
+def _decimal_param(params, name):
+    raw = params.get(name)
+    if raw in (None, ""):
+        return None
+    try:
+        return Decimal(raw)
+    except InvalidOperation:
+        raise ValidationError({name: "A valid number is required."})
+
+
+def _int_param(params, name):
+    raw = params.get(name)
+    if raw in (None, ""):
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValidationError({name: "A valid integer is required."})
+
+
+def search_gigs(queryset, text):
+    """Full-text search over title/description.
+
+    Postgres uses the tsvector GIN index; other backends (SQLite in tests)
+    fall back to every word appearing in the title or the description.
+    """
+    if connection.vendor == "postgresql":
+        return queryset.annotate(search=gig_search_vector()).filter(
+            search=SearchQuery(text, config=SEARCH_CONFIG, search_type="websearch")
+        )
+
+    for word in text.split():
+        queryset = queryset.filter(
+            Q(title__icontains=word) | Q(description__icontains=word)
+        )
+    return queryset
+
+
+def filter_gigs(queryset, params):
+    """
+    Apply the /api/gigs/ query parameters:
+      ?search=            full-text over title + description
+      ?min_price= / ?max_price=
+      ?max_delivery_time= days
+      ?freelancer=        profile id
+    """
+    text = (params.get("search") or "").strip()
+    if text:
+        queryset = search_gigs(queryset, text)
+
+    min_price = _decimal_param(params, "min_price")
+    if min_price is not None:
+        queryset = queryset.filter(price__gte=min_price)
+
+    max_price = _decimal_param(params, "max_price")
+    if max_price is not None:
+        queryset = queryset.filter(price__lte=max_price)
+
+    max_delivery = _int_param(params, "max_delivery_time")
+    if max_delivery is not None:
+        queryset = queryset.filter(delivery_time__lte=max_delivery)
+
+    freelancer = _int_param(params, "freelancer")
+    if freelancer is not None:
+        queryset = queryset.filter(freelancer_id=freelancer)
+
+    return queryset
+
+
+def filter_bookings(queryset, params):
+    """
+    Apply the /api/bookings/ query parameters:
+      ?status=PENDING|PAID|COMPLETED|CANCELLED
+    """
+    booking_status = params.get("status")
+    if booking_status:
+        if booking_status not in dict(Booking._meta.get_field("status").choices):
+            raise ValidationError({"status": "Unknown booking status."})
+        queryset = queryset.filter(status=booking_status)
+    return queryset
+
+
+def skill_params(params):
+    """?skills=a,b&skill_match=any|all -> (normalized skills, match mode)."""
+    raw = params.get("skills") or ""
+    skills = sorted({normalize_skill(s) for s in raw.split(",") if s.strip()})
+    match = params.get("skill_match") or "any"
+    if match not in SKILL_MATCH_MODES:
+        raise ValidationError(
+            {"skill_match": f"Choose one of: {', '.join(SKILL_MATCH_MODES)}."}
+        )
+    return skills, match
+
+
+def filter_profiles(queryset, params):
+    """
+    Apply the /api/profiles/ query parameters:
+      ?skills=python,django   comma-separated, case-insensitive
+      ?skill_match=any|all    default any
+    """
+    skills, match = skill_params(params)
+    if skills:
+        queryset = queryset.filter(pk__in=profiles_with_skills(skills, match))
+    return queryset
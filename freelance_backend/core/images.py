@@ -0,0 +1,158 @@
+# core/images.py
+#
+# Off-request processing for Gig.image.
+#
+# Uploads are stored as-is by the request; `manage.py process_gig_images`
+# later hashes each new upload, reuses the ImageAsset of an identical
+# earlier upload (deleting the duplicate file), or else renders
+# metadata-free WebP (and AVIF where Pillow supports it) variants at a few
+# fixed widths. GigSerializer exposes those variants so list cards can
+# download a thumbnail instead of the multi-megabyte original.
+
+import hashlib
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+from PIL import Image, ImageOps, features
+
+from .models import Gig, ImageAsset
+
+
+VARIANT_WIDTHS = (320, 640, 1280)
+VARIANT_FORMATS = [("webp", "WEBP", {"quality": 80, "method": 4})]
+if features.check("avif"):
+    VARIANT_FORMATS.append(("avif", "AVIF", {"quality": 60}))
+VARIANT_DIR = "gig_images/variants"
+
+
+def _sha256(field_file):
+    digest = hashlib.sha256()
+    with field_file.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def render_variants(field_file, sha256):
+    """Write the resized, metadata-free variants; returns (width, height, variants)."""
+    with field_file.open("rb") as fh:
+        image = Image.open(fh)
+        image.load()
+    has_alpha = image.mode in ("RGBA", "LA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+    # apply the EXIF orientation, then drop EXIF/ICC/XMP entirely
+    image = ImageOps.exif_transpose(image).convert("RGBA" if has_alpha else "RGB")
+    image.info = {}
+
+    width, height = image.size
+    widths = [w for w in VARIANT_WIDTHS if w < width] + [min(width, VARIANT_WIDTHS[-1])]
+    variants = []
+    for target in sorted(set(widths)):
+        resized = image if target == width else image.resize(
+            (target, max(1, round(height * target / width))), Image.LANCZOS
+        )
+        for ext, fmt, options in VARIANT_FORMATS:
+            buffer = BytesIO()
+            resized.save(buffer, fmt, **options)
+            name = default_storage.save(
+                f"{VARIANT_DIR}/{sha256[:2]}/{sha256}_{target}.{ext}",
+                ContentFile(buffer.getvalue()),
+            )
+            variants.append({
+                "name": name,
+                "width": resized.width,
+                "height": resized.height,
+                "format": ext,
+                "bytes": buffer.tell(),
+            })
+    return width, height, variants
+
+
+def process_gig_image(gig):
+    """Attach an ImageAsset to one queued gig. Returns None, writing
+    nothing, if the gig's image was replaced while it was processed."""
+    uploaded = gig.image.name
+    sha256 = _sha256(gig.image)
+    asset = ImageAsset.objects.filter(sha256=sha256).first()
+    if asset is None:
+        width, height, variants = render_variants(gig.image, sha256)
+        asset, _ = ImageAsset.objects.get_or_create(
+            sha256=sha256,
+            defaults={"original": uploaded, "width": width,
+                      "height": height, "variants": variants},
+        )
+
+    # rendering takes a while; only write if the upload is still the one read
+    with transaction.atomic():
+        current = (
+            Gig.objects.select_for_update().filter(pk=gig.pk)
+            .values_list("image", flat=True).first()
+        )
+        if current != uploaded:
+            return None     # a newer upload stays queued for the next pass
+        if asset.original != uploaded:
+            # identical bytes already stored: point at them, drop the duplicate
+            gig.image.name = asset.original
+            transaction.on_commit(lambda: default_storage.delete(uploaded))
+        gig.image_asset = asset
+        gig.save(update_fields=["image", "image_asset", "updated_at"])
+    return asset
+
+
+def pending_gigs():
+    return Gig.objects.filter(image_asset__isnull=True).exclude(image="").order_by("id")
+
+
+def process_pending(limit=50, skip=()):
+    """Process up to `limit` queued gigs, ignoring ids in `skip`.
+    Returns (done, failed_ids)."""
+    done, failed = 0, []
+    for gig in pending_gigs().exclude(pk__in=skip)[:limit]:
+        try:
+            if process_gig_image(gig) is not None:
+                done += 1
+        except (OSError, ValueError, Image.DecompressionBombError):
+            failed.append(gig.pk)
+    return done, failed
+
+
+def variant_payload(asset, request=None):
+    """[{url, width, height, format}] for a serializer, smallest first."""
+    return variant_urls(asset.variants if asset is not None else None, request)
+
+
+def variant_urls(variants, request=None):
+    """variant_payload() from ImageAsset.variants alone (projections.py)."""
+    payload = []
+    for variant in variants or ():
+        url = default_storage.url(variant["name"])
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        payload.append({
+            "url": url,
+            "width": variant["width"],
+            "height": variant["height"],
+            "format": variant["format"],
+        })
+    return payload
+
+
+@receiver(pre_save, sender=Gig)
+def requeue_changed_image(sender, instance, update_fields=None, **kwargs):
+    # a new (or removed) upload invalidates the processed asset
+    if instance.image_asset_id is None or (update_fields and "image" not in update_fields):
+        return
+    if not instance.image:
+        instance.image_asset = None
+        return
+    original = (
+        ImageAsset.objects.filter(pk=instance.image_asset_id)
+        .values_list("original", flat=True).first()
+    )
+    if original != instance.image.name:
+        instance.image_asset = None
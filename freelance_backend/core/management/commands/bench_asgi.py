@@ -0,0 +1,184 @@
+# core/management/commands/bench_asgi.py
+#
+# Sync views under WSGI vs the native async views (core/async_views.py)
+# under ASGI, in-process and against the configured (seeded) database.
+#
+# Both sides are closed-loop: --concurrency clients each send requests
+# back to back. Every response is "delivered" to a slow client that needs
+# --client-delay seconds to read it. Under WSGI a worker thread (one of
+# --threads) is held for that time, as with a thread-per-connection server.
+# Under ASGI the handler just awaits the send and the event loop moves on.
+# Latency is measured from the moment a client wants to send, so it
+# includes the wait for a free worker thread.
+
+import asyncio
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import Booking
+
+
+def _paths(booking):
+    gig, profile = booking.gig, booking.gig.freelancer
+    sync = ["/api/gigs/", f"/api/gigs/{gig.id}/", f"/api/profiles/{profile.id}/", "/api/bookings/"]
+    return sync, [
+        "/api/async/gigs/", f"/api/async/gigs/{gig.id}/",
+        f"/api/async/profiles/{profile.id}/", "/api/async/bookings/",
+    ]
+
+
+def _summary(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "throughput_rps": round(len(ordered) / elapsed, 1),
+        "p50_ms": round(statistics.median(ordered) * 1000, 1),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 1),
+    }
+
+
+def run_wsgi(paths, token, total, concurrency, threads, delay):
+    app = WSGIHandler()
+    pool = ThreadPoolExecutor(max_workers=threads)    # FIFO, like a server's accept queue
+    counter = iter(range(total))
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+
+    def serve(path):
+        status = []
+        environ = {
+            "REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": "",
+            "SERVER_NAME": "localhost", "SERVER_PORT": "80", "HTTP_HOST": "localhost",
+            "HTTP_AUTHORIZATION": f"Bearer {token}", "wsgi.input": BytesIO(),
+            "wsgi.url_scheme": "http",
+        }
+        body = app(environ, lambda s, h, exc_info=None: status.append(s))
+        b"".join(body)
+        body.close()
+        time.sleep(delay)     # slow client reading the response
+        return status[0]
+
+    def client():
+        while True:
+            with lock:
+                n = next(counter, None)
+            if n is None:
+                return
+            started = time.perf_counter()
+            ok = pool.submit(serve, paths[n % len(paths)]).result().startswith("200")
+            with lock:
+                latencies.append(time.perf_counter() - started)
+                errors[0] += not ok
+
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    pool.submit(close_old_connections)
+    pool.shutdown()
+    return _summary(latencies, errors[0], elapsed)
+
+
+async def run_asgi(paths, token, total, concurrency, delay):
+    app = ASGIHandler()
+    counter = iter(range(total))
+    latencies, errors = [], [0]
+
+    async def request(path):
+        done = asyncio.Event()
+        sent = []
+
+        async def receive():
+            if not sent:
+                sent.append(True)
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        status = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+            elif not message.get("more_body"):
+                await asyncio.sleep(delay)    # slow client reading the response
+                done.set()
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": b"", "root_path": "",
+            "headers": [(b"host", b"localhost"), (b"authorization", f"Bearer {token}".encode())],
+            "client": ("127.0.0.1", 50000), "server": ("localhost", 80),
+        }
+        await app(scope, receive, send)
+        return status[0]
+
+    async def client():
+        for n in counter:
+            started = time.perf_counter()
+            if await request(paths[n % len(paths)]) != 200:
+                errors[0] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return _summary(latencies, errors[0], time.perf_counter() - started)
+
+
+class Command(BaseCommand):
+    help = "Benchmark sync WSGI vs async ASGI reads (gigs, profile, bookings) on the current database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=200)
+        parser.add_argument("--threads", type=int, default=8,
+                            help="WSGI worker threads (e.g. gunicorn --threads).")
+        parser.add_argument("--client-delay", type=float, default=0.05,
+                            help="Seconds a slow client takes to read each response.")
+        parser.add_argument("--user", help="Username to authenticate as (default: first client with a booking).")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        bookings = Booking.objects.select_related("client__user", "gig__freelancer")
+        if options["user"]:
+            bookings = bookings.filter(client__user__username=options["user"])
+        booking = bookings.order_by("id").first()
+        if booking is None:
+            raise CommandError("No bookings to read; seed the database first.")
+
+        token = str(AccessToken.for_user(booking.client.user))
+        sync_paths, async_paths = _paths(booking)
+        args = (token, options["requests"], options["concurrency"])
+
+        # measure the views, not the response cache
+        with override_settings(API_CACHE_TIMEOUT=0, ALLOWED_HOSTS=["localhost"]):
+            results = {
+                "wsgi": run_wsgi(sync_paths, *args, options["threads"], options["client_delay"]),
+                "asgi": asyncio.run(run_asgi(async_paths, *args, options["client_delay"])),
+            }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'':6}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:6}{r['throughput_rps']:>10}{r['p50_ms']:>10}{r['p99_ms']:>10}{r['errors']:>8}"
+            )
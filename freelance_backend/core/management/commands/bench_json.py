@@ -0,0 +1,33 @@
+# core/management/commands/bench_json.py
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import json_benchmark
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark the JSON renderers/parsers on a large GigSerializer payload (no database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Gigs in the payload.")
+        parser.add_argument("--rounds", type=int, default=20)
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        results = json_benchmark(options["rows"], options["rounds"])
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{results['rows']} gigs, {results['bytes']} bytes, "
+                          f"orjson {'installed' if results['orjson'] else 'missing'}")
+        self.stdout.write(f"{'':10}{'render ms':>11}{'parse ms':>10}")
+        for name in ("drf", "fast", "fallback"):
+            self.stdout.write(
+                f"{name:10}{results[f'{name}_render_ms']:>11}{results[f'{name}_parse_ms']:>10}"
+            )
+        same = all(results[k] for k in ("fast_identical", "stream_identical", "fallback_identical"))
+        self.stdout.write("Output identical to DRF's." if same else
+                          self.style.ERROR("Output differs from DRF's!"))
@@ -0,0 +1,65 @@
+# core/management/commands/benchmark.py
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    help = ("Benchmark every API endpoint on the current database and write a JSON baseline; "
+            "the database is left unchanged.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50, help="Timed requests per endpoint.")
+        parser.add_argument("--output", "-o", help="Write the baseline JSON here.")
+        parser.add_argument("--compare", metavar="BASELINE", help="Diff the results against an earlier baseline.")
+        parser.add_argument("--threshold", type=float, default=benchmarks.DEFAULT_THRESHOLD,
+                            help="With --compare: fail if an endpoint's p50 grew by more than this "
+                                 "percentage, or it issues more queries.")
+        parser.add_argument("--only", nargs="+", default=(), metavar="ENDPOINT",
+                            help="Run just these endpoints.")
+        parser.add_argument("--user", help="Username to benchmark as (default: first freelancer with bookings).")
+        parser.add_argument("--cache", action="store_true", help="Leave the response cache on.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                baseline = json.loads(Path(options["compare"]).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Can't read baseline: {exc}")
+
+        try:
+            result = benchmarks.run(
+                iterations=options["iterations"], username=options["user"],
+                only=options["only"], use_cache=options["cache"],
+            )
+        except (LookupError, AssertionError) as exc:
+            raise CommandError(str(exc))
+
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(result, indent=2, sort_keys=True) + "\n")
+
+        self.stdout.write(f"{'endpoint':24}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}")
+        for name, r in result["endpoints"].items():
+            self.stdout.write(
+                f"{name:24}{r['throughput_rps']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}"
+                f"{r['p99_ms']:>9}{r['queries']:>9}"
+            )
+
+        if baseline is None:
+            return
+        rows, regressions = benchmarks.compare(baseline, result, options["threshold"])
+        commit = baseline.get("meta", {}).get("commit") or options["compare"]
+        self.stdout.write(f"\nvs {commit}:")
+        self.stdout.write(f"{'endpoint':24}{'p50':>9}{'req/s':>9}{'queries':>9}")
+        for name, p50, rps, queries in rows:
+            if p50 is None:
+                self.stdout.write(f"{name:24}{'new':>9}")
+                continue
+            self.stdout.write(f"{name:24}{p50:>+8.1f}%{rps:>+8.1f}%{queries:>+9}")
+        if regressions:
+            raise CommandError(f"Regressed: {', '.join(regressions)}")
@@ -0,0 +1,39 @@
+# core/management/commands/build_similar_gigs.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.similar import IndexUnavailable, build_full, build_incremental
+
+
+class Command(BaseCommand):
+    help = "Build or update the similar gigs index that /api/gigs/{id}/similar/ serves from."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true",
+                            help="Rebuild from scratch (vocabulary, IDF and every neighbour list).")
+        parser.add_argument("--k", type=int, default=None,
+                            help="Neighbours kept per gig (default: SIMILAR_GIGS_K).")
+        parser.add_argument("--watch", type=float, default=None, metavar="SECONDS",
+                            help="Keep running, applying changes every SECONDS.")
+
+    def handle(self, *args, **options):
+        build = build_full if options["full"] else build_incremental
+        while True:
+            started = time.perf_counter()
+            try:
+                meta = build(options["k"])
+            except IndexUnavailable as exc:
+                raise CommandError(str(exc))
+            if meta is not None:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Generation {meta['generation']}: {meta['gigs']} gigs, {meta['terms']} terms, "
+                    f"{meta['changed']} (re)indexed in {time.perf_counter() - started:.1f}s."
+                ))
+            elif options["watch"] is None:
+                self.stdout.write("Index is up to date.")
+            if options["watch"] is None:
+                break
+            build = build_incremental
+            time.sleep(options["watch"])
@@ -0,0 +1,46 @@
+# core/management/commands/export_data.py
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from core.exports import EXPORTS, FORMATS, stream
+
+
+class Command(BaseCommand):
+    help = "Stream a transactions or bookings export (CSV or NDJSON) to a file or stdout."
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=list(EXPORTS))
+        parser.add_argument("--format", dest="fmt", choices=list(FORMATS), default="csv")
+        parser.add_argument("--since", help="ISO date or datetime (inclusive).")
+        parser.add_argument("--until", help="ISO date or datetime (exclusive).")
+        parser.add_argument("--status")
+        parser.add_argument("--gzip", action="store_true", help="Compress the output as it is written.")
+        parser.add_argument("--output", "-o", default="-", help="File to write (default: stdout).")
+
+    def handle(self, *args, **options):
+        params = {key: options[key] for key in ("since", "until", "status") if options[key]}
+        try:
+            pieces = stream(options["name"], options["fmt"], params, gzip=options["gzip"])
+        except ValidationError as exc:
+            raise CommandError(exc.detail)
+
+        if options["output"] == "-":
+            out = self.stdout._out
+            buffer = getattr(out, "buffer", None)
+            if buffer is None and options["gzip"]:
+                raise CommandError("--gzip needs --output or a binary stdout.")
+            for piece in pieces:
+                if buffer is not None:
+                    buffer.write(piece)
+                else:   # a text stream, e.g. call_command(stdout=StringIO())
+                    out.write(piece.decode())
+            out.flush()
+            return
+
+        written = 0
+        with open(options["output"], "wb") as out:
+            for piece in pieces:
+                out.write(piece)
+                written += len(piece)
+        self.stderr.write(self.style.SUCCESS(f"Wrote {written} bytes to {options['output']}"))
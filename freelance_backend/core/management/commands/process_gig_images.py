@@ -0,0 +1,38 @@
+# core/management/commands/process_gig_images.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.images import process_pending
+
+
+class Command(BaseCommand):
+    help = "Hash, deduplicate and render variants for newly uploaded gig images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50)
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Exit when the queue is empty instead of polling.",
+        )
+        parser.add_argument("--idle-sleep", type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        failed = set()
+        total = 0
+        while True:
+            done, failed_now = process_pending(options["batch_size"], skip=failed)
+            failed.update(failed_now)
+            total += done
+            for gig_id in failed_now:
+                self.stderr.write(f"Could not process image of gig {gig_id}")
+            if done or failed_now:
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["idle_sleep"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {total} gig image(s), {len(failed)} failed."
+        ))
@@ -0,0 +1,40 @@
+# core/management/commands/process_webhooks.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.webhooks import process_batch
+
+
+class Command(BaseCommand):
+    help = "Drain queued Razorpay webhook events in batches (runs forever unless --once)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Exit when no due events are left instead of polling.",
+        )
+        parser.add_argument(
+            "--idle-sleep", type=float, default=1.0,
+            help="Seconds to wait between polls when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        totals = [0, 0, 0]
+        while True:
+            counts = process_batch(options["batch_size"])
+            totals = [t + c for t, c in zip(totals, counts)]
+            if any(counts):
+                self.stdout.write(
+                    "processed %d, retrying %d, failed %d" % counts
+                )
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["idle_sleep"])
+
+        self.stdout.write(self.style.SUCCESS(
+            "Done: processed %d, retrying %d, failed %d" % tuple(totals)
+        ))
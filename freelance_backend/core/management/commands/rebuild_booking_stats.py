@@ -0,0 +1,30 @@
+# core/management/commands/rebuild_booking_stats.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.analytics import rebuild_booking_stats
+
+
+class Command(BaseCommand):
+    help = "Backfill (or, with --verify, just check) the daily booking rollup behind profile analytics."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify", action="store_true",
+            help="Report drifted rows without writing; exit non-zero if any are found.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        changes = rebuild_booking_stats(
+            batch_size=options["batch_size"], dry_run=options["verify"]
+        )
+        summary = ", ".join(f"{n} {label}" for label, n in changes.items())
+
+        if options["verify"]:
+            if any(changes.values()):
+                raise CommandError(f"Booking rollup is out of date: {summary}")
+            self.stdout.write(self.style.SUCCESS("Booking rollup is consistent."))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt booking rollup: {summary}"))
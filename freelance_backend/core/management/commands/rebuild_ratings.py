@@ -0,0 +1,30 @@
+# core/management/commands/rebuild_ratings.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ratings import rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = "Rebuild (or, with --verify, just check) the stored Gig/Profile rating aggregates."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify", action="store_true",
+            help="Report drifted rows without writing; exit non-zero if any are found.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = rebuild_ratings(
+            batch_size=options["batch_size"], dry_run=options["verify"]
+        )
+        summary = ", ".join(f"{n} {label}" for label, n in fixed.items())
+
+        if options["verify"]:
+            if any(fixed.values()):
+                raise CommandError(f"Stale rating aggregates: {summary}")
+            self.stdout.write(self.style.SUCCESS("Rating aggregates are consistent."))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rating aggregates: {summary}"))
@@ -0,0 +1,32 @@
+# core/management/commands/rebuild_trending.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.trending import rebuild_trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the Gig trending scores from recent bookings and payments "
+        "(or, with --verify, just check them). Run periodically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify", action="store_true",
+            help="Report drifted gigs without writing; exit non-zero if any are found.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = rebuild_trending(
+            batch_size=options["batch_size"], dry_run=options["verify"]
+        )
+
+        if options["verify"]:
+            if fixed:
+                raise CommandError(f"Stale trending scores: {fixed} gigs")
+            self.stdout.write(self.style.SUCCESS("Trending scores are consistent."))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt trending scores: {fixed} gigs"))
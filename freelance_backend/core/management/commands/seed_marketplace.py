@@ -0,0 +1,41 @@
+# core/management/commands/seed_marketplace.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.synthetic import SEED_PASSWORD, MarketplaceGenerator
+
+
+class Command(BaseCommand):
+    help = "Bulk-generate a synthetic marketplace (users, gigs, bookings, payments, reviews, disputes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--freelancer-share", type=float, default=0.3,
+                            help="Fraction of users who list gigs.")
+        parser.add_argument("--gigs-per-freelancer", type=int, default=3)
+        parser.add_argument("--bookings", type=int, default=5000)
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--prefix", default="seed", help="Usernames are <prefix>-000000, ...")
+        parser.add_argument("--skip-similar-index", action="store_true",
+                            help="Don't build the similar-gigs index (see build_similar_gigs).")
+
+    def handle(self, *args, **options):
+        generator = MarketplaceGenerator(
+            users=options["users"],
+            freelancer_share=options["freelancer_share"],
+            gigs_per_freelancer=options["gigs_per_freelancer"],
+            bookings=options["bookings"],
+            chunk_size=options["chunk_size"],
+            seed=options["seed"],
+            prefix=options["prefix"],
+            similar_index=not options["skip_similar_index"],
+        )
+        try:
+            counts = generator.run()
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        summary = ", ".join(f"{n} {name}s" for name, n in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Generated {summary}."))
+        self.stdout.write(f"Every user's password is {SEED_PASSWORD!r}.")
@@ -0,0 +1,326 @@
+# core/metrics.py
+#
+# Per-request performance instrumentation.
+#
+# RequestMetricsMiddleware times each request and, through a context
+# variable, lets the code below it add to named phases: SQL (an
+# execute_wrapper on every connection), serialization (TimedRepresentation
+# on the API serializers) and Razorpay calls (payments.py). The phases go
+# out as a Server-Timing header and into per-route histograms, exposed in
+# Prometheus text format on /metrics.
+#
+# The histograms are per process, like the cache hit/miss counters in
+# caching.py: scrape every worker, or run one worker per metrics target.
+# The cost per request is a few perf_counter() calls per query and one
+# short lock to update the histograms, so it stays on in production.
+#
+# A streamed body (the exports, large list pages) runs its SQL and encoding
+# after the view returns: the middleware wraps it and records the request
+# once the stream is exhausted. Server-Timing goes out before the body, so
+# for these it covers only the time to the first byte and says so.
+#
+# With METRICS_SLOW_REQUEST_MS set, requests slower than that are logged
+# along with any SQL statement they ran more than once (the usual N+1).
+
+import hmac
+import logging
+import threading
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+
+from .caching import cache_stats
+
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+# phase -> Server-Timing description ("db" reports the query count instead)
+PHASES = {"db": "SQL", "serialize": "Serializers", "razorpay": "Razorpay API"}
+SLOW_LOG_STATEMENTS = 5
+# anything else is reported as "other", so junk methods can't add label values
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+_current = ContextVar("request_metrics", default=None)
+_END = object()
+
+
+class RequestMetrics:
+    def __init__(self, collect_sql):
+        self.started = perf_counter()
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.queries = 0
+        # statement -> times run; only kept for the slow-request log
+        self.statements = Counter() if collect_sql else None
+        self.serializing = False
+
+    def add(self, phase, seconds):
+        self.seconds[phase] += seconds
+
+    def record_query(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds["db"] += perf_counter() - started
+            self.queries += 1
+            if self.statements is not None:
+                self.statements[sql] += 1
+
+    def duplicates(self):
+        if not self.statements:
+            return []
+        repeated = [(sql, n) for sql, n in self.statements.most_common(SLOW_LOG_STATEMENTS) if n > 1]
+        return [f"{n}x {sql[:300]}" for sql, n in repeated]
+
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to `phase` of the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(phase, perf_counter() - started)
+
+
+class TimedRepresentation:
+    """Serializer mixin: time to_representation() as the "serialize" phase.
+    Nested serializers run inside their parent's timing and aren't counted
+    twice. Includes any lazy SQL the serializer triggers."""
+
+    def to_representation(self, instance):
+        metrics = _current.get()
+        if metrics is None or metrics.serializing:
+            return super().to_representation(instance)
+        metrics.serializing = True
+        started = perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializing = False
+            metrics.add("serialize", perf_counter() - started)
+
+
+# ── per-route histograms (per process)
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def copy(self):
+        other = Histogram(self.buckets)
+        other.counts, other.sum, other.count = list(self.counts), self.sum, self.count
+        return other
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {round(self.sum, 6)}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+# metric name -> (help, buckets); one Histogram per (metric, route, method)
+HISTOGRAMS = {
+    "http_request_duration_seconds": ("Total time in the view and middleware below.", DURATION_BUCKETS),
+    "http_request_db_seconds": ("Time in SQL queries.", DURATION_BUCKETS),
+    "http_request_db_queries": ("SQL queries per request.", QUERY_BUCKETS),
+    "http_request_serialize_seconds": ("Time in DRF serializers.", DURATION_BUCKETS),
+    "http_request_razorpay_seconds": ("Time in Razorpay API calls, for requests that made one.",
+                                      DURATION_BUCKETS),
+}
+
+_histograms = {}
+_requests = Counter()
+_lock = threading.Lock()
+
+
+def _observe(route, method, status, total, metrics):
+    values = {
+        "http_request_duration_seconds": total,
+        "http_request_db_seconds": metrics.seconds["db"],
+        "http_request_db_queries": metrics.queries,
+        "http_request_serialize_seconds": metrics.seconds["serialize"],
+    }
+    if metrics.seconds["razorpay"]:
+        values["http_request_razorpay_seconds"] = metrics.seconds["razorpay"]
+    with _lock:
+        _requests[(route, method, status)] += 1
+        for name, value in values.items():
+            key = (name, route, method)
+            if key not in _histograms:
+                _histograms[key] = Histogram(HISTOGRAMS[name][1])
+            _histograms[key].observe(value)
+
+
+def reset_metrics():
+    with _lock:
+        _histograms.clear()
+        _requests.clear()
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def render():
+    """Everything collected by this process, in Prometheus text format."""
+    with _lock:
+        requests = sorted(_requests.items())
+        histograms = {key: histogram.copy() for key, histogram in _histograms.items()}
+
+    lines = ["# HELP http_requests_total Requests by route, method and status.",
+             "# TYPE http_requests_total counter"]
+    for (route, method, status), n in requests:
+        lines.append(f'http_requests_total{{route="{_label(route)}",method="{method}",status="{status}"}} {n}')
+    for name, (help_text, _) in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for (metric, route, method), histogram in sorted(histograms.items()):
+            if metric == name:
+                lines.extend(histogram.lines(name, f'route="{_label(route)}",method="{method}"'))
+
+    lines += ["# HELP api_cache_requests_total Response cache lookups by resource and outcome.",
+              "# TYPE api_cache_requests_total counter"]
+    for resource, outcomes in sorted(cache_stats().items()):
+        for outcome, n in sorted(outcomes.items()):
+            lines.append(f'api_cache_requests_total{{resource="{resource}",outcome="{outcome}"}} {n}')
+    return "\n".join(lines) + "\n"
+
+
+def prometheus_metrics(request):
+    # closed unless a scrape token is configured (or in DEBUG): route names,
+    # traffic and error rates aren't for anonymous eyes
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse(status=404)
+    elif not hmac.compare_digest(
+        request.headers.get("Authorization", "").encode(), f"Bearer {token}".encode()
+    ):
+        return HttpResponse(status=401)
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# ── middleware
+
+class RequestMetricsMiddleware:
+    """Server-Timing header, /metrics histograms and the slow-request log.
+    Works for sync and async views alike."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics, token, stack = self._start()
+        try:
+            with stack:
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics, token, stack = self._start()
+        try:
+            with stack:
+                response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics)
+
+    def _start(self):
+        metrics = RequestMetrics(collect_sql=bool(settings.METRICS_SLOW_REQUEST_MS))
+        token = _current.set(metrics)
+        return metrics, token, self._wrappers(metrics)
+
+    def _wrappers(self, metrics):
+        # connections are per thread: enter them where the queries will run
+        stack = ExitStack()
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(metrics.record_query))
+        return stack
+
+    def _finish(self, request, response, metrics):
+        total = perf_counter() - metrics.started
+        timings = [f'db;dur={metrics.seconds["db"] * 1000:.1f};desc="{metrics.queries} queries"']
+        timings += [f'{phase};dur={metrics.seconds[phase] * 1000:.1f};desc="{desc}"'
+                    for phase, desc in PHASES.items() if phase != "db" and metrics.seconds[phase]]
+        timings.append(f"total;dur={total * 1000:.1f}")
+        if response.streaming:
+            timings.append('body;desc="Streamed: not included"')
+            response.streaming_content = self._stream(
+                request, response, response.streaming_content, metrics
+            )
+        else:
+            self._record(request, response, metrics)
+        response["Server-Timing"] = ", ".join(timings)
+        return response
+
+    def _stream(self, request, response, content, metrics):
+        """The streamed body, with its SQL counted into `metrics`; the request
+        is recorded when the stream is exhausted or closed."""
+        chunks = iter(content)
+        try:
+            while True:
+                token = _current.set(metrics)
+                try:
+                    with self._wrappers(metrics):
+                        chunk = next(chunks, _END)
+                finally:
+                    _current.reset(token)
+                if chunk is _END:
+                    return
+                yield chunk
+        finally:
+            self._record(request, response, metrics)
+
+    def _record(self, request, response, metrics):
+        total = perf_counter() - metrics.started
+        match = request.resolver_match
+        route = match.view_name if match else "unmatched"
+        method = request.method if request.method in METHODS else "other"
+
+        _observe(route, method, response.status_code, total, metrics)
+
+        slow_ms = settings.METRICS_SLOW_REQUEST_MS
+        if slow_ms and total * 1000 >= slow_ms:
+            logger.warning(
+                "Slow request: %s %s (%s) -> %s in %.0f ms; %d queries in %.0f ms, "
+                "serializers %.0f ms, razorpay %.0f ms%s",
+                request.method, request.path, route, response.status_code, total * 1000,
+                metrics.queries, metrics.seconds["db"] * 1000, metrics.seconds["serialize"] * 1000,
+                metrics.seconds["razorpay"] * 1000,
+                "".join(f"\n  duplicate: {line}" for line in metrics.duplicates()),
+            )
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:03
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+
+
+# Same expression as core.filters.gig_search_vector(); Postgres only.
+SEARCH_INDEX = GinIndex(
+    SearchVector('title', 'description', config='english'),
+    name='gig_search_vector_idx',
+)
+
+
+def add_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.add_index(apps.get_model('core', 'Gig'), SEARCH_INDEX)
+
+
+def remove_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('core', 'Gig'), SEARCH_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_profile_contact_email_profile_contact_phone'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gig',
+            index=models.Index(fields=['price'], name='gig_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gig',
+            index=models.Index(fields=['created_at'], name='gig_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gig',
+            index=models.Index(fields=['delivery_time'], name='gig_delivery_time_idx'),
+        ),
+        migrations.RunPython(add_search_index, remove_search_index),
+    ]
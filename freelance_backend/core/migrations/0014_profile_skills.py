@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_skills(apps, schema_editor):
+    # same normalization as core.skills.normalize_skill(), frozen here
+    Profile = apps.get_model('core', 'Profile')
+    ProfileSkill = apps.get_model('core', 'ProfileSkill')
+    rows = []
+    for profile_id, skills in Profile.objects.values_list('id', 'skills').iterator(chunk_size=1000):
+        if not isinstance(skills, list):
+            continue
+        names = {' '.join(s.split()).casefold()[:100] for s in skills if isinstance(s, str) and s.strip()}
+        rows.extend(ProfileSkill(profile_id=profile_id, name=name) for name in names)
+        if len(rows) >= 1000:
+            ProfileSkill.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    ProfileSkill.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_booking_daily_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_rows', to='core.profile')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('name', 'profile'), name='profile_skill_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_profile_skills'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'PENDING')), fields=['client', 'booked_at', 'id'], name='booking_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dispute',
+            index=models.Index(condition=models.Q(('resolution_status', 'OPEN')), fields=['opened_at', 'id'], name='dispute_open_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('razorpay_payment_id', ''), _negated=True), fields=('razorpay_payment_id',), name='txn_payment_id_unique'),
+        ),
+    ]
@@ -5,6 +5,7 @@ from django.db import models
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 class Profile(models.Model):
@@ -17,6 +18,15 @@ class Profile(models.Model):
     contact_email = models.EmailField(blank=True)
     contact_phone = models.CharField(max_length=20, blank=True)
 
+    # ── rating aggregates over reviews of this freelancer's gigs,
+    #    maintained by core/ratings.py
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(default=0)
+    last_reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
         return self.user.username
 
@@ -26,6 +36,49 @@ def create_profile_for_new_user(sender, instance, created, **kwargs):
         Profile.objects.create(user=instance)
 
 
+@receiver(post_save, sender=User)
+def touch_profile_on_user_change(sender, instance, created, update_fields=None, **kwargs):
+    # ProfileSerializer shows user.username, so the profile's updated_at
+    # (used for ETag / Last-Modified) must move with the user row
+    if created or (update_fields and set(update_fields) <= {"last_login"}):
+        return
+    Profile.objects.filter(user=instance).update(updated_at=timezone.now())
+
+
+class ProfileSkill(models.Model):
+    """One normalized entry of Profile.skills, so skill filters and facet
+    counts are index lookups instead of JSON scans. Kept in sync with the
+    JSON list by core/skills.py; the API still reads and writes the list."""
+    profile = models.ForeignKey(
+        Profile, on_delete=models.CASCADE, related_name='skill_rows'
+    )
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            # (name, profile): skill filters and facet GROUP BYs are index-only
+            models.UniqueConstraint(fields=["name", "profile"], name="profile_skill_unique"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ImageAsset(models.Model):
+    """One distinct uploaded image (by content hash) and its processed
+    variants; identical uploads share an asset. See core/images.py."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    original = models.CharField(max_length=255)     # storage name of the upload
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    # [{"name": storage name, "width": .., "height": .., "format": "webp", "bytes": ..}]
+    variants = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.sha256[:12]
+
+
 class Gig(models.Model):
     freelancer = models.ForeignKey(
         Profile, on_delete=models.CASCADE, related_name='gigs'
@@ -35,6 +88,7 @@ class Gig(models.Model):
     price = models.DecimalField(max_digits=8, decimal_places=2)
     delivery_time = models.IntegerField(help_text='Days to deliver')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     image = models.ImageField(
         upload_to="gig_images/",
@@ -42,7 +96,37 @@ class Gig(models.Model):
         blank=True,
         help_text="Upload a representative image for this gig"
     )
+    # set by the process_gig_images worker; null while the image is queued
+    image_asset = models.ForeignKey(
+        ImageAsset, null=True, blank=True, editable=False,
+        on_delete=models.SET_NULL, related_name='gigs'
+    )
+
+    # ── rating aggregates over Review -> Booking -> Gig, maintained by core/ratings.py
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(default=0)
+    last_reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    # time-decayed booking/payment activity, kept in log form by core/trending.py
+    trending_score = models.FloatField(default=0, editable=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["price"], name="gig_price_idx"),
+            models.Index(fields=["created_at", "id"], name="gig_created_at_idx"),
+            models.Index(fields=["delivery_time"], name="gig_delivery_time_idx"),
+            models.Index(fields=["rating_avg", "id"], name="gig_rating_avg_idx"),
+            models.Index(fields=["trending_score", "id"], name="gig_trending_idx"),
+            # the image worker's queue
+            models.Index(
+                fields=["id"],
+                condition=models.Q(image_asset__isnull=True) & ~models.Q(image=""),
+                name="gig_image_pending_idx",
+            ),
+        ]
+        # The full-text GIN index is Postgres-only and lives in
+        # migrations/0006_gig_search_indexes.py (see core/filters.py).
 
     def __str__(self):
         return self.title
@@ -56,6 +140,7 @@ class Booking(models.Model):
         Profile, on_delete=models.CASCADE, related_name='bookings'
     )
     booked_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     status = models.CharField(
         max_length=20,
         choices=[
@@ -67,21 +152,86 @@ class Booking(models.Model):
         default='PENDING'
     )
 
+    class Meta:
+        indexes = [
+            # BookingViewSet lists a client's bookings newest first
+            models.Index(fields=["client", "booked_at", "id"], name="booking_client_booked_idx"),
+            # the admin changelist: newest first, optionally by status
+            models.Index(fields=["booked_at", "id"], name="booking_booked_at_idx"),
+            models.Index(fields=["status", "booked_at", "id"], name="booking_status_booked_idx"),
+            # ?status=PENDING (awaiting payment) is the hot filter; other
+            # statuses are the bulk of a client's history and use the index above
+            models.Index(
+                fields=["client", "booked_at", "id"],
+                condition=models.Q(status="PENDING"),
+                name="booking_pending_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.client.user.username} → {self.gig.title}"
 
 
 class Transaction(models.Model):
+    # every status the code writes: CREATED with the order (core/payments.py),
+    # PAID on capture, otherwise the Razorpay payment status upper-cased
+    # (core/webhooks.py)
+    STATUSES = ('CREATED', 'PAID', 'AUTHORIZED', 'FAILED', 'REFUNDED')
+
     booking = models.OneToOneField(
         Booking, on_delete=models.CASCADE, related_name='transaction'
     )
     razorpay_payment_id = models.CharField(max_length=100)
+    # set once the gateway order exists; one order per booking (core/payments.py)
+    razorpay_order_id = models.CharField(max_length=100, blank=True)
+    order_requested_at = models.DateTimeField(null=True, blank=True)
     amount = models.DecimalField(max_digits=8, decimal_places=2)
     status = models.CharField(max_length=20)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="txn_created_at_idx"),
+            # the admin changelist's status filter
+            models.Index(fields=["status", "created_at", "id"], name="txn_status_created_idx"),
+        ]
+        constraints = [
+            # one transaction per gateway payment; unset ids are ''
+            models.UniqueConstraint(
+                fields=["razorpay_payment_id"],
+                condition=~models.Q(razorpay_payment_id=""),
+                name="txn_payment_id_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Txn {self.booking_id}: {self.status}"
+
+
+class BookingDailyStat(models.Model):
+    """Bookings made on one day for one gig, by their current status, and
+    the captured revenue of those bookings. Maintained by core/analytics.py."""
+    freelancer = models.ForeignKey(
+        Profile, on_delete=models.CASCADE, related_name='booking_stats'
+    )
+    gig = models.ForeignKey(
+        Gig, on_delete=models.CASCADE, related_name='daily_stats'
+    )
+    day = models.DateField()
+    status = models.CharField(max_length=20)
+    bookings = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            # leading (freelancer, day) also serves the dashboard's range scan
+            models.UniqueConstraint(
+                fields=["freelancer", "day", "gig", "status"], name="booking_stat_unique"
+            ),
+        ]
+
     def __str__(self):
-        return f"Txn {self.booking.id}: {self.status}"
+        return f"{self.gig_id} {self.day} {self.status}: {self.bookings}"
 
 
 class Review(models.Model):
@@ -100,8 +250,13 @@ class Review(models.Model):
     comment = models.TextField(blank=True)
     reviewed_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["reviewed_at", "id"], name="review_reviewed_at_idx"),
+        ]
+
     def __str__(self):
-        return f"{self.rating}★ by {self.user.username} on booking {self.booking.id}"
+        return f"{self.rating}★ by {self.user.username} on booking {self.booking_id}"
 
 
 class Dispute(models.Model):
@@ -120,6 +275,54 @@ class Dispute(models.Model):
     )
     opened_at = models.DateTimeField(auto_now_add=True)
     resolved_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["opened_at", "id"], name="dispute_opened_at_idx"),
+            # the triage queue; resolved/rejected rows use the index above
+            models.Index(
+                fields=["opened_at", "id"],
+                condition=models.Q(resolution_status="OPEN"),
+                name="dispute_open_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Dispute #{self.id} for Booking {self.booking_id}"
+
+
+class WebhookEvent(models.Model):
+    """Raw gateway webhook, queued by razorpay_webhook and applied by
+    the process_webhooks worker (core/webhooks.py)."""
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        PROCESSED = 'PROCESSED', 'Processed'
+        FAILED = 'FAILED', 'Failed'
+
+    # X-Razorpay-Event-Id when sent, else "<event>:<payment id>"; retries
+    # of the same delivery collapse onto one row
+    event_id = models.CharField(max_length=100, unique=True)
+    event = models.CharField(max_length=50)
+    payment_id = models.CharField(max_length=100, blank=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # the worker's queue scan
+            models.Index(
+                fields=["next_attempt_at", "id"],
+                condition=models.Q(status="PENDING"),
+                name="webhook_pending_idx",
+            ),
+        ]
 
     def __str__(self):
-        return f"Dispute #{self.id} for Booking {self.booking.id}"
+        return f"{self.event} {self.event_id} ({self.status})"
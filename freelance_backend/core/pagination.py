@@ -0,0 +1,139 @@
+# core/pagination.py
+
+from base64 import b64decode
+from functools import reduce
+from operator import or_
+from urllib import parse
+
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination for every router list endpoint.
+
+    Ordering contract: newest first, on the view's `cursor_ordering`
+    (e.g. ('-created_at', '-id')), backed by a composite (column, id) index.
+    The cursor position holds every ordering column, so pages resume with
+    `column < p OR (column = p AND id < i)` even across long runs of equal
+    leading values (unrated or untrending gigs): page N costs the same as
+    page 1, never falls back to OFFSET, and no COUNT(*) is ever issued. Clients follow the opaque
+    `next` / `previous` links and may ask for `?page_size=` up to 100.
+
+    apaginate_queryset() is the same thing for the async views, fetching the
+    page with the async ORM.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-id',)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering:
+            return tuple(ordering)
+        return super().get_ordering(request, queryset, view)
+
+    # CursorPagination.paginate_queryset(), split around the one query so
+    # the sync and async paths share everything else.
+
+    def _page_queryset(self, queryset, request, view):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(self._after(current_position, self.cursor.reverse))
+
+        # one extra row tells us whether a following page exists
+        return queryset[offset:offset + self.page_size + 1]
+
+    def _after(self, position, reverse):
+        """Rows strictly past `position` in (reverse-adjusted) ordering:
+        a < p0 OR (a = p0 AND b < p1) ... A position from before the cursor
+        held every column is just the leading value, and filters on that."""
+        clauses, equal = [], {}
+        for order, value in zip(self.ordering, position):
+            attr = order.lstrip('-')
+            # (cursor reversed) XOR (column descending)
+            lookup = '__lt' if reverse != order.startswith('-') else '__gt'
+            clauses.append(Q(**equal, **{attr + lookup: value}))
+            equal[attr] = value
+        # the redundant bound on the leading column lets the index scan start there
+        lead = self.ordering[0].lstrip('-')
+        bound = '__lte' if reverse != self.ordering[0].startswith('-') else '__gte'
+        return Q(**{lead + bound: position[0]}) & reduce(or_, clauses)
+
+    def _get_position_from_instance(self, instance, ordering):
+        # every ordering column; encode_cursor() urlencodes it as one p= each
+        names = [order.lstrip('-') for order in ordering]
+        if isinstance(instance, dict):
+            return tuple(str(instance[name]) for name in names)
+        return tuple(str(getattr(instance, name)) for name in names)
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+        encoded = request.query_params[self.cursor_query_param]
+        tokens = parse.parse_qs(b64decode(encoded.encode('ascii')).decode('ascii'), keep_blank_values=True)
+        return cursor._replace(position=tuple(tokens['p'][:len(self.ordering)]))
+
+    def _set_page(self, results):
+        offset, reverse, current_position = self.cursor or (0, False, None)
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self._page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self._set_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        page_queryset = self._page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self._set_page([obj async for obj in page_queryset.aiterator()])
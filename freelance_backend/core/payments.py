@@ -0,0 +1,258 @@
+# core/payments.py
+#
+# Payment gateway access for order creation.
+#
+# One long-lived, connection-pooled gateway client per process (get_gateway),
+# strict connect/read timeouts, and booking-level idempotency: a Transaction
+# row per booking carries the Razorpay order id, and a short lease on that
+# row stops two concurrent requests from both calling the gateway. The row
+# lock is only held while taking the lease, never across the network call.
+#
+# A timed-out call may still have created the order, so a timeout keeps the
+# lease until it expires, and the next attempt first looks the order up by
+# its receipt (booking_<id>) and adopts it rather than creating a second.
+
+import itertools
+import threading
+import time
+from datetime import timedelta
+
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+from .models import Transaction
+
+
+class GatewayError(Exception):
+    """The gateway refused the request or could not be reached."""
+
+
+class GatewayTimeout(GatewayError):
+    """The gateway did not answer within the configured timeouts."""
+
+
+class OrderInProgress(Exception):
+    """Another request is creating the order for this booking right now."""
+
+
+class RazorpayGateway:
+    def __init__(self):
+        import razorpay  # only needed when the real gateway is configured
+
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.RAZORPAY_POOL_SIZE,
+            max_retries=0,
+        )
+        session.mount("https://", adapter)
+        self.timeout = (settings.RAZORPAY_CONNECT_TIMEOUT, settings.RAZORPAY_READ_TIMEOUT)
+        self.client = razorpay.Client(
+            session=session,
+            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+        )
+        self._errors = (requests.RequestException, razorpay.errors.BadRequestError,
+                        razorpay.errors.GatewayError, razorpay.errors.ServerError)
+
+    def find_order(self, receipt):
+        try:
+            orders = self.client.order.all({"receipt": receipt}, timeout=self.timeout)
+        except requests.Timeout as exc:
+            raise GatewayTimeout(str(exc)) from exc
+        except self._errors as exc:
+            raise GatewayError(str(exc)) from exc
+        return next(iter(orders.get("items", [])), None)
+
+    def create_order(self, amount_paise, currency, receipt, notes):
+        try:
+            return self.client.order.create(
+                {
+                    "amount": amount_paise,
+                    "currency": currency,
+                    "receipt": receipt,
+                    "notes": notes,
+                },
+                timeout=self.timeout,
+            )
+        except requests.Timeout as exc:
+            raise GatewayTimeout(str(exc)) from exc
+        except self._errors as exc:
+            raise GatewayError(str(exc)) from exc
+
+
+class FakeGateway:
+    """
+    In-process stand-in for tests and benchmarks. RAZORPAY_FAKE_LATENCY
+    (seconds) simulates a slow gateway.
+    """
+    def __init__(self):
+        self.latency = settings.RAZORPAY_FAKE_LATENCY
+        self.orders = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def find_order(self, receipt):
+        with self._lock:
+            return next((order for order in self.orders if order["receipt"] == receipt), None)
+
+    def create_order(self, amount_paise, currency, receipt, notes):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            order = {
+                "id": f"order_fake{next(self._ids):010d}",
+                "amount": amount_paise,
+                "currency": currency,
+                "receipt": receipt,
+                "notes": notes,
+                "status": "created",
+            }
+            self.orders.append(order)
+        return order
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """The process-wide gateway named by settings.RAZORPAY_GATEWAY."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = import_string(settings.RAZORPAY_GATEWAY)()
+    return _gateway
+
+
+@receiver(setting_changed)
+def reset_gateway(setting, **kwargs):
+    global _gateway
+    if setting.startswith("RAZORPAY_"):
+        _gateway = None
+
+
+# ── idempotent order creation
+
+def order_lease():
+    # long enough to outlive one gateway call, short enough that a crashed
+    # worker doesn't block the booking for long
+    return timedelta(seconds=settings.RAZORPAY_CONNECT_TIMEOUT + settings.RAZORPAY_READ_TIMEOUT + 5)
+
+
+def reserve_order(booking):
+    """
+    Returns (txn, needs_order, may_exist). needs_order is False when the
+    booking already has an order; may_exist is True when an earlier attempt
+    let its lease expire, so the gateway may have the order already. Raises
+    OrderInProgress when another request holds the lease.
+    """
+    with transaction.atomic():
+        txn, _ = Transaction.objects.select_for_update().get_or_create(
+            booking=booking,
+            defaults={"amount": booking.gig.price, "status": "CREATED"},
+        )
+        if txn.razorpay_order_id:
+            return txn, False, False
+
+        now = timezone.now()
+        if txn.order_requested_at and now - txn.order_requested_at < order_lease():
+            raise OrderInProgress()
+        may_exist = txn.order_requested_at is not None
+        txn.order_requested_at = now
+        txn.save(update_fields=["order_requested_at"])
+        return txn, True, may_exist
+
+
+def order_request(txn):
+    """Arguments for gateway.create_order()."""
+    return {
+        "amount_paise": int(txn.amount * 100),
+        "currency": "INR",
+        "receipt": f"booking_{txn.booking_id}",
+        # razorpay_webhook resolves the payment back to this transaction
+        "notes": {"transaction_id": str(txn.id)},
+    }
+
+
+def place_order(gateway, txn, may_exist):
+    """The booking's gateway order: the one an earlier attempt left behind
+    when there may be one, otherwise a new one."""
+    if may_exist:
+        order = gateway.find_order(order_request(txn)["receipt"])
+        if order is not None:
+            return order
+    return gateway.create_order(**order_request(txn))
+
+
+def complete_order(txn, order):
+    txn.razorpay_order_id = order["id"]
+    txn.order_requested_at = None
+    txn.save(update_fields=["razorpay_order_id", "order_requested_at"])
+
+
+def _order_may_exist(exc, may_exist):
+    # a timed-out call may have created the order; so may an earlier attempt.
+    # Either way the lease is kept until it expires, so that the next attempt
+    # looks the order up before creating one
+    return may_exist or isinstance(exc, GatewayTimeout)
+
+
+def release_order(txn):
+    Transaction.objects.filter(pk=txn.pk).update(order_requested_at=None)
+
+
+def create_order(booking):
+    """Create (or return the existing) gateway order for a booking."""
+    txn, needs_order, may_exist = reserve_order(booking)
+    if needs_order:
+        try:
+            with metrics.timed("razorpay"):
+                order = place_order(get_gateway(), txn, may_exist)
+        except GatewayError as exc:
+            if not _order_may_exist(exc, may_exist):
+                release_order(txn)
+            raise
+        complete_order(txn, order)
+    return txn
+
+
+async def acreate_order(booking):
+    """
+    Async create_order() for the ASGI path. The short DB steps run on the
+    thread-sensitive executor like any ORM call; the gateway call runs on a
+    plain worker thread so a stalled gateway never blocks the event loop or
+    other requests' database work.
+    """
+    txn, needs_order, may_exist = await sync_to_async(reserve_order)(booking)
+    if needs_order:
+        try:
+            with metrics.timed("razorpay"):
+                order = await sync_to_async(place_order, thread_sensitive=False)(
+                    get_gateway(), txn, may_exist
+                )
+        except GatewayError as exc:
+            if not _order_may_exist(exc, may_exist):
+                await sync_to_async(release_order)(txn)
+            raise
+        await sync_to_async(complete_order)(txn, order)
+    return txn
+
+
+def order_payload(txn):
+    """Response body for the create-order endpoints."""
+    return {
+        "order_id": txn.razorpay_order_id,
+        "amount": int(txn.amount * 100),
+        "currency": "INR",
+        "key": settings.RAZORPAY_KEY_ID,
+        "transaction_id": txn.id,
+    }
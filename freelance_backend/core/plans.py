@@ -0,0 +1,67 @@
+# core/plans.py
+#
+# Query plan regression checks for the test suite. Run a hot code path
+# against a seeded database inside assertNoSeqScans(), and every SELECT /
+# UPDATE / DELETE it issued is EXPLAINed; the test fails if any plan reads
+# one of the large tables sequentially instead of through an index.
+#
+# Understands Postgres ("Seq Scan on <table>") and SQLite
+# ("SCAN <table>" without "USING INDEX"); other backends are not checked.
+
+import re
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+SEQ_SCAN = {
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+    "sqlite": re.compile(r"\bSCAN (\w+)\b(?! USING (?:COVERING )?INDEX)"),
+}
+CHECKED_STATEMENTS = ("SELECT", "UPDATE", "DELETE")
+
+
+def explain(sql):
+    """The plan of one captured statement, as text."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            return "\n".join(row[-1] for row in cursor.fetchall())
+        cursor.execute("EXPLAIN " + sql)
+        return "\n".join(row[0] for row in cursor.fetchall())
+
+
+def seq_scanned_tables(plan):
+    pattern = SEQ_SCAN.get(connection.vendor)
+    return set(pattern.findall(plan)) if pattern else set()
+
+
+def analyze():
+    """Refresh planner statistics after seeding."""
+    if connection.vendor in SEQ_SCAN:
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+
+class QueryPlanMixin:
+    """TestCase mixin. `large_tables` lists the db_tables that must never
+    be scanned sequentially."""
+    large_tables = ()
+
+    @contextmanager
+    def assertNoSeqScans(self, tables=None):
+        tables = set(tables or self.large_tables)
+        with CaptureQueriesContext(connection) as captured:
+            yield
+        failures = []
+        for query in captured.captured_queries:
+            sql = query["sql"]
+            if not sql.lstrip().upper().startswith(CHECKED_STATEMENTS):
+                continue
+            plan = explain(sql)
+            scanned = seq_scanned_tables(plan) & tables
+            if scanned:
+                failures.append(f"{', '.join(sorted(scanned))}:\n  {sql}\n  {plan}")
+        if failures:
+            self.fail("Sequential scan on a large table:\n" + "\n".join(failures))
@@ -0,0 +1,195 @@
+# core/projections.py
+#
+# Read-only fast path for the gig and booking lists.
+#
+# A ModelSerializer builds a model instance per row (plus one per
+# select_related join) and then walks its bound fields for every one of
+# them. A Projection instead reads the same columns with values() and turns
+# each row dict into the serializer's exact JSON shape with a builder
+# compiled once per serializer: the plain fields keep their DRF
+# to_representation() (so decimals, datetimes etc. format identically),
+# nested serializers become nested builders over joined columns, and the
+# few computed fields are listed in CUSTOM_FIELDS below. The conformance
+# test in tests.py holds the output byte-identical to the serializers'.
+#
+# Sparse fieldsets (core/fieldsets.py) compile a builder per requested
+# shape, so ?fields=id,status selects two columns rather than filtering a
+# full row.
+
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from . import metrics
+from .fieldsets import parse_shape
+from .images import variant_urls
+from .models import Gig
+from .serializers import BookingSerializer, GigSerializer
+
+
+def _image_url(column):
+    storage = Gig._meta.get_field("image").storage
+
+    def build(row, request):
+        # DRF ImageField.to_representation on the stored name
+        name = row[column]
+        if not name:
+            return None
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return build
+
+
+def _image_variants(column):
+    def build(row, request):
+        return variant_urls(row[column], request)
+    return build
+
+
+def _freelancer_contact(email, phone):
+    def build(row, request):
+        return {"email": row[email] or "", "phone": row[phone] or ""}
+    return build
+
+
+# serializer -> {field name: (columns it reads, builder factory)}; columns
+# are relative to where the serializer is nested
+CUSTOM_FIELDS = {
+    GigSerializer: {
+        "image": (["image"], _image_url),
+        "image_variants": (["image_asset__variants"], _image_variants),
+    },
+    BookingSerializer: {
+        "freelancer_contact": (
+            ["gig__freelancer__contact_email", "gig__freelancer__contact_phone"], _freelancer_contact
+        ),
+    },
+}
+
+
+def _plain(column, to_representation):
+    def build(row, request):
+        value = row[column]
+        return None if value is None else to_representation(value)
+    return build
+
+
+def _record(steps, pk_column=None):
+    def build(row, request):
+        if pk_column is not None and row[pk_column] is None:
+            return None     # nullable nested relation
+        return {key: step(row, request) for key, step in steps}
+    return build
+
+
+def compile_serializer(serializer, prefix=""):
+    """(columns, builder) reproducing serializer.to_representation()."""
+    pk = serializer.Meta.model._meta.pk.attname
+    columns = [prefix + pk]
+    steps = []
+    custom = CUSTOM_FIELDS.get(type(serializer), {})
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in custom:
+            relative, factory = custom[name]
+            field_columns = [prefix + column for column in relative]
+            columns += field_columns
+            steps.append((name, factory(*field_columns)))
+        elif isinstance(field, serializers.BaseSerializer):
+            nested_columns, build = compile_serializer(field, prefix + "__".join(field.source_attrs) + "__")
+            columns += nested_columns
+            steps.append((name, build))
+        elif field.source == "*" or isinstance(
+            field, (serializers.SerializerMethodField, serializers.FileField, serializers.RelatedField)
+        ):
+            raise ImproperlyConfigured(
+                f"{type(serializer).__name__}.{name} needs an entry in CUSTOM_FIELDS"
+            )
+        else:
+            column = prefix + "__".join(field.source_attrs)
+            columns.append(column)
+            steps.append((name, _plain(column, field.to_representation)))
+    return list(dict.fromkeys(columns)), _record(steps, prefix + pk if prefix else None)
+
+
+@lru_cache(maxsize=256)
+def _compiled(serializer_class, shape):
+    return compile_serializer(serializer_class(shape=shape))
+
+
+class Projection:
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+
+    def _compile(self, shape=None):
+        return _compiled(self.serializer_class, shape)
+
+    def project(self, queryset, extra=(), shape=None):
+        """The queryset as row dicts with every column the builder reads
+        (plus `extra`, e.g. the cursor ordering fields)."""
+        columns, _ = self._compile(shape)
+        return queryset.values(*dict.fromkeys([*columns, *extra]))
+
+    def dump(self, rows, request=None, shape=None):
+        _, build = self._compile(shape)
+        with metrics.timed("serialize"):
+            return [build(row, request) for row in rows]
+
+    def shape_queryset(self, queryset, shape):
+        """For model instances rendered with `shape`: join only the
+        relations it shows and load only the columns it reads."""
+        columns, _ = self._compile(shape)
+        related = {column.rsplit("__", 1)[0] for column in columns if "__" in column}
+        queryset = queryset.select_related(None)
+        if related:     # select_related() with no names would follow every relation
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
+
+
+GIG_PROJECTION = Projection(GigSerializer)
+BOOKING_PROJECTION = Projection(BookingSerializer)
+
+
+class ProjectionListMixin:
+    """
+    Serve `list` from a Projection of the view's serializer; set
+    `list_projection` on the viewset. Goes after the caching/conditional
+    mixins in the MRO so they wrap the fast path like any other list.
+    Also applies ?fields=/?expand= to every read of the viewset.
+    """
+    list_projection = None
+
+    def get_shape(self):
+        # writes always answer with the full representation
+        if self.request.method not in ("GET", "HEAD"):
+            return None
+        if not hasattr(self, "_shape"):
+            self._shape = parse_shape(self.request.query_params)
+        return self._shape
+
+    def get_serializer(self, *args, **kwargs):
+        shape = self.get_shape()
+        if shape is not None:
+            kwargs.setdefault("shape", shape)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        shape = self.get_shape()
+        if self.action == "retrieve" and shape is not None and self.list_projection is not None:
+            queryset = self.list_projection.shape_queryset(queryset, shape)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        if self.list_projection is None:
+            return super().list(request, *args, **kwargs)
+        shape = self.get_shape()
+        ordering = [field.lstrip("-") for field in getattr(self, "cursor_ordering", None) or ()]
+        rows = self.list_projection.project(self.filter_queryset(self.get_queryset()), ordering, shape)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.list_projection.dump(page, request, shape))
+        return Response(self.list_projection.dump(rows, request, shape))
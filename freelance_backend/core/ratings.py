@@ -0,0 +1,176 @@
+# core/ratings.py
+#
+# Stored rating aggregates on Gig and on the freelancer Profile.
+# Reviews hang off Booking, so reading a gig's rating live would mean a
+# Review -> Booking -> Gig join + GROUP BY per listing. Instead every Review
+# create/edit/delete applies an O(1) delta with F() expressions, and the
+# rebuild_ratings management command recomputes everything in bulk.
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Max, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Greatest, Now
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Booking, Gig, Profile, Review
+
+
+def _delta_update(rating_delta, count_delta, reviewed_at=None):
+    # All column references in one UPDATE see the pre-update row,
+    # so the average is computed from the *new* sum and count explicitly.
+    new_sum = F("rating_sum") + rating_delta
+    new_count = F("rating_count") + count_delta
+    changes = {
+        "rating_sum": new_sum,
+        "rating_count": new_count,
+        "rating_avg": Case(
+            When(rating_count=-count_delta, then=Value(0.0)),
+            default=Cast(new_sum, FloatField()) / new_count,
+            output_field=FloatField(),
+        ),
+        # queryset.update() skips auto_now; conditional GETs rely on it
+        "updated_at": Now(),
+    }
+    if reviewed_at is not None:
+        changes["last_reviewed_at"] = Greatest(
+            Coalesce(F("last_reviewed_at"), Value(reviewed_at)), Value(reviewed_at)
+        )
+    return changes
+
+
+def apply_review_delta(gig_id, rating_delta, count_delta, reviewed_at=None):
+    """Shift the stored aggregates of a gig and its freelancer."""
+    if gig_id is None:
+        return
+    changes = _delta_update(rating_delta, count_delta, reviewed_at)
+    with transaction.atomic():
+        Gig.objects.filter(pk=gig_id).update(**changes)
+        Profile.objects.filter(gigs__pk=gig_id).update(**changes)
+
+
+def refresh_last_reviewed(gig_id):
+    """Recompute last_reviewed_at after a review leaves a gig."""
+    if gig_id is None:
+        return
+    freelancer_id = Gig.objects.filter(pk=gig_id).values_list("freelancer_id", flat=True).first()
+    Gig.objects.filter(pk=gig_id).update(
+        last_reviewed_at=Review.objects.filter(booking__gig_id=gig_id)
+        .aggregate(last=Max("reviewed_at"))["last"]
+    )
+    if freelancer_id is not None:
+        Profile.objects.filter(pk=freelancer_id).update(
+            last_reviewed_at=Review.objects.filter(booking__gig__freelancer_id=freelancer_id)
+            .aggregate(last=Max("reviewed_at"))["last"]
+        )
+
+
+def _gig_of_booking(booking_id):
+    return Booking.objects.filter(pk=booking_id).values_list("gig_id", flat=True).first()
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_rating(sender, instance, **kwargs):
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = (
+            Review.objects.filter(pk=instance.pk)
+            .values_list("rating", "booking__gig_id")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def update_ratings_on_save(sender, instance, created, **kwargs):
+    gig_id = instance.booking.gig_id
+    previous = getattr(instance, "_previous_rating", None)
+
+    if created or previous is None:
+        apply_review_delta(gig_id, instance.rating, 1, instance.reviewed_at)
+        return
+
+    old_rating, old_gig_id = previous
+    if old_gig_id == gig_id:
+        if old_rating != instance.rating:
+            apply_review_delta(gig_id, instance.rating - old_rating, 0)
+        return
+
+    # review moved to another booking's gig
+    with transaction.atomic():
+        apply_review_delta(old_gig_id, -old_rating, -1)
+        refresh_last_reviewed(old_gig_id)
+        apply_review_delta(gig_id, instance.rating, 1, instance.reviewed_at)
+
+
+@receiver(post_delete, sender=Review)
+def update_ratings_on_delete(sender, instance, **kwargs):
+    gig_id = _gig_of_booking(instance.booking_id)
+    with transaction.atomic():
+        apply_review_delta(gig_id, -instance.rating, -1)
+        refresh_last_reviewed(gig_id)
+
+
+# ── bulk rebuild / verify (manage.py rebuild_ratings)
+
+def _aggregates(group_by):
+    rows = (
+        Review.objects.values(group_by)
+        .annotate(total=Sum("rating"), count=Count("id"), last=Max("reviewed_at"))
+    )
+    return {
+        row[group_by]: (row["total"], row["count"], row["last"])
+        for row in rows
+    }
+
+
+def _expected(aggregate):
+    total, count, last = aggregate or (0, 0, None)
+    return {
+        "rating_sum": total,
+        "rating_count": count,
+        "rating_avg": total / count if count else 0.0,
+        "last_reviewed_at": last,
+    }
+
+
+AGGREGATE_FIELDS = ["rating_sum", "rating_count", "rating_avg", "last_reviewed_at"]
+
+
+def _stale(model, group_by, batch_size):
+    """Yield (instance, expected) for every row whose stored aggregates are wrong."""
+    actual = _aggregates(group_by)
+    queryset = model.objects.only("pk", *AGGREGATE_FIELDS).order_by("pk")
+    for obj in queryset.iterator(chunk_size=batch_size):
+        expected = _expected(actual.get(obj.pk))
+        if any(
+            abs(getattr(obj, f) - v) > 1e-9 if f == "rating_avg" else getattr(obj, f) != v
+            for f, v in expected.items()
+        ):
+            yield obj, expected
+
+
+def rebuild_ratings(batch_size=1000, dry_run=False):
+    """
+    Recompute every Gig and Profile aggregate with two GROUP BY queries and
+    bulk_update the rows that drifted. Returns {"gigs": n, "profiles": n}.
+    """
+    fixed = {}
+    targets = [
+        ("gigs", Gig, "booking__gig"),
+        ("profiles", Profile, "booking__gig__freelancer"),
+    ]
+    for label, model, group_by in targets:
+        stale = []
+        now = timezone.now()
+        for obj, expected in _stale(model, group_by, batch_size):
+            for field, value in expected.items():
+                setattr(obj, field, value)
+            obj.updated_at = now
+            stale.append(obj)
+        if stale and not dry_run:
+            with transaction.atomic():
+                model.objects.bulk_update(
+                    stale, AGGREGATE_FIELDS + ["updated_at"], batch_size=batch_size
+                )
+        fixed[label] = len(stale)
+    return fixed
@@ -0,0 +1,169 @@
+# core/renderers.py
+#
+# JSON renderer and parser for the REST API, on orjson when it is installed.
+#
+# FastJSONRenderer produces the same bytes as DRF's JSONRenderer for
+# serializer output (compact separators, raw UTF-8, "Z" for UTC datetimes,
+# U+2028/U+2029 escaped); orjson just does it in C. The one deliberate
+# difference is a raw Decimal that reaches the renderer outside a
+# serializer: DRF turns it into a float, which can drop paise, while here it
+# is written like a serializer DecimalField would write it (a string, under
+# the default COERCE_DECIMAL_TO_STRING). Without orjson, or when a request
+# asks for something orjson can't do (indented output, ASCII-only or
+# non-strict JSON settings), the stdlib json module renders instead.
+#
+# StreamingListMixin sends list pages of many items as a
+# StreamingHttpResponse, rendered a batch of results at a time, so a large
+# page is never held as one bytes object.
+
+import codecs
+import datetime
+import decimal
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework import parsers, renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+from rest_framework.utils.json import strict_constant
+
+try:
+    import orjson
+except ImportError:     # optional: pip install orjson
+    orjson = None
+
+
+# orjson reads integers beyond 64 bits as floats; bodies with a run of 20+
+# digits go to the stdlib instead (translate + find is far cheaper than a regex)
+_DIGITS_TO_ZERO = bytes.maketrans(b"123456789", b"000000000")
+_LONG_NUMBER = b"0" * 20
+
+
+def _decimal(value):
+    return str(value) if api_settings.COERCE_DECIMAL_TO_STRING else float(value)
+
+
+class JSONEncoder(encoders.JSONEncoder):
+    """DRF's encoder, with Decimal written as by a serializer field."""
+
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal):
+            return _decimal(obj)
+        return super().default(obj)
+
+
+_fallback = JSONEncoder()
+
+
+def _orjson_default(obj):
+    # orjson handles str/int/float/dict/list (and subclasses), datetimes
+    # and UUIDs itself; everything else goes the way DRF's encoder goes
+    if isinstance(obj, decimal.Decimal):
+        return _decimal(obj)
+    if isinstance(obj, datetime.time) and obj.utcoffset() is not None:
+        raise TypeError("JSON can't represent timezone-aware times.")
+    return _fallback.default(obj)
+
+
+def _escape_separators(content):
+    # keep the output a strict JavaScript subset, as DRF does
+    if b"\xe2\x80" in content:
+        content = content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+    return content
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    encoder_class = JSONEncoder
+
+    def use_orjson(self):
+        # orjson only writes compact, raw UTF-8, strict JSON
+        return orjson is not None and self.compact and not self.ensure_ascii and self.strict
+
+    def dumps(self, data):
+        """render(data) without indentation."""
+        if self.use_orjson():
+            try:
+                return _escape_separators(orjson.dumps(
+                    data, default=_orjson_default,
+                    option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+                ))
+            except orjson.JSONEncodeError:
+                pass    # e.g. an int beyond 64 bits; the stdlib copes
+        return super().render(data)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return self.dumps(data)
+
+    def stream(self, data, key="results", batch_size=50):
+        """render(data) in pieces: data[key] (a list) `batch_size` items at a
+        time. With compact separators the chunks join to exactly what
+        render(data) returns."""
+        yield b"{"
+        for n, (name, value) in enumerate(data.items()):
+            yield (b"," if n else b"") + self.dumps(str(name)) + b":"
+            if name != key:
+                yield self.dumps(value)
+                continue
+            yield b"["
+            for start in range(0, len(value), batch_size):
+                chunk = self.dumps(value[start:start + batch_size])[1:-1]
+                yield (b"," if start else b"") + chunk
+            yield b"]"
+        yield b"}"
+
+
+class FastJSONParser(parsers.JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = parsers.get_encoding(parser_context or {})
+        if orjson is None or codecs.lookup(encoding).name != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+
+        raw = stream.read()
+        if _LONG_NUMBER not in raw.translate(_DIGITS_TO_ZERO):
+            try:
+                return orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                pass    # report the error exactly as the stdlib would
+        try:
+            return json.loads(raw.decode(encoding), parse_constant=strict_constant if self.strict else None)
+        except ValueError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
+
+
+class StreamingListMixin:
+    """
+    Viewset mixin: a 200 list page with at least `stream_min_items` results
+    is sent as a StreamingHttpResponse (same bytes, same headers) when the
+    negotiated renderer is FastJSONRenderer.
+    """
+    stream_min_items = 50
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if not (isinstance(response, Response) and response.status_code == 200
+                and isinstance(getattr(response, "accepted_renderer", None), FastJSONRenderer)
+                and isinstance(response.data, dict)
+                and len(response.data.get("results") or ()) >= self.stream_min_items):
+            return response
+        renderer = response.accepted_renderer
+        if not renderer.compact or renderer.get_indent(
+            response.accepted_media_type, response.renderer_context
+        ) is not None:
+            return response     # the pieces only join up without whitespace
+
+        streaming = StreamingHttpResponse(
+            renderer.stream(response.data), status=response.status_code,
+            content_type=renderer.media_type,
+        )
+        for header, value in response.items():
+            if header.lower() != "content-type":
+                streaming[header] = value
+        return streaming
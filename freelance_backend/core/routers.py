@@ -0,0 +1,79 @@
+# core/routers.py
+#
+# Primary / read-replica routing.
+#
+# Everything goes to the primary ("default") unless the code has opted in
+# to replica reads for the current request: ReplicaReadMixin does that for
+# list / retrieve on the browse endpoints. Inside that scope reads are
+# spread over settings.DATABASE_REPLICAS until the first write, after which
+# the rest of the request reads from the primary so it always sees its own
+# writes. Reads inside a transaction on the primary stay there too.
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+
+# None: primary only; otherwise {"pinned": bool} for the current request
+_scope = ContextVar("replica_scope", default=None)
+
+
+def use_replicas():
+    """Allow replica reads in the current context; returns a token for release()."""
+    return _scope.set({"pinned": False})
+
+
+def release(token):
+    _scope.reset(token)
+
+
+def pin_primary():
+    """Send the rest of the current scope's reads to the primary."""
+    scope = _scope.get()
+    if scope is not None:
+        scope["pinned"] = True
+
+
+def reading_from_replicas():
+    scope = _scope.get()
+    return bool(settings.DATABASE_REPLICAS) and scope is not None and not scope["pinned"]
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not reading_from_replicas() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        # explicit, so an instance loaded from a replica is still saved to the primary
+        pin_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        return obj1._state.db in aliases and obj2._state.db in aliases
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaReadMixin:
+    """Viewset mixin: serve `replica_actions` from the read replicas."""
+    replica_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions and request.method in SAFE_METHODS:
+            self._replica_token = use_replicas()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            self._replica_token = None
+            release(token)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -2,15 +2,81 @@
 
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.utils import timezone
+from .fieldsets import SparseFieldsMixin
+from .images import variant_payload
+from .metrics import TimedRepresentation
 from .models import Profile, Gig, Booking, Transaction, Review, Dispute
 
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    many=True writes in one round trip: bulk_create for new rows, and for
+    updates (instance = queryset, every item carrying its "id") one
+    bulk_update. Child serializers may define:
+      model_attrs(attrs)    validated item -> model field values
+      validate_bulk(items)  cross-item checks done with a single query
+    """
+
+    def _instances_by_id(self):
+        if not hasattr(self, "_by_id"):
+            self._by_id = {obj.pk: obj for obj in self.instance}
+        return self._by_id
+
+    def run_child_validation(self, data):
+        if self.instance is None:
+            return super().run_child_validation(data)
+
+        obj = self._instances_by_id().get(data.get("id")) if isinstance(data, dict) else None
+        if obj is None:
+            raise serializers.ValidationError({"id": ["Unknown or missing id."]})
+        self.child.instance = obj
+        self.child.initial_data = data
+        validated = super().run_child_validation(data)
+        validated["id"] = obj.pk
+        return validated
+
+    def validate(self, attrs):
+        validate_bulk = getattr(self.child, "validate_bulk", None)
+        if validate_bulk is not None:
+            validate_bulk(attrs)
+        return attrs
+
+    def _model_attrs(self, attrs):
+        model_attrs = getattr(self.child, "model_attrs", None)
+        return model_attrs(attrs) if model_attrs else attrs
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        objs = [model(**self._model_attrs(attrs)) for attrs in validated_data]
+        return model.objects.bulk_create(objs)
+
+    def update(self, instance, validated_data):
+        model = self.child.Meta.model
+        by_id = self._instances_by_id()
+        objs, fields = [], set()
+        for attrs in validated_data:
+            obj = by_id[attrs.pop("id")]
+            for field, value in self._model_attrs(attrs).items():
+                setattr(obj, field, value)
+                fields.add(field)
+            objs.append(obj)
+        if any(f.name == "updated_at" for f in model._meta.concrete_fields):
+            now = timezone.now()    # bulk_update skips auto_now
+            for obj in objs:
+                obj.updated_at = now
+            fields.add("updated_at")
+        if fields:
+            model.objects.bulk_update(objs, fields)
+        return objs
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model  = User
         fields = ['id', 'username', 'email']
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(SparseFieldsMixin, TimedRepresentation, serializers.ModelSerializer):
     id = serializers.IntegerField(read_only=True)
     user = serializers.CharField(source="user.username", read_only=True)
 
@@ -25,12 +91,18 @@ class ProfileSerializer(serializers.ModelSerializer):
             "portfolio_url",
             "contact_email",
             "contact_phone",
+            "rating_avg",
+            "rating_count",
         ]
-read_only_fields = ["id", "user"]
+        read_only_fields = ["id", "user", "rating_avg", "rating_count"]
 
-class GigSerializer(serializers.ModelSerializer):
+class GigSerializer(SparseFieldsMixin, TimedRepresentation, serializers.ModelSerializer):
     freelancer = ProfileSerializer(read_only=True)
+    # with ?fields=/?expand=, "freelancer" is just the id unless expanded
+    expandable_fields = {"freelancer": "freelancer_id"}
     image = serializers.ImageField(read_only=True)
+    # resized WebP/AVIF renditions, smallest first; empty until processed
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Gig
@@ -42,12 +114,23 @@ class GigSerializer(serializers.ModelSerializer):
             "delivery_time",
             "created_at",
             "image",
+            "image_variants",
             "freelancer",
+            "rating_avg",
+            "rating_count",
+            "last_reviewed_at",
         ]
+        # maintained by core/ratings.py, never written through the API
+        read_only_fields = ["rating_avg", "rating_count", "last_reviewed_at"]
+        list_serializer_class = BulkListSerializer
 
+    def get_image_variants(self, obj):
+        return variant_payload(obj.image_asset, self.context.get("request"))
 
-class BookingSerializer(serializers.ModelSerializer):
+
+class BookingSerializer(SparseFieldsMixin, TimedRepresentation, serializers.ModelSerializer):
     gig_detail = GigSerializer(source="gig", read_only=True)
+    expandable_fields = {"gig_detail": "gig_id"}
     freelancer_contact = serializers.SerializerMethodField(read_only=True)
 
     # Make "gig" a write-only IntegerField so DRF knows how to validate it
@@ -63,6 +146,7 @@ class BookingSerializer(serializers.ModelSerializer):
             "booked_at",
             "freelancer_contact",
         ]
+        list_serializer_class = BulkListSerializer
 
     def get_freelancer_contact(self, obj):
         freelancer = obj.gig.freelancer
@@ -71,6 +155,24 @@ class BookingSerializer(serializers.ModelSerializer):
             "phone": freelancer.contact_phone or "",
         }
 
+    def model_attrs(self, attrs):
+        attrs = dict(attrs)
+        if "gig" in attrs:
+            attrs["gig_id"] = attrs.pop("gig")
+        return attrs
+
+    def validate_bulk(self, items):
+        # one query for the whole batch instead of one per booking
+        wanted = {attrs["gig"] for attrs in items if "gig" in attrs}
+        found = set(Gig.objects.filter(id__in=wanted).values_list("id", flat=True))
+        errors = {
+            index: {"gig": [f"Gig {attrs['gig']} does not exist."]}
+            for index, attrs in enumerate(items)
+            if "gig" in attrs and attrs["gig"] not in found
+        }
+        if errors:
+            raise serializers.ValidationError(errors)
+
     def create(self, validated_data):
         # Extract the gig ID from validated_data and replace with actual instance
         gig_id = validated_data.pop("gig")
@@ -82,7 +184,7 @@ class BookingSerializer(serializers.ModelSerializer):
         return booking
 
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(TimedRepresentation, serializers.ModelSerializer):
     booking = serializers.PrimaryKeyRelatedField(queryset=Booking.objects.all())
 
     class Meta:
@@ -91,7 +193,7 @@ class TransactionSerializer(serializers.ModelSerializer):
         read_only_fields = ['razorpay_payment_id', 'status', 'created_at']
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedRepresentation, serializers.ModelSerializer):
     user    = serializers.ReadOnlyField(source='user.username')
     booking = serializers.PrimaryKeyRelatedField(queryset=Booking.objects.all())
 
@@ -101,7 +203,7 @@ class ReviewSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'reviewed_at']
 
 
-class DisputeSerializer(serializers.ModelSerializer):
+class DisputeSerializer(TimedRepresentation, serializers.ModelSerializer):
     booking = serializers.PrimaryKeyRelatedField(queryset=Booking.objects.all())
 
     class Meta:
@@ -0,0 +1,432 @@
+# core/similar.py
+#
+# "Similar gigs": TF-IDF vectors over each gig's title, description and its
+# freelancer's skills, cosine-scored against every other gig in NumPy
+# batches, with the top SIMILAR_GIGS_K neighbours of every gig precomputed.
+#
+# `manage.py build_similar_gigs` writes the index into a new generation
+# directory under SIMILAR_GIGS_DIR and publishes it by replacing the CURRENT
+# file. Request handlers memory-map the neighbour arrays read-only, so all
+# workers on a host share one copy through the page cache, and a lookup is
+# a binary search and a slice: no scoring and no database. Workers pick up
+# a new generation within RELOAD_INTERVAL seconds.
+#
+# An incremental build re-vectorizes only the gigs changed since the last
+# build (by Gig or freelancer updated_at, plus deletions), recomputes their
+# neighbours and merges them into everyone else's lists, with the vocabulary
+# and IDF weights of the last full build. Lists drift from exact over time
+# (a neighbour that became less similar isn't replaced by the next best,
+# and new words aren't in the vocabulary), so schedule full builds too; one
+# runs by itself when more than FULL_REBUILD_SHARE of the gigs changed.
+#
+# NumPy is needed to build and to serve; without it the endpoint says 503.
+
+import json
+import math
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+try:
+    import numpy as np
+except ImportError:     # optional: pip install numpy
+    np = None
+
+from .models import Gig
+from .skills import normalize_skills
+
+
+TOKEN_RE = re.compile(r"\w+")
+STOP_WORDS = frozenset("""
+    a an and are as at be by for from has have i in is it its me my of on or our so that the
+    their them they this to we what will with you your
+""".split())
+TITLE_WEIGHT = 2
+SKILL_WEIGHT = 2
+# words in more than this share of gigs are left out of scoring: they say
+# little about similarity and have the longest posting lists
+MAX_DF = 0.5
+# cells of the dense score matrix per batch (float64: 8 bytes each)
+BATCH_CELLS = 4_000_000
+# words in at least 1/DENSE_MIN_SHARE of the gigs are scored by matrix
+# product, up to DENSE_CELLS float32 cells for all of them together
+DENSE_MIN_SHARE = 64
+DENSE_CELLS = 32_000_000
+FULL_REBUILD_SHARE = 0.2
+RELOAD_INTERVAL = 1.0
+KEEP_GENERATIONS = 2
+CHUNK_SIZE = 2000
+
+
+class IndexUnavailable(Exception):
+    """No index has been built yet, or NumPy isn't installed."""
+
+
+def terms(title, description, skills):
+    """Weighted term counts of one gig."""
+    counts = Counter()
+    for weight, text in ((TITLE_WEIGHT, title), (1, description)):
+        for token in TOKEN_RE.findall((text or "").casefold()):
+            if len(token) > 1 and not token.isdigit() and token not in STOP_WORDS:
+                counts[token] += weight
+    for skill in normalize_skills(skills):
+        counts["skill:" + skill] += SKILL_WEIGHT
+    return counts
+
+
+def _documents(queryset):
+    rows = queryset.order_by("id").values_list("id", "title", "description", "freelancer__skills")
+    for gig_id, title, description, skills in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield gig_id, terms(title, description, skills)
+
+
+class Vectors:
+    """L2-normalized TF-IDF rows in CSR layout, one per gig, ids ascending."""
+
+    def __init__(self, ids, indptr, indices, data):
+        self.ids, self.indptr, self.indices, self.data = ids, indptr, indices, data
+
+    @classmethod
+    def from_rows(cls, rows):
+        """rows: [(gig id, column array, weight array)] in id order."""
+        lengths = [len(cols) for _, cols, _ in rows]
+        return cls(
+            np.array([gig_id for gig_id, _, _ in rows], dtype=np.int64),
+            np.concatenate(([0], np.cumsum(lengths, dtype=np.int64))),
+            np.concatenate([cols for _, cols, _ in rows] or [[]]).astype(np.int32),
+            np.concatenate([vals for _, _, vals in rows] or [[]]).astype(np.float32),
+        )
+
+    def rows(self):
+        """The inverse of from_rows()."""
+        bounds = self.indptr[1:-1]
+        return list(zip(self.ids.tolist(), np.split(self.indices, bounds), np.split(self.data, bounds)))
+
+    def batch(self, start, stop):
+        """Rows start..stop-1 as a (indptr, indices, data) triple."""
+        first, last = self.indptr[start], self.indptr[stop]
+        return self.indptr[start:stop + 1] - first, self.indices[first:last], self.data[first:last]
+
+
+def vectorize(counts, vocab, idf):
+    """(columns, weights) of one gig; terms outside the vocabulary are dropped."""
+    known = [(vocab[term], n) for term, n in counts.items() if term in vocab]
+    if not known:
+        return np.empty(0, np.int32), np.empty(0, np.float32)
+    cols = np.array(sorted(known), dtype=np.int64)
+    weights = (1 + np.log(cols[:, 1])) * idf[cols[:, 0]]
+    return cols[:, 0].astype(np.int32), (weights / np.linalg.norm(weights)).astype(np.float32)
+
+
+class _Scorer:
+    """Cosine scores of CSR batches against every gig. Common words are
+    scored with a dense matrix product (BLAS); the long tail through an
+    inverted index, expanding each word to the gigs containing it."""
+
+    def __init__(self, vectors, n_terms):
+        n = self.n = len(vectors.ids)
+        rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(vectors.indptr))
+        df = np.bincount(vectors.indices, minlength=n_terms)
+        usable = (df <= max(MAX_DF * n, 2)) & (df > 0)
+
+        by_df = np.argsort(-np.where(usable, df, 0), kind="stable")
+        dense = by_df[:DENSE_CELLS // max(n, 1)]
+        dense = dense[usable[dense] & (df[dense] * DENSE_MIN_SHARE >= n)]
+        self.dense_column = np.full(n_terms, -1, dtype=np.int64)
+        self.dense_column[dense] = np.arange(len(dense))
+        self.dense = np.zeros((n, len(dense)), dtype=np.float32)
+        in_dense = self.dense_column[vectors.indices] >= 0
+        self.dense[rows[in_dense], self.dense_column[vectors.indices[in_dense]]] = vectors.data[in_dense]
+
+        self.sparse = usable & (self.dense_column < 0)
+        order = np.argsort(vectors.indices, kind="stable")
+        self.ptr = np.concatenate(([0], np.cumsum(df)))
+        self.post_rows, self.post_vals = rows[order], vectors.data[order]
+
+    def scores(self, batch):
+        """Dense (rows in batch, n) similarities."""
+        bptr, bcols, bvals = batch
+        size, n = len(bptr) - 1, self.n
+        brows = np.repeat(np.arange(size), np.diff(bptr))
+
+        keep = self.sparse[bcols]
+        rows, cols, vals = brows[keep], bcols[keep], bvals[keep]
+        # every (batch row, word) pair expands to that word's posting list
+        lengths = self.ptr[cols + 1] - self.ptr[cols]
+        offsets = np.repeat(self.ptr[cols] - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+        cells = np.repeat(rows, lengths) * n + self.post_rows[offsets]
+        weights = np.repeat(vals, lengths) * self.post_vals[offsets]
+        scores = np.bincount(cells, weights=weights, minlength=size * n).reshape(size, n)
+        scores = scores.astype(np.float64, copy=False)     # int64 when there was nothing to add
+
+        if self.dense.shape[1]:
+            dense = self.dense_column[bcols]
+            batch_dense = np.zeros((size, self.dense.shape[1]), dtype=np.float32)
+            batch_dense[brows[dense >= 0], dense[dense >= 0]] = bvals[dense >= 0]
+            scores += batch_dense @ self.dense.T
+        return scores
+
+
+def _top_k(scores, own, ids, k):
+    """Neighbour ids (-1 for none) and scores per row, best first; `own`
+    is each row's own column, left out."""
+    scores[np.arange(len(own)), own] = 0
+    width = min(k, scores.shape[1])
+    neighbours = np.full((len(scores), k), -1, dtype=np.int64)
+    similarity = np.zeros((len(scores), k), dtype=np.float32)
+    if width:
+        cut = scores.shape[1] - width
+        top = np.argpartition(scores, cut, axis=1)[:, cut:]
+        top_scores = np.take_along_axis(scores, top, 1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top, top_scores = np.take_along_axis(top, order, 1), np.take_along_axis(top_scores, order, 1)
+        neighbours[:, :width] = np.where(top_scores > 0, ids[top], -1)
+        similarity[:, :width] = np.where(top_scores > 0, top_scores, 0)
+    return neighbours, similarity
+
+
+def _merge(neighbours, similarity, rows, cand_rows, cand_ids, cand_scores):
+    """Rebuild the lists of `rows` as the best of what they hold plus the
+    candidates (row position, neighbour id, score)."""
+    k = neighbours.shape[1]
+    at = np.concatenate([np.repeat(rows, k), cand_rows])
+    ids = np.concatenate([neighbours[rows].ravel(), cand_ids])
+    scores = np.concatenate([similarity[rows].ravel(), cand_scores])
+    valid = ids >= 0
+    at, ids, scores = at[valid], ids[valid], scores[valid]
+    order = np.lexsort((-scores, at))
+    at, ids, scores = at[order], ids[order], scores[order]
+    rank = np.arange(len(at)) - np.searchsorted(at, at)
+    keep = rank < k
+    neighbours[rows], similarity[rows] = -1, 0
+    neighbours[at[keep], rank[keep]] = ids[keep]
+    similarity[at[keep], rank[keep]] = scores[keep]
+
+
+def _batches(total, n):
+    size = max(1, BATCH_CELLS // max(n, 1))
+    return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+
+# ── building
+
+def _require_numpy():
+    if np is None:
+        raise IndexUnavailable("NumPy is required for the similar gigs index.")
+
+
+def build_full(k=None):
+    """Vectorize every gig and compute all neighbour lists. Returns the meta dict."""
+    _require_numpy()
+    k = k or settings.SIMILAR_GIGS_K
+    started = timezone.now()
+    ids, docs, df = [], [], Counter()
+    for gig_id, counts in _documents(Gig.objects.all()):
+        ids.append(gig_id)
+        docs.append(counts)
+        df.update(counts.keys())
+    n = len(ids)
+    # a word only one gig uses can't make two gigs similar
+    vocab = sorted(term for term, count in df.items() if count > 1)
+    columns = {term: i for i, term in enumerate(vocab)}
+    idf = np.array([math.log((1 + n) / (1 + df[term])) + 1 for term in vocab], dtype=np.float64)
+    vectors = Vectors.from_rows([(gig_id, *vectorize(counts, columns, idf)) for gig_id, counts in zip(ids, docs)])
+
+    scorer = _Scorer(vectors, len(vocab))
+    neighbours = np.full((n, k), -1, dtype=np.int64)
+    similarity = np.zeros((n, k), dtype=np.float32)
+    for start, stop in _batches(n, n):
+        scores = scorer.scores(vectors.batch(start, stop))
+        neighbours[start:stop], similarity[start:stop] = _top_k(scores, np.arange(start, stop), vectors.ids, k)
+
+    meta = {"k": k, "gigs": n, "terms": len(vocab), "built_at": started.isoformat(),
+            "full_built_at": started.isoformat(), "changed": n}
+    return _publish(vectors, neighbours, similarity, vocab, idf, meta)
+
+
+def build_incremental(k=None):
+    """Bring the current index up to date with the gigs changed since it
+    was built; falls back to build_full() when there is no usable index or
+    too much changed. Returns the meta dict (None: nothing to do)."""
+    _require_numpy()
+    k = k or settings.SIMILAR_GIGS_K
+    state = _load_state()
+    if state is None or state["meta"]["k"] != k:
+        return build_full(k)
+    meta, vectors = state["meta"], state["vectors"]
+    started = timezone.now()
+    since = datetime.fromisoformat(meta["built_at"])
+
+    live = np.fromiter(
+        Gig.objects.order_by("id").values_list("id", flat=True).iterator(chunk_size=10 * CHUNK_SIZE),
+        dtype=np.int64,
+    )
+    updated = np.fromiter(
+        Gig.objects.filter(Q(updated_at__gt=since) | Q(freelancer__updated_at__gt=since))
+        .values_list("id", flat=True).iterator(chunk_size=10 * CHUNK_SIZE),
+        dtype=np.int64,
+    )
+    changed = np.intersect1d(np.union1d(updated, np.setdiff1d(live, vectors.ids)), live)
+    gone = np.union1d(changed, np.setdiff1d(vectors.ids, live))
+    if not len(gone):
+        return None
+    if len(gone) > FULL_REBUILD_SHARE * max(len(live), 1):
+        return build_full(k)
+
+    vocab, idf = state["vocab"], state["idf"]
+    columns = {term: i for i, term in enumerate(vocab)}
+    kept = ~np.isin(vectors.ids, gone)
+    rows = [row for row, keep in zip(vectors.rows(), kept) if keep]
+    for start in range(0, len(changed), CHUNK_SIZE):
+        chunk = changed[start:start + CHUNK_SIZE].tolist()
+        rows += [(gig_id, *vectorize(counts, columns, idf))
+                 for gig_id, counts in _documents(Gig.objects.filter(id__in=chunk))]
+    rows.sort(key=lambda row: row[0])
+    updated_vectors = Vectors.from_rows(rows)
+    ids, n = updated_vectors.ids, len(rows)
+
+    neighbours = np.full((n, k), -1, dtype=np.int64)
+    similarity = np.zeros((n, k), dtype=np.float32)
+    positions = np.searchsorted(ids, vectors.ids[kept])
+    neighbours[positions] = state["neighbours"][kept]
+    similarity[positions] = state["similarity"][kept]
+    # changed gigs are scored afresh below; deleted ones are just gone
+    stale = np.isin(neighbours, gone)
+    neighbours[stale], similarity[stale] = -1, 0
+
+    scorer = _Scorer(updated_vectors, len(vocab))
+    changed_at = np.searchsorted(ids, changed)
+    others = np.ones(n, dtype=bool)
+    others[changed_at] = False
+    # score the changed gigs in a CSR batch of their own
+    changed_vectors = Vectors.from_rows([rows[i] for i in changed_at])
+    for start, stop in _batches(len(changed), n):
+        scores = scorer.scores(changed_vectors.batch(start, stop))
+        own = changed_at[start:stop]
+        neighbours[own], similarity[own] = _top_k(scores, own, ids, k)
+        # cosine is symmetric: the same scores place each changed gig in
+        # the other gigs' lists wherever it beats their current last entry
+        better = (scores > similarity.min(axis=1)) & others
+        better[np.arange(len(own)), own] = False
+        batch_rows, targets = np.nonzero(better)
+        if len(targets):
+            _merge(neighbours, similarity, np.unique(targets),
+                   targets, ids[own][batch_rows], scores[batch_rows, targets].astype(np.float32))
+
+    meta = {**meta, "gigs": n, "built_at": started.isoformat(), "changed": int(len(gone))}
+    return _publish(updated_vectors, neighbours, similarity, vocab, idf, meta)
+
+
+# ── snapshots
+
+def _root():
+    return Path(settings.SIMILAR_GIGS_DIR)
+
+
+def _current():
+    try:
+        return (_root() / "CURRENT").read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _publish(vectors, neighbours, similarity, vocab, idf, meta):
+    root = _root()
+    root.mkdir(parents=True, exist_ok=True)
+    generation = str(time.time_ns())
+    meta = {**meta, "generation": generation}
+    building = Path(tempfile.mkdtemp(prefix=".building-", dir=root))
+    arrays = {"ids": vectors.ids, "indptr": vectors.indptr, "indices": vectors.indices,
+              "data": vectors.data, "idf": idf, "neighbours": neighbours, "similarity": similarity}
+    for name, array in arrays.items():
+        np.save(building / f"{name}.npy", array)
+    (building / "vocab.json").write_text(json.dumps(vocab))
+    (building / "meta.json").write_text(json.dumps(meta))
+    building.rename(root / generation)
+
+    pointer = root / ".CURRENT.tmp"
+    pointer.write_text(generation)
+    os.replace(pointer, root / "CURRENT")
+    # workers may still have the previous generation mapped; on POSIX they
+    # keep reading it until they switch even after it's deleted
+    generations = sorted(p for p in root.iterdir() if p.is_dir() and not p.name.startswith("."))
+    for old in generations[:-KEEP_GENERATIONS]:
+        shutil.rmtree(old, ignore_errors=True)
+    _reader.forget()
+    return meta
+
+
+def _load_state():
+    generation = _current()
+    if generation is None:
+        return None
+    path = _root() / generation
+    try:
+        arrays = {name: np.load(path / f"{name}.npy") for name in
+                  ("ids", "indptr", "indices", "data", "idf", "neighbours", "similarity")}
+        return {
+            "meta": json.loads((path / "meta.json").read_text()),
+            "vocab": json.loads((path / "vocab.json").read_text()),
+            "vectors": Vectors(arrays["ids"], arrays["indptr"], arrays["indices"], arrays["data"]),
+            **{name: arrays[name] for name in ("idf", "neighbours", "similarity")},
+        }
+    except FileNotFoundError:
+        return None
+
+
+# ── serving
+
+class _Reader:
+    """The published neighbour arrays, memory-mapped once per process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.forget()
+
+    def forget(self):
+        self.loaded, self.checked = None, None
+
+    def arrays(self):
+        now = time.monotonic()
+        if self.checked is not None and now - self.checked[1] < RELOAD_INTERVAL \
+                and self.checked[0] == settings.SIMILAR_GIGS_DIR:
+            return self.loaded
+        with self.lock:
+            key = (settings.SIMILAR_GIGS_DIR, _current())
+            if self.loaded is None or self.loaded[0] != key:
+                path = _root() / str(key[1])
+                try:
+                    self.loaded = (key, *(np.load(path / f"{name}.npy", mmap_mode="r")
+                                          for name in ("ids", "neighbours", "similarity")))
+                except FileNotFoundError:
+                    if key[1] is None:
+                        self.loaded = None
+            self.checked = (settings.SIMILAR_GIGS_DIR, now)
+        return self.loaded
+
+
+_reader = _Reader()
+
+
+def similar_gigs(gig_id, limit=None):
+    """[(gig id, similarity)] best first, or None when the gig isn't in the index."""
+    _require_numpy()
+    loaded = _reader.arrays()
+    if loaded is None:
+        raise IndexUnavailable("The similar gigs index hasn't been built.")
+    _, ids, neighbours, similarity = loaded
+    at = int(np.searchsorted(ids, gig_id))
+    if at == len(ids) or ids[at] != gig_id:
+        return None
+    found = [(int(i), float(s)) for i, s in zip(neighbours[at].tolist(), similarity[at].tolist()) if i >= 0]
+    return found[:limit]
@@ -0,0 +1,73 @@
+# core/skills.py
+#
+# Profile.skills stays a JSON list in the API; ProfileSkill mirrors it as
+# one normalized row per (skill, profile) so "freelancers who know X and Y"
+# and the co-occurring skill facets are answered from the (name, profile)
+# index on any backend.
+
+from django.db.models import Count
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Profile, ProfileSkill
+
+
+MAX_SKILL_LENGTH = 100
+SKILL_MATCH_MODES = ("any", "all")
+
+
+def normalize_skill(value):
+    return " ".join(str(value).split()).casefold()[:MAX_SKILL_LENGTH]
+
+
+def normalize_skills(values):
+    if not isinstance(values, (list, tuple)):
+        return set()
+    return {normalize_skill(v) for v in values if isinstance(v, str) and v.strip()}
+
+
+def sync_profile_skills(profile):
+    """Make the profile's ProfileSkill rows match profile.skills."""
+    wanted = normalize_skills(profile.skills)
+    current = set(profile.skill_rows.values_list("name", flat=True))
+    if current - wanted:
+        profile.skill_rows.filter(name__in=current - wanted).delete()
+    if wanted - current:
+        ProfileSkill.objects.bulk_create(
+            [ProfileSkill(profile=profile, name=name) for name in wanted - current],
+            ignore_conflicts=True,
+        )
+
+
+@receiver(post_save, sender=Profile)
+def sync_skills_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields and "skills" not in update_fields:
+        return
+    if created and not instance.skills:
+        return
+    sync_profile_skills(instance)
+
+
+def profiles_with_skills(skills, match="any"):
+    """Subquery of profile ids having any / all of the (normalized) skills."""
+    rows = ProfileSkill.objects.filter(name__in=skills)
+    if match == "all":
+        rows = (
+            rows.values("profile_id")
+            .annotate(matched=Count("name"))
+            .filter(matched=len(skills))
+        )
+    return rows.values("profile_id")
+
+
+def skill_facets(profiles, exclude=(), limit=20):
+    """[{"skill", "count"}] of the most common skills among `profiles`,
+    counted in the database."""
+    rows = (
+        ProfileSkill.objects.filter(profile__in=profiles.values("pk"))
+        .exclude(name__in=exclude)
+        .values("name")
+        .annotate(count=Count("profile_id"))
+        .order_by("-count", "name")[:limit]
+    )
+    return [{"skill": row["name"], "count": row["count"]} for row in rows]
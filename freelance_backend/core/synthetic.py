@@ -0,0 +1,195 @@
+# core/synthetic.py
+#
+# Synthetic marketplace for benchmarks and local profiling
+# (`manage.py seed_marketplace`).
+#
+# Everything is written with bulk_create in chunks, so no model signals
+# fire: profiles are created explicitly instead of by the User post_save
+# receiver, and the derived tables (ProfileSkill rows, rating aggregates,
+# the booking rollup, trending scores) are filled in afterwards the same
+# way their rebuild commands do. The similar-gigs index is built last, when
+# numpy is installed, so /api/gigs/{id}/similar/ has neighbours to serve. The same seed and sizes always produce the same data.
+
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import similar
+from .analytics import rebuild_booking_stats
+from .models import Booking, Dispute, Gig, Profile, ProfileSkill, Review, Transaction
+from .ratings import rebuild_ratings
+from .skills import normalize_skills
+from .trending import rebuild_trending
+
+
+SEED_PASSWORD = "bench-password"
+
+SKILLS = [
+    "Python", "Django", "React", "JavaScript", "TypeScript", "Node.js", "CSS",
+    "Figma", "Logo Design", "Illustration", "Copywriting", "SEO", "Translation",
+    "Video Editing", "Voice Over", "Data Entry", "Excel", "SQL", "Flutter",
+    "Swift", "Kotlin", "WordPress", "Shopify", "Photography", "Animation",
+]
+GIG_NOUNS = ["logo", "landing page", "blog post", "mobile app", "API", "video", "podcast edit", "dashboard"]
+# share of bookings in each status
+STATUS_WEIGHTS = {"PENDING": 15, "PAID": 20, "COMPLETED": 55, "CANCELLED": 10}
+HISTORY_DAYS = 180
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class MarketplaceGenerator:
+    """
+    users           accounts (each with a profile); `freelancer_share` of
+                    them list gigs, everyone books
+    gigs_per_freelancer, bookings
+                    sizes of the rest; transactions, reviews and disputes
+                    follow from the booking statuses
+    similar_index   build the similar-gigs index afterwards (needs numpy)
+    """
+
+    def __init__(self, users=1000, freelancer_share=0.3, gigs_per_freelancer=3,
+                 bookings=5000, chunk_size=1000, seed=42, prefix="seed", similar_index=True):
+        self.users = users
+        self.freelancer_share = freelancer_share
+        self.gigs_per_freelancer = gigs_per_freelancer
+        self.bookings = bookings
+        self.chunk_size = chunk_size
+        self.prefix = prefix
+        self.similar_index = similar_index
+        self.rng = random.Random(seed)
+        self.now = timezone.now()
+        self.counts = {}
+
+    def _past(self, days=HISTORY_DAYS):
+        return self.now - timedelta(seconds=self.rng.randrange(days * 86400))
+
+    def _bulk(self, model, objs):
+        created = []
+        for chunk in _chunks(objs, self.chunk_size):
+            created.extend(model.objects.bulk_create(chunk))
+        self.counts[model._meta.model_name] = self.counts.get(model._meta.model_name, 0) + len(created)
+        return created
+
+    def make_users(self):
+        if User.objects.filter(username__startswith=f"{self.prefix}-").exists():
+            raise ValueError(f"users named {self.prefix}-* already exist; pick another prefix")
+        password = make_password(SEED_PASSWORD)    # hashing is slow; once for everyone
+        users = self._bulk(User, [
+            User(username=f"{self.prefix}-{n:06d}", email=f"{self.prefix}-{n:06d}@example.com",
+                 password=password)
+            for n in range(self.users)
+        ])
+        profiles = self._bulk(Profile, [
+            Profile(
+                user=user,
+                bio=f"Synthetic profile {user.username}",
+                skills=self.rng.sample(SKILLS, self.rng.randint(1, 5)),
+            )
+            for user in users
+        ])
+        self._bulk(ProfileSkill, [
+            ProfileSkill(profile=profile, name=name)
+            for profile in profiles for name in normalize_skills(profile.skills)
+        ])
+        return profiles
+
+    def make_gigs(self, profiles):
+        freelancers = profiles[:max(1, int(len(profiles) * self.freelancer_share))]
+        gigs = [
+            Gig(
+                freelancer=freelancer,
+                title=f"I will build your {self.rng.choice(GIG_NOUNS)} ({skill})",
+                description=f"{skill} work by {freelancer.user.username}, revisions included.",
+                price=Decimal(self.rng.randrange(500, 50000)) / 100,
+                delivery_time=self.rng.randint(1, 30),
+            )
+            for freelancer in freelancers
+            for skill in self.rng.sample(freelancer.skills, min(len(freelancer.skills), self.gigs_per_freelancer))
+        ]
+        gigs = self._bulk(Gig, gigs)
+        # bulk_create applies auto_now(_add); spread creation over the history
+        for gig in gigs:
+            gig.created_at = gig.updated_at = self._past()
+        Gig.objects.bulk_update(gigs, ["created_at", "updated_at"], batch_size=self.chunk_size)
+        return gigs
+
+    def make_bookings(self, profiles, gigs):
+        statuses, weights = zip(*STATUS_WEIGHTS.items())
+        for start in range(0, self.bookings, self.chunk_size):
+            size = min(self.chunk_size, self.bookings - start)
+            bookings = Booking.objects.bulk_create([
+                Booking(
+                    gig=self.rng.choice(gigs),
+                    client=self.rng.choice(profiles),
+                    status=self.rng.choices(statuses, weights)[0],
+                )
+                for _ in range(size)
+            ])
+            for booking in bookings:
+                # some time after the gig was listed
+                age = self.now - booking.gig.created_at
+                booking.booked_at = booking.updated_at = self.now - age * self.rng.random()
+            Booking.objects.bulk_update(bookings, ["booked_at", "updated_at"])
+            self.counts["booking"] = self.counts.get("booking", 0) + len(bookings)
+            self.make_payments_and_feedback(bookings)
+
+    def make_payments_and_feedback(self, bookings):
+        transactions, reviews, disputes = [], [], []
+        for booking in bookings:
+            if booking.status in ("PAID", "COMPLETED"):
+                transactions.append(Transaction(
+                    booking=booking, amount=booking.gig.price, status="PAID",
+                    razorpay_order_id=f"order_{self.prefix}{booking.pk}",
+                    razorpay_payment_id=f"pay_{self.prefix}{booking.pk}",
+                ))
+            elif booking.status == "PENDING" and self.rng.random() < 0.5:
+                transactions.append(Transaction(
+                    booking=booking, amount=booking.gig.price, status="CREATED",
+                    razorpay_order_id=f"order_{self.prefix}{booking.pk}",
+                ))
+            if booking.status == "COMPLETED" and self.rng.random() < 0.6:
+                reviews.append(Review(
+                    booking=booking, user=booking.client.user,
+                    rating=self.rng.choices([1, 2, 3, 4, 5], [2, 3, 10, 35, 50])[0],
+                    comment="Great work" if self.rng.random() < 0.5 else "",
+                ))
+            if self.rng.random() < 0.03:
+                disputes.append(Dispute(
+                    booking=booking, description="Synthetic dispute",
+                    resolution_status=self.rng.choice(["OPEN", "RESOLVED", "REJECTED"]),
+                ))
+
+        self._bulk(Transaction, transactions)
+        reviews = self._bulk(Review, reviews)
+        for review in reviews:
+            review.reviewed_at = min(self.now, review.booking.booked_at + timedelta(days=self.rng.randint(1, 20)))
+        Review.objects.bulk_update(reviews, ["reviewed_at"])
+        disputes = self._bulk(Dispute, disputes)
+        for dispute in disputes:
+            dispute.opened_at = dispute.updated_at = dispute.booking.booked_at + timedelta(days=1)
+        Dispute.objects.bulk_update(disputes, ["opened_at", "updated_at"])
+
+    def run(self):
+        with transaction.atomic():
+            profiles = self.make_users()
+            gigs = self.make_gigs(profiles)
+            self.make_bookings(profiles, gigs)
+            # the derived tables the skipped signals would have maintained
+            rebuild_ratings(batch_size=self.chunk_size)
+            rebuild_booking_stats(batch_size=self.chunk_size)
+            rebuild_trending(batch_size=self.chunk_size)
+        if self.similar_index and similar.np is not None:
+            similar.build_full()
+        caches[settings.API_CACHE_ALIAS].clear()
+        return self.counts
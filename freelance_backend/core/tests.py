@@ -1,3 +1,1752 @@
-from django.test import TestCase
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+import csv
+import gzip
+import hashlib
+import hmac
+import json
+import os
+import re
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections, models, transaction
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from PIL import Image
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import admin as core_admin, benchmarks, images, metrics, payments, renderers, similar, trending
+from .analytics import rebuild_booking_stats
+from .caching import cache_stats, get_version, recently_written, reset_cache_stats
+from .fieldsets import Shape, parse_shape
+from .models import (
+    Booking, BookingDailyStat, Dispute, Gig, ImageAsset, Profile, ProfileSkill, Review,
+    Transaction, WebhookEvent,
+)
+from .plans import QueryPlanMixin, analyze
+from .projections import BOOKING_PROJECTION, GIG_PROJECTION
+from .ratings import rebuild_ratings
+from .routers import ReplicaRouter, release, use_replicas
+from .serializers import BookingSerializer, GigSerializer
+from .views import BookingViewSet, GigViewSet
+from .synthetic import MarketplaceGenerator
+from .webhooks import process_batch
+
+
+class GigFilterTests(APITestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user("alice")
+        self.bob = User.objects.create_user("bob")
+        self.client.force_authenticate(self.alice)
+
+        Gig.objects.create(
+            freelancer=self.alice.profile, title="Logo design",
+            description="Vector logo for your startup",
+            price=Decimal("500.00"), delivery_time=3,
+        )
+        Gig.objects.create(
+            freelancer=self.bob.profile, title="Django API",
+            description="REST backend with JWT auth",
+            price=Decimal("5000.00"), delivery_time=14,
+        )
+        Gig.objects.create(
+            freelancer=self.bob.profile, title="Landing page",
+            description="React + Tailwind landing page design",
+            price=Decimal("1500.00"), delivery_time=5,
+        )
+
+    def titles(self, **params):
+        response = self.client.get("/api/gigs/", params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(g["title"] for g in response.data["results"])
+
+    def test_unfiltered_lists_everything(self):
+        self.assertEqual(len(self.titles()), 3)
+
+    def test_search_matches_title_and_description(self):
+        self.assertEqual(self.titles(search="design"), ["Landing page", "Logo design"])
+        self.assertEqual(self.titles(search="jwt"), ["Django API"])
+        self.assertEqual(self.titles(search="react design"), ["Landing page"])
+
+    def test_price_range(self):
+        self.assertEqual(self.titles(min_price="1000"), ["Django API", "Landing page"])
+        self.assertEqual(self.titles(min_price="400", max_price="1500"),
+                         ["Landing page", "Logo design"])
+
+    def test_delivery_time_and_freelancer(self):
+        self.assertEqual(self.titles(max_delivery_time=5), ["Landing page", "Logo design"])
+        self.assertEqual(self.titles(freelancer=self.bob.profile.id),
+                         ["Django API", "Landing page"])
+
+    def test_invalid_number_is_rejected(self):
+        response = self.client.get("/api/gigs/", {"min_price": "cheap"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("min_price", response.data)
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("carol")
+        self.client.force_authenticate(self.user)
+        self.gigs = [
+            Gig.objects.create(
+                freelancer=self.user.profile, title=f"Gig {i}", description="",
+                price=Decimal("100.00"), delivery_time=1,
+            )
+            for i in range(5)
+        ]
+
+    def test_walks_every_page_newest_first_without_count(self):
+        seen = []
+        url = "/api/gigs/?page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            seen.extend(g["id"] for g in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(seen, [g.id for g in reversed(self.gigs)])
+
+    def test_tied_leading_values_page_by_keyset(self):
+        # every gig is unrated and untrending: the tie is broken by id
+        for ordering in ("rating", "trending"):
+            seen = []
+            url = f"/api/gigs/?page_size=2&ordering={ordering}"
+            while url:
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertFalse([q for q in queries if "OFFSET" in q["sql"]])
+                seen.extend(g["id"] for g in response.data["results"])
+                url = response.data["next"]
+            self.assertEqual(seen, [g.id for g in reversed(self.gigs)])
+
+            previous = self.client.get(response.data["previous"]).data["results"]
+            self.assertEqual([g["id"] for g in previous], seen[-3:-1])
+
+    def test_page_size_is_capped(self):
+        response = self.client.get("/api/gigs/", {"page_size": 10000})
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_bookings_are_paginated(self):
+        for gig in self.gigs:
+            Booking.objects.create(gig=gig, client=self.user.profile)
+        response = self.client.get("/api/bookings/", {"page_size": 3})
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertIsNotNone(response.data["next"])
+
+
+class QueryBudgetTests(APITestCase):
+    """
+    Every list endpoint has a fixed query budget. The count is measured at
+    two result sizes and must not grow with the number of rows returned,
+    so a missing select_related fails the build instead of shipping an N+1.
+    """
+    BUDGETS = {
+        "/api/profiles/": 1,
+        "/api/gigs/": 1,
+        "/api/bookings/": 3,        # + request.user.profile, + ETag freshness aggregate
+        "/api/transactions/": 1,
+        "/api/reviews/": 1,
+        "/api/disputes/": 1,
+    }
+
+    def setUp(self):
+        self.client_user = User.objects.create_user("client")
+        self.seeded = 0
+
+    def seed(self, n):
+        for i in range(self.seeded, self.seeded + n):
+            freelancer = User.objects.create_user(f"freelancer{i}")
+            gig = Gig.objects.create(
+                freelancer=freelancer.profile, title=f"Gig {i}", description="",
+                price=Decimal("100.00"), delivery_time=1,
+            )
+            booking = Booking.objects.create(gig=gig, client=self.client_user.profile)
+            Transaction.objects.create(
+                booking=booking, amount=gig.price, status="CREATED"
+            )
+            Review.objects.create(booking=booking, user=self.client_user, rating=5)
+            Dispute.objects.create(booking=booking, description="late")
+        self.seeded += n
+
+    def count_queries(self, url):
+        # fresh user instance, so cached relations don't hide queries
+        self.client.force_authenticate(User.objects.get(pk=self.client_user.pk))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), len(response.data["results"])
+
+    def test_list_endpoints_stay_within_budget(self):
+        self.seed(2)
+        small = {url: self.count_queries(url) for url in self.BUDGETS}
+        self.seed(8)
+        large = {url: self.count_queries(url) for url in self.BUDGETS}
+
+        for url, budget in self.BUDGETS.items():
+            with self.subTest(url=url):
+                (few, few_rows), (many, many_rows) = small[url], large[url]
+                self.assertGreater(many_rows, few_rows)
+                self.assertEqual(few, many, "query count grows with result size")
+                self.assertLessEqual(many, budget)
+
+
+class RatingAggregateTests(APITestCase):
+    def setUp(self):
+        self.freelancer = User.objects.create_user("dave")
+        self.reviewer = User.objects.create_user("erin")
+        self.gig = Gig.objects.create(
+            freelancer=self.freelancer.profile, title="Copywriting", description="",
+            price=Decimal("300.00"), delivery_time=2,
+        )
+        self.other_gig = Gig.objects.create(
+            freelancer=self.freelancer.profile, title="Editing", description="",
+            price=Decimal("200.00"), delivery_time=2,
+        )
+
+    def review(self, gig, rating):
+        booking = Booking.objects.create(gig=gig, client=self.reviewer.profile)
+        return Review.objects.create(booking=booking, user=self.reviewer, rating=rating)
+
+    def assertAggregates(self, obj, total, count, avg):
+        obj.refresh_from_db()
+        self.assertEqual((obj.rating_sum, obj.rating_count), (total, count))
+        self.assertAlmostEqual(obj.rating_avg, avg)
+
+    def test_create_edit_delete_keep_aggregates_in_step(self):
+        first = self.review(self.gig, 5)
+        self.review(self.gig, 2)
+        self.review(self.other_gig, 4)
+        self.assertAggregates(self.gig, 7, 2, 3.5)
+        self.assertAggregates(self.freelancer.profile, 11, 3, 11 / 3)
+
+        first.rating = 3
+        first.save()
+        self.assertAggregates(self.gig, 5, 2, 2.5)
+
+        first.delete()
+        self.assertAggregates(self.gig, 2, 1, 2.0)
+        self.assertAggregates(self.freelancer.profile, 6, 2, 3.0)
+        self.assertIsNotNone(self.gig.last_reviewed_at)
+
+    def test_rebuild_and_verify_command(self):
+        self.review(self.gig, 4)
+        Gig.objects.filter(pk=self.gig.pk).update(rating_sum=0, rating_count=0, rating_avg=0)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_ratings", "--verify", stdout=StringIO())
+        call_command("rebuild_ratings", stdout=StringIO())
+        call_command("rebuild_ratings", "--verify", stdout=StringIO())
+        self.assertAggregates(self.gig, 4, 1, 4.0)
+
+    def test_gig_list_exposes_and_sorts_by_rating(self):
+        self.review(self.gig, 2)
+        self.review(self.other_gig, 5)
+        self.client.force_authenticate(self.reviewer)
+
+        response = self.client.get("/api/gigs/", {"ordering": "rating"})
+        results = response.data["results"]
+        self.assertEqual([g["title"] for g in results], ["Editing", "Copywriting"])
+        self.assertEqual(results[0]["rating_count"], 1)
+        self.assertEqual(results[0]["rating_avg"], 5.0)
+
+        response = self.client.get("/api/gigs/", {"ordering": "cheapest"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+        self.user = User.objects.create_user("frank")
+        self.client.force_authenticate(self.user)
+        self.gig = Gig.objects.create(
+            freelancer=self.user.profile, title="Voice over", description="",
+            price=Decimal("800.00"), delivery_time=4,
+        )
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_repeat_reads_are_served_from_cache(self):
+        url = f"/api/gigs/{self.gig.id}/"
+        self.assertEqual(self.get(url)["X-Cache"], "MISS")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get(url)["X-Cache"], "HIT")
+        self.assertEqual(cache_stats()["gig"], {"hit": 1, "miss": 1})
+
+    def test_gig_save_invalidates_detail_and_list(self):
+        detail, listing = f"/api/gigs/{self.gig.id}/", "/api/gigs/"
+        self.get(detail), self.get(listing)
+
+        self.gig.title = "Voice over (EN)"
+        self.gig.save()
+
+        response = self.get(detail)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["title"], "Voice over (EN)")
+        self.assertEqual(self.get(listing)["X-Cache"], "MISS")
+
+    def test_profile_and_username_changes_reach_embedded_gigs(self):
+        gig_url = f"/api/gigs/{self.gig.id}/"
+        profile_url = f"/api/profiles/{self.user.profile.id}/"
+        self.get(gig_url), self.get(profile_url)
+
+        self.user.username = "frank2"
+        self.user.save()
+
+        self.assertEqual(self.get(gig_url).data["freelancer"]["user"], "frank2")
+        self.assertEqual(self.get(profile_url).data["user"], "frank2")
+
+    def test_profile_change_is_one_bump_however_many_gigs(self):
+        other = Gig.objects.create(
+            freelancer=self.user.profile, title="Jingle", description="",
+            price=Decimal("900.00"), delivery_time=4,
+        )
+        urls = [f"/api/gigs/{self.gig.id}/", f"/api/gigs/{other.id}/"]
+        for url in urls:
+            self.get(url)
+        versions = [get_version("gig", self.gig.id), get_version("gig", other.id)]
+
+        profile = self.user.profile
+        profile.bio = "Studio in Pune"
+        profile.save()
+
+        self.assertEqual([get_version("gig", self.gig.id), get_version("gig", other.id)], versions)
+        for url in urls:
+            response = self.get(url)
+            self.assertEqual(response["X-Cache"], "MISS")
+            self.assertEqual(response.data["freelancer"]["bio"], "Studio in Pune")
+            self.assertEqual(self.get(url)["X-Cache"], "HIT")
+
+    def test_missing_gig_is_not_cached(self):
+        url = f"/api/gigs/{self.gig.id + 100}/"
+        for _ in range(2):
+            self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(cache_stats()["gig"], {"hit": 0, "miss": 2})
+
+    @override_settings(DATABASE_REPLICAS=["replica1"])
+    def test_recent_writes_are_flagged_for_the_replica_lag_window(self):
+        self.gig.save()
+        self.assertTrue(recently_written("gig", self.gig.pk))
+        self.assertTrue(recently_written("gig", "list"))
+        self.assertFalse(recently_written("gig", self.gig.pk + 1))
+
+    def test_other_gigs_stay_cached(self):
+        other = Gig.objects.create(
+            freelancer=self.user.profile, title="Jingle", description="",
+            price=Decimal("900.00"), delivery_time=4,
+        )
+        self.get(f"/api/gigs/{other.id}/")
+        self.gig.save()
+        self.assertEqual(self.get(f"/api/gigs/{other.id}/")["X-Cache"], "HIT")
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("grace")
+        self.client.force_authenticate(self.user)
+        self.gig = Gig.objects.create(
+            freelancer=self.user.profile, title="Translation", description="",
+            price=Decimal("250.00"), delivery_time=2,
+        )
+        self.booking = Booking.objects.create(gig=self.gig, client=self.user.profile)
+
+    def test_if_none_match_returns_304_without_serializing(self):
+        url = f"/api/gigs/{self.gig.id}/"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+        self.assertTrue(first.has_header("Last-Modified"))
+
+        # validators are cached alongside the gig payload
+        with self.assertNumQueries(0):
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second["ETag"], etag)
+        self.assertEqual(second.content, b"")
+
+    def test_change_to_embedded_profile_changes_etag(self):
+        url = f"/api/gigs/{self.gig.id}/"
+        etag = self.client.get(url)["ETag"]
+        profile = self.user.profile
+        profile.bio = "Native Hindi and English speaker"
+        profile.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_booking_list_if_modified_since(self):
+        first = self.client.get("/api/bookings/")
+        last_modified = first["Last-Modified"]
+        response = self.client.get("/api/bookings/", HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        # a new booking changes the row count, hence the ETag
+        Booking.objects.create(gig=self.gig, client=self.user.profile)
+        response = self.client.get("/api/bookings/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_missing_object_is_still_404(self):
+        self.assertEqual(self.client.get("/api/gigs/999999/").status_code, 404)
+
+
+@override_settings(RAZORPAY_GATEWAY="core.payments.FakeGateway", RAZORPAY_KEY_ID="rzp_test")
+class CreateOrderTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("heidi")
+        gig = Gig.objects.create(
+            freelancer=User.objects.create_user("ivan").profile, title="Mixing",
+            description="", price=Decimal("1200.50"), delivery_time=3,
+        )
+        self.booking = Booking.objects.create(gig=gig, client=self.user.profile)
+        self.client.force_authenticate(self.user)
+        payments.get_gateway().orders.clear()
+
+    def test_retries_return_the_same_order(self):
+        first = self.client.post("/api/create-order/", {"booking": self.booking.id})
+        second = self.client.post("/api/create-order/", {"booking": self.booking.id})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first.data["amount"], 120050)
+        self.assertEqual(len(payments.get_gateway().orders), 1)
+        self.assertEqual(Transaction.objects.filter(booking=self.booking).count(), 1)
+
+        order = payments.get_gateway().orders[0]
+        self.assertEqual(order["notes"], {"transaction_id": str(first.data["transaction_id"])})
+
+    def test_concurrent_request_gets_409_while_lease_is_held(self):
+        Transaction.objects.create(
+            booking=self.booking, amount=Decimal("1200.50"), status="CREATED",
+            order_requested_at=timezone.now(),
+        )
+        response = self.client.post("/api/create-order/", {"booking": self.booking.id})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(payments.get_gateway().orders, [])
+
+    def test_gateway_error_releases_the_lease(self):
+        with mock.patch.object(payments.get_gateway(), "create_order",
+                               side_effect=payments.GatewayError("refused")):
+            response = self.client.post("/api/create-order/", {"booking": self.booking.id})
+        self.assertEqual(response.status_code, 502)
+        self.assertIsNone(Transaction.objects.get(booking=self.booking).order_requested_at)
+
+    def test_retry_after_timeout_adopts_the_order_the_gateway_made(self):
+        gateway = payments.get_gateway()
+        create = gateway.create_order
+
+        def create_then_time_out(**kwargs):
+            create(**kwargs)
+            raise payments.GatewayTimeout("slow")
+
+        with mock.patch.object(gateway, "create_order", side_effect=create_then_time_out):
+            response = self.client.post("/api/create-order/", {"booking": self.booking.id})
+        self.assertEqual(response.status_code, 504)
+        txn = Transaction.objects.get(booking=self.booking)
+        self.assertIsNotNone(txn.order_requested_at)
+
+        # held until the lease runs out
+        response = self.client.post("/api/create-order/", {"booking": self.booking.id})
+        self.assertEqual(response.status_code, 409)
+
+        Transaction.objects.filter(pk=txn.pk).update(
+            order_requested_at=timezone.now() - payments.order_lease()
+        )
+        response = self.client.post("/api/create-order/", {"booking": self.booking.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(gateway.orders), 1)
+        self.assertEqual(response.data["order_id"], gateway.orders[0]["id"])
+
+    def test_someone_elses_booking_is_rejected(self):
+        self.client.force_authenticate(User.objects.create_user("judy"))
+        response = self.client.post("/api/create-order/", {"booking": self.booking.id})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_async_endpoint_is_idempotent_too(self):
+        token = str(await sync_to_async(AccessToken.for_user)(self.user))
+        headers = {"Authorization": f"Bearer {token}"}
+        url = "/api/create-order/async/"
+        body = {"booking": self.booking.id}
+
+        first = await self.async_client.post(url, body, content_type="application/json", headers=headers)
+        second = await self.async_client.post(url, body, content_type="application/json", headers=headers)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(len(payments.get_gateway().orders), 1)
+
+        anonymous = await self.async_client.post(url, body, content_type="application/json")
+        self.assertEqual(anonymous.status_code, 401)
+
+
+@override_settings(RAZORPAY_KEY_SECRET="whsec")
+class RazorpayWebhookTests(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user("kim")
+        gig = Gig.objects.create(
+            freelancer=user.profile, title="Podcast edit", description="",
+            price=Decimal("700.00"), delivery_time=2,
+        )
+        self.booking = Booking.objects.create(gig=gig, client=user.profile)
+        self.txn = Transaction.objects.create(
+            booking=self.booking, amount=gig.price, status="CREATED"
+        )
+
+    def deliver(self, payment_status, txn_id=None, event_id="evt_1"):
+        body = json.dumps({
+            "event": f"payment.{payment_status}",
+            "payload": {"payment": {"entity": {
+                "id": "pay_123",
+                "status": payment_status,
+                "notes": {"transaction_id": str(txn_id or self.txn.id)},
+            }}},
+        }).encode()
+        sig = hmac.new(b"whsec", body, hashlib.sha256).hexdigest()
+        return self.client.post(
+            "/api/webhook/razorpay/", body, content_type="application/json",
+            HTTP_X_RAZORPAY_SIGNATURE=sig, HTTP_X_RAZORPAY_EVENT_ID=event_id,
+        )
+
+    def test_webhook_only_enqueues_and_dedupes_retries(self):
+        self.assertEqual(self.deliver("captured").status_code, 200)
+        self.assertEqual(self.deliver("captured").status_code, 200)
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+        self.txn.refresh_from_db()
+        self.assertEqual(self.txn.status, "CREATED")
+
+    def test_bad_signature_is_rejected(self):
+        response = self.client.post(
+            "/api/webhook/razorpay/", b"{}", content_type="application/json",
+            HTTP_X_RAZORPAY_SIGNATURE="nope",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_worker_applies_capture(self):
+        self.deliver("captured")
+        call_command("process_webhooks", "--once", stdout=StringIO())
+
+        self.txn.refresh_from_db()
+        self.booking.refresh_from_db()
+        self.assertEqual((self.txn.status, self.txn.razorpay_payment_id), ("PAID", "pay_123"))
+        self.assertEqual(self.booking.status, "PAID")
+        self.assertEqual(WebhookEvent.objects.get().status, WebhookEvent.Status.PROCESSED)
+
+    def test_failed_payment_keeps_booking_pending_and_capture_is_terminal(self):
+        self.deliver("captured", event_id="evt_1")
+        self.deliver("failed", event_id="evt_2")
+        process_batch()
+
+        self.txn.refresh_from_db()
+        self.booking.refresh_from_db()
+        self.assertEqual(self.txn.status, "PAID")
+        self.assertEqual(self.booking.status, "PAID")
+
+    def test_unknown_transaction_is_retried_with_backoff(self):
+        self.deliver("captured", txn_id=999999)
+        self.assertEqual(process_batch(), (0, 1, 0))
+
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.status, WebhookEvent.Status.PENDING)
+        self.assertEqual(event.attempts, 1)
+        self.assertGreater(event.next_attempt_at, timezone.now() + timedelta(seconds=1))
+        # not due yet
+        self.assertEqual(process_batch(), (0, 0, 0))
+
+    def test_payment_already_on_another_transaction_fails_only_its_event(self):
+        other = Transaction.objects.create(
+            booking=Booking.objects.create(gig=self.booking.gig, client=self.booking.client),
+            amount=Decimal("700.00"), status="CREATED",
+        )
+        self.deliver("captured", event_id="evt_1")
+        self.deliver("captured", txn_id=other.id, event_id="evt_2")
+        self.assertEqual(process_batch(), (1, 0, 1))
+
+        other.refresh_from_db()
+        self.assertEqual((other.status, other.razorpay_payment_id), ("CREATED", ""))
+        self.assertIn("another transaction", WebhookEvent.objects.get(event_id="evt_2").last_error)
+
+
+class GigImagePipelineTests(APITestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        override = override_settings(MEDIA_ROOT=media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        cache.clear()
+        self.user = User.objects.create_user("liam")
+        self.client.force_authenticate(self.user)
+
+    def upload(self, name="photo.jpg"):
+        exif = Image.Exif()
+        exif[0x010F] = "SpyCam"     # Make
+        buffer = BytesIO()
+        Image.new("RGB", (1600, 900), "teal").save(buffer, "JPEG", exif=exif)
+        return Gig.objects.create(
+            freelancer=self.user.profile, title="Photo retouch", description="",
+            price=Decimal("600.00"), delivery_time=2,
+            image=SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg"),
+        )
+
+    def test_worker_renders_stripped_variants(self):
+        gig = self.upload()
+        self.assertEqual(self.client.get(f"/api/gigs/{gig.id}/").data["image_variants"], [])
+
+        call_command("process_gig_images", "--once", stdout=StringIO())
+
+        gig.refresh_from_db()
+        asset = gig.image_asset
+        self.assertEqual((asset.width, asset.height), (1600, 900))
+        self.assertEqual(sorted({v["width"] for v in asset.variants}), [320, 640, 1280])
+        for variant in asset.variants:
+            with default_storage.open(variant["name"]) as fh:
+                rendered = Image.open(fh)
+                self.assertEqual(rendered.width, variant["width"])
+                self.assertFalse(rendered.getexif())
+
+        payload = self.client.get(f"/api/gigs/{gig.id}/").data["image_variants"]
+        self.assertEqual(payload[0]["width"], 320)
+        self.assertTrue(payload[0]["url"].startswith("http://testserver/media/"))
+
+    def test_identical_upload_is_deduplicated(self):
+        first, second = self.upload("a.jpg"), self.upload("b.jpg")
+        duplicate = second.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("process_gig_images", "--once", stdout=StringIO())
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.image_asset_id, second.image_asset_id)
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertFalse(default_storage.exists(duplicate))
+
+    def test_new_upload_is_requeued(self):
+        gig = self.upload()
+        call_command("process_gig_images", "--once", stdout=StringIO())
+        gig.refresh_from_db()
+        self.assertIsNotNone(gig.image_asset_id)
+
+        gig.image = SimpleUploadedFile("new.png", b"not really a png")
+        gig.save()
+        gig.refresh_from_db()
+        self.assertIsNone(gig.image_asset_id)
+
+    def test_upload_replaced_during_processing_stays_queued(self):
+        gig = self.upload()
+        render = images.render_variants
+
+        def replace_then_render(field_file, sha256):
+            newer = Gig.objects.get(pk=gig.pk)
+            newer.image = SimpleUploadedFile("newer.jpg", b"replaced meanwhile")
+            newer.save()
+            return render(field_file, sha256)
+
+        with mock.patch.object(images, "render_variants", side_effect=replace_then_render):
+            self.assertIsNone(images.process_gig_image(gig))
+        gig.refresh_from_db()
+        self.assertIsNone(gig.image_asset_id)
+        self.assertTrue(gig.image.name.startswith("gig_images/newer"))
+        self.assertEqual(images.pending_gigs().count(), 1)
+
+
+class BulkWriteTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("mona")
+        self.client.force_authenticate(self.user)
+
+    def gig_items(self, n):
+        return [
+            {"title": f"Gig {i}", "description": "bulk", "price": "99.00", "delivery_time": 2}
+            for i in range(n)
+        ]
+
+    def test_bulk_create_gigs_in_constant_queries(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.post("/api/gigs/bulk/", self.gig_items(2), format="json")
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post("/api/gigs/bulk/", self.gig_items(20), format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 20)
+        self.assertEqual(response.data[0]["freelancer"]["user"], "mona")
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual(Gig.objects.filter(freelancer=self.user.profile).count(), 22)
+
+    def test_invalid_item_rejects_whole_batch_with_per_item_errors(self):
+        items = self.gig_items(3)
+        items[1]["price"] = "lots"
+        response = self.client.post("/api/gigs/bulk/", items, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data), [1])
+        self.assertIn("price", response.data[1])
+        self.assertFalse(Gig.objects.exists())
+
+    def test_bulk_update_only_touches_own_gigs(self):
+        mine = self.client.post("/api/gigs/bulk/", self.gig_items(2), format="json").data
+        theirs = Gig.objects.create(
+            freelancer=User.objects.create_user("nick").profile, title="Theirs",
+            description="", price=Decimal("1.00"), delivery_time=1,
+        )
+        self.client.get("/api/gigs/")    # warm the list cache
+
+        response = self.client.patch("/api/gigs/bulk/", [
+            {"id": mine[0]["id"], "price": "150.00"},
+            {"id": mine[1]["id"], "title": "Renamed"},
+        ], format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Gig.objects.get(pk=mine[0]["id"]).price, Decimal("150.00"))
+        self.assertEqual(Gig.objects.get(pk=mine[1]["id"]).title, "Renamed")
+        self.assertEqual(self.client.get("/api/gigs/")["X-Cache"], "MISS")
+
+        response = self.client.patch("/api/gigs/bulk/", [{"id": theirs.id, "title": "Mine now"}], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("id", response.data[0])
+
+    def test_bulk_bookings_validate_gigs_in_one_go(self):
+        gig = Gig.objects.create(
+            freelancer=User.objects.create_user("olga").profile, title="Tutoring",
+            description="", price=Decimal("10.00"), delivery_time=1,
+        )
+        response = self.client.post("/api/bookings/bulk/", [{"gig": gig.id}, {"gig": 424242}], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data), [1])
+
+        response = self.client.post("/api/bookings/bulk/", [{"gig": gig.id}] * 3, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Booking.objects.filter(client=self.user.profile).count(), 3)
+        self.assertEqual(response.data[0]["gig_detail"]["title"], "Tutoring")
+
+        ids = [b["id"] for b in response.data]
+        # SQLite has no row locks, so check the PATCH asks for them
+        with mock.patch.object(models.QuerySet, "select_for_update", autospec=True,
+                               side_effect=models.QuerySet.select_for_update) as lock:
+            response = self.client.patch(
+                "/api/bookings/bulk/", [{"id": i, "status": "CANCELLED"} for i in ids], format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        lock.assert_called_once()
+        self.assertEqual(lock.call_args.kwargs, {"of": ("self",)})
+        self.assertEqual(
+            set(Booking.objects.filter(pk__in=ids).values_list("status", flat=True)), {"CANCELLED"}
+        )
+
+
+class BookingAnalyticsTests(APITestCase):
+    def setUp(self):
+        self.freelancer = User.objects.create_user("pia")
+        self.client_user = User.objects.create_user("quinn")
+        self.gig = Gig.objects.create(
+            freelancer=self.freelancer.profile, title="Voice over",
+            description="", price=Decimal("40.00"), delivery_time=2,
+        )
+        self.client.force_authenticate(self.freelancer)
+
+    def book(self, status="PENDING"):
+        return Booking.objects.create(gig=self.gig, client=self.client_user.profile, status=status)
+
+    def pay(self, booking):
+        txn = Transaction.objects.create(booking=booking, amount=Decimal("40.00"), status="CREATED")
+        txn.status = "PAID"
+        txn.save()
+        booking.status = "PAID"
+        booking.save()
+        return txn
+
+    def rollup(self):
+        return {
+            row.status: (row.bookings, row.revenue)
+            for row in BookingDailyStat.objects.filter(gig=self.gig, bookings__gt=0)
+        }
+
+    def test_saves_move_bookings_between_status_rows(self):
+        first, second, third = self.book(), self.book(), self.book()
+        self.pay(first)
+        second.status = "CANCELLED"
+        second.save()
+
+        self.assertEqual(self.rollup(), {
+            "PENDING": (1, Decimal("0.00")),
+            "PAID": (1, Decimal("40.00")),
+            "CANCELLED": (1, Decimal("0.00")),
+        })
+        third.delete()
+        first.delete()
+        self.assertEqual(self.rollup(), {"CANCELLED": (1, Decimal("0.00"))})
+
+    def test_webhook_batch_and_bulk_writes_update_the_rollup(self):
+        booking = self.book()
+        txn = Transaction.objects.create(booking=booking, amount=Decimal("40.00"), status="CREATED")
+        WebhookEvent.objects.create(event_id="evt_a", event="payment.captured", payload={
+            "event": "payment.captured",
+            "payload": {"payment": {"entity": {
+                "id": "pay_1", "status": "captured", "notes": {"transaction_id": str(txn.id)},
+            }}},
+        })
+        process_batch()
+        self.assertEqual(self.rollup(), {"PAID": (1, Decimal("40.00"))})
+
+        self.client.force_authenticate(self.client_user)
+        created = self.client.post("/api/bookings/bulk/", [{"gig": self.gig.id}] * 2, format="json").data
+        self.client.patch("/api/bookings/bulk/", [{"id": created[0]["id"], "status": "CANCELLED"}], format="json")
+        self.assertEqual(self.rollup(), {
+            "PAID": (1, Decimal("40.00")),
+            "PENDING": (1, Decimal("0.00")),
+            "CANCELLED": (1, Decimal("0.00")),
+        })
+
+    def test_endpoint_reads_the_rollup_in_flat_queries(self):
+        self.pay(self.book())
+        self.book()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/profiles/me/analytics/?days=7")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["totals"], {
+            "bookings": 2, "revenue": "40.00",
+            "by_status": {"PAID": 1, "PENDING": 1}, "conversion_rate": 0.5,
+        })
+        self.assertEqual(len(response.data["daily"]), 1)
+        self.assertEqual(response.data["gigs"][0]["title"], "Voice over")
+        self.assertFalse(any('"core_booking"' in q["sql"] for q in queries.captured_queries))
+
+        self.client.force_authenticate(self.client_user)
+        self.assertEqual(self.client.get("/api/profiles/me/analytics/").data["totals"]["bookings"], 0)
+
+    def test_backfill_command_repairs_the_rollup(self):
+        self.pay(self.book())
+        self.book()
+        BookingDailyStat.objects.all().delete()
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_booking_stats", "--verify", stdout=StringIO())
+        call_command("rebuild_booking_stats", stdout=StringIO())
+        call_command("rebuild_booking_stats", "--verify", stdout=StringIO())
+        self.assertEqual(self.rollup(), {
+            "PAID": (1, Decimal("40.00")),
+            "PENDING": (1, Decimal("0.00")),
+        })
+
+
+class SkillSearchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        for name, skills in [
+            ("rae", ["Python", "Django", "React"]),
+            ("sam", ["python", "Flask"]),
+            ("tia", ["Django ", "React", "CSS"]),
+            ("uma", []),
+        ]:
+            profile = User.objects.create_user(name).profile
+            profile.skills = skills
+            profile.save()
+
+    def search(self, **params):
+        response = self.client.get("/api/profiles/", params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def users(self, response):
+        return sorted(p["user"] for p in response.data["results"])
+
+    def test_skill_rows_follow_the_json_list(self):
+        profile = User.objects.get(username="sam").profile
+        self.assertEqual(
+            sorted(profile.skill_rows.values_list("name", flat=True)), ["flask", "python"]
+        )
+        profile.skills = ["Flask", "Go"]
+        profile.save()
+        self.assertEqual(
+            sorted(profile.skill_rows.values_list("name", flat=True)), ["flask", "go"]
+        )
+        self.assertEqual(self.client.get(f"/api/profiles/{profile.id}/").data["skills"], ["Flask", "Go"])
+
+    def test_any_and_all_matching(self):
+        self.assertEqual(self.users(self.search(skills="python,css")), ["rae", "sam", "tia"])
+        self.assertEqual(self.users(self.search(skills="DJANGO,react", skill_match="all")), ["rae", "tia"])
+        self.assertEqual(self.users(self.search(skills="python,css", skill_match="all")), [])
+        self.assertEqual(self.client.get("/api/profiles/", {"skills": "x", "skill_match": "most"}).status_code, 400)
+
+    def test_facets_count_co_occurring_skills_in_the_database(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.search(skills="django", page_size=1)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["facets"], [
+            {"skill": "react", "count": 2},
+            {"skill": "css", "count": 1},
+            {"skill": "python", "count": 1},
+        ])
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn("facets", self.search().data)
+
+
+@override_settings(RAZORPAY_GATEWAY="core.payments.FakeGateway", RAZORPAY_FAKE_LATENCY=0)
+class QueryPlanTests(QueryPlanMixin, APITestCase):
+    """Hot lookups must stay index-driven on a seeded database."""
+    large_tables = {
+        "core_profile", "core_gig", "core_booking", "core_transaction", "core_dispute",
+        "core_webhookevent", "core_profileskill", "core_bookingdailystat",
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        users = User.objects.bulk_create([User(username=f"seed{i}") for i in range(200)])
+        profiles = Profile.objects.bulk_create([Profile(user=u) for u in users])
+        ProfileSkill.objects.bulk_create([
+            ProfileSkill(profile=p, name=f"skill{(p.pk + k) % 40}") for p in profiles for k in range(3)
+        ])
+        gigs = Gig.objects.bulk_create([
+            Gig(freelancer=profiles[i % 200], title=f"Gig {i}", description="",
+                price=Decimal("10.00"), delivery_time=1)
+            for i in range(1000)
+        ])
+        statuses = ["COMPLETED"] * 8 + ["PAID", "PENDING"]
+        bookings = Booking.objects.bulk_create([
+            Booking(gig=gigs[i % 1000], client=profiles[(i * 7) % 200], status=statuses[i % 10])
+            for i in range(3000)
+        ])
+        Transaction.objects.bulk_create([
+            Transaction(booking=b, amount=Decimal("10.00"), status="PAID", razorpay_payment_id=f"pay_{b.pk}")
+            for b in bookings[:2000]
+        ])
+        Dispute.objects.bulk_create([
+            Dispute(booking=b, description="", resolution_status="OPEN" if b.pk % 20 == 0 else "RESOLVED")
+            for b in bookings[:2000]
+        ])
+        WebhookEvent.objects.bulk_create([
+            WebhookEvent(event_id=f"evt_{i}", event="payment.captured", payload={},
+                         status=WebhookEvent.Status.PROCESSED)
+            for i in range(2000)
+        ])
+        cls.user = User.objects.create_user("planner")
+        cls.booking = Booking.objects.create(gig=gigs[0], client=cls.user.profile)
+        txn = Transaction.objects.create(booking=cls.booking, amount=Decimal("10.00"), status="CREATED")
+        WebhookEvent.objects.create(event_id="evt_pending", event="payment.captured", payment_id="pay_new", payload={
+            "event": "payment.captured",
+            "payload": {"payment": {"entity": {
+                "id": "pay_new", "status": "captured", "notes": {"transaction_id": str(txn.id)},
+            }}},
+        })
+        call_command("rebuild_booking_stats", stdout=StringIO())
+        analyze()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(self.user)
+
+    def test_booking_and_order_paths(self):
+        with self.assertNoSeqScans():
+            self.client.get("/api/bookings/")
+            self.client.get("/api/bookings/", {"status": "PENDING"})
+            response = self.client.post("/api/create-order/", {"booking": self.booking.id}, format="json")
+        self.assertTrue(response.data["order_id"])
+        self.assertEqual(response.status_code, 200)
+
+    def test_payment_and_webhook_paths(self):
+        with self.assertNoSeqScans():
+            self.assertEqual(process_batch(), (1, 0, 0))
+
+    def test_dispute_triage_and_discovery_paths(self):
+        with self.assertNoSeqScans():
+            list(Dispute.objects.filter(resolution_status="OPEN").order_by("-opened_at", "-id")[:50])
+            self.client.get("/api/gigs/", {"freelancer": self.user.profile.id})
+            self.client.get("/api/gigs/", {"ordering": "trending"})
+            self.client.get("/api/profiles/", {"skills": "skill3,skill4", "skill_match": "all"})
+            self.client.get("/api/profiles/me/analytics/")
+
+    def test_checker_catches_a_sequential_scan(self):
+        with self.assertRaises(AssertionError):
+            with self.assertNoSeqScans():
+                list(Dispute.objects.filter(description="late delivery"))
+
+
+@override_settings(DATABASE_REPLICAS=["replica1", "replica2"])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def in_scope(self, fn):
+        token = use_replicas()
+        try:
+            return fn()
+        finally:
+            release(token)
+
+    def test_reads_use_replicas_only_inside_an_opted_in_scope(self):
+        self.assertEqual(self.router.db_for_read(Gig), "default")
+        self.assertIn(self.in_scope(lambda: self.router.db_for_read(Gig)), ["replica1", "replica2"])
+
+    def test_a_write_pins_the_rest_of_the_scope_to_the_primary(self):
+        def write_then_read():
+            gig = Gig(pk=1)
+            gig._state.db = "replica1"
+            self.assertEqual(self.router.db_for_write(Gig, instance=gig), "default")
+            return self.router.db_for_read(Gig)
+        self.assertEqual(self.in_scope(write_then_read), "default")
+        # a new request starts unpinned
+        self.assertNotEqual(self.in_scope(lambda: self.router.db_for_read(Gig)), "default")
+
+    def test_reads_inside_a_primary_transaction_stay_on_the_primary(self):
+        with mock.patch.object(connections["default"], "in_atomic_block", True):
+            self.assertEqual(self.in_scope(lambda: self.router.db_for_read(Gig)), "default")
+
+    def test_replicas_are_never_migrated(self):
+        self.assertFalse(self.router.allow_migrate("replica1", "core"))
+        self.assertTrue(self.router.allow_migrate("default", "core"))
+
+
+@skipUnless(settings.DATABASE_REPLICAS, "set DB_REPLICA_HOSTS to run against a replica alias")
+class ReplicaRoutingIntegrationTests(APITransactionTestCase):
+    """With SQLite, DB_REPLICA_HOSTS=local gives a second alias on the same database."""
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("wes")
+        Gig.objects.create(
+            freelancer=self.user.profile, title="Translation",
+            description="", price=Decimal("8.00"), delivery_time=1,
+        )
+        self.client.force_authenticate(self.user)
+        self.replica = settings.DATABASE_REPLICAS[0]
+
+    def queries_on(self, alias, method, url, **kwargs):
+        with CaptureQueriesContext(connections[alias]) as captured:
+            response = getattr(self.client, method)(url, **kwargs)
+        return response, len(captured)
+
+    @override_settings(DATABASE_REPLICA_LAG=0)
+    def test_browse_reads_hit_the_replica_and_writes_the_primary(self):
+        response, on_replica = self.queries_on(self.replica, "get", "/api/reviews/")
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(on_replica, 0)
+
+        response, on_replica = self.queries_on(self.replica, "get", "/api/bookings/")
+        self.assertEqual(on_replica, 0)
+
+        response, on_replica = self.queries_on(self.replica, "post", "/api/gigs/", data={
+            "title": "Proofreading", "description": "Typos", "price": "3.00", "delivery_time": 1,
+        }, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(on_replica, 0)
+
+        # the new gig is visible on the next browse read
+        response, _ = self.queries_on(self.replica, "get", "/api/gigs/")
+        self.assertEqual(len(response.data["results"]), 2)
+
+
+class AsyncReadPathTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("xena")
+        self.gigs = [
+            Gig.objects.create(
+                freelancer=self.user.profile, title=f"Async gig {i}", description="async",
+                price=Decimal(f"{10 + i}.00"), delivery_time=i + 1,
+            )
+            for i in range(3)
+        ]
+        for gig in self.gigs:
+            Booking.objects.create(gig=gig, client=self.user.profile)
+        self.client.force_authenticate(self.user)
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    async def get_async(self, url, **params):
+        return await self.async_client.get(url, params, headers=self.headers)
+
+    def sync_json(self, url, **params):
+        return self.client.get(url, params).json()
+
+    async def test_payloads_match_the_viewsets(self):
+        pairs = [
+            ("/api/gigs/", "/api/async/gigs/", {"page_size": 2, "ordering": "newest"}),
+            ("/api/gigs/", "/api/async/gigs/", {"max_price": "11"}),
+            ("/api/bookings/", "/api/async/bookings/", {"status": "PENDING"}),
+        ]
+        for sync_url, async_url, params in pairs:
+            expected = await sync_to_async(self.sync_json)(sync_url, **params)
+            response = await self.get_async(async_url, **params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["results"], expected["results"])
+            self.assertEqual(response.json()["next"] is None, expected["next"] is None)
+
+        gig_id, profile_id = self.gigs[0].id, self.user.profile.id
+        for sync_url, async_url in [
+            (f"/api/gigs/{gig_id}/", f"/api/async/gigs/{gig_id}/"),
+            (f"/api/profiles/{profile_id}/", f"/api/async/profiles/{profile_id}/"),
+        ]:
+            expected = await sync_to_async(lambda: self.client.get(sync_url).content)()
+            response = await self.get_async(async_url)
+            self.assertEqual(response.content, expected)
+
+    async def test_cursor_walks_every_page(self):
+        seen, url, params = [], "/api/async/gigs/", {"page_size": 1}
+        while url:
+            response = await self.get_async(url, **params)
+            seen.extend(g["id"] for g in response.json()["results"])
+            url, params = response.json()["next"], {}
+        self.assertEqual(seen, [g.id for g in reversed(self.gigs)])
+
+    async def test_auth_and_errors(self):
+        self.assertEqual((await self.async_client.get("/api/async/gigs/")).status_code, 401)
+        bad = await self.async_client.get("/api/async/bookings/", headers={"Authorization": "Bearer nope"})
+        self.assertEqual(bad.status_code, 401)
+        self.assertEqual((await self.get_async("/api/async/gigs/999999/")).status_code, 404)
+        self.assertEqual((await self.get_async("/api/async/gigs/", max_price="cheap")).status_code, 400)
+        self.assertEqual((await self.get_async("/api/async/bookings/", status="LOST")).status_code, 400)
+        # profiles are public
+        anonymous = await self.async_client.get(f"/api/async/profiles/{self.user.profile.id}/")
+        self.assertEqual(anonymous.status_code, 200)
+
+
+class SyntheticMarketplaceTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        directory = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, directory, ignore_errors=True)
+        cls.similar_settings = override_settings(SIMILAR_GIGS_DIR=directory)
+        cls.similar_settings.enable()
+        cls.addClassCleanup(cls.similar_settings.disable)
+        cls.counts = MarketplaceGenerator(users=20, gigs_per_freelancer=2, bookings=120,
+                                          chunk_size=50, seed=7).run()
+
+    def test_generated_data_is_consistent(self):
+        self.assertEqual(self.counts["user"], 20)
+        self.assertEqual(self.counts["booking"], Booking.objects.count())
+        self.assertEqual(Profile.objects.count(), 20)
+        self.assertTrue(Gig.objects.exists())
+        # every booking has a time after its gig was listed
+        self.assertFalse(Booking.objects.filter(booked_at__lt=models.F("gig__created_at")).exists())
+        self.assertEqual(
+            Transaction.objects.filter(status="PAID").count(),
+            Booking.objects.filter(status__in=["PAID", "COMPLETED"]).count(),
+        )
+        # the derived tables the skipped signals maintain are already right
+        self.assertEqual(rebuild_booking_stats(dry_run=True), {"created": 0, "updated": 0, "deleted": 0})
+        self.assertEqual(rebuild_ratings(dry_run=True), {"gigs": 0, "profiles": 0})
+        self.assertEqual(trending.rebuild_trending(dry_run=True), 0)
+        self.assertTrue(Gig.objects.filter(trending_score__gt=0).exists())
+
+        with self.assertRaises(CommandError):
+            call_command("seed_marketplace", users=2, bookings=1, stdout=StringIO())
+
+    def test_benchmark_writes_a_baseline_and_leaves_the_data_alone(self):
+        before = Booking.objects.count(), Transaction.objects.count(), WebhookEvent.objects.count()
+        only = ["gig_list", "gig_similar", "booking_create", "create_order", "export_transactions",
+                "webhook", "async_booking_list"]
+        result = benchmarks.run(iterations=3, only=only)
+
+        self.assertEqual(list(result["endpoints"]), only)
+        for stats in result["endpoints"].values():
+            self.assertEqual(stats["errors"], 0)
+            self.assertLessEqual(stats["p50_ms"], stats["p99_ms"])
+        self.assertEqual(result["endpoints"]["gig_list"]["queries"], 2)
+        # the streamed body is read inside the measurement
+        self.assertGreaterEqual(result["endpoints"]["export_transactions"]["queries"], 1)
+        self.assertEqual(result["meta"]["rows"]["Booking"], before[0])
+        self.assertEqual(
+            (Booking.objects.count(), Transaction.objects.count(), WebhookEvent.objects.count()), before
+        )
+
+        slower = json.loads(json.dumps(result))
+        slower["endpoints"]["gig_list"]["p50_ms"] *= 2
+        slower["endpoints"]["webhook"]["queries"] += 1
+        _, regressions = benchmarks.compare(result, slower)
+        self.assertEqual(regressions, ["gig_list", "webhook"])
+        self.assertEqual(benchmarks.compare(slower, result)[1], [])
+
+
+@override_settings(API_CACHE_TIMEOUT=0, RAZORPAY_GATEWAY="core.payments.FakeGateway",
+                   RAZORPAY_FAKE_LATENCY=0, METRICS_TOKEN="", METRICS_SLOW_REQUEST_MS=0)
+class RequestMetricsTests(APITestCase):
+    def setUp(self):
+        metrics.reset_metrics()
+        self.user = User.objects.create_user("nina")
+        gig = Gig.objects.create(freelancer=self.user.profile, title="Voice over",
+                                 description="", price=Decimal("15.00"), delivery_time=2)
+        self.booking = Booking.objects.create(gig=gig, client=self.user.profile)
+        self.client.force_authenticate(self.user)
+
+    def timings(self, response):
+        return dict(part.split(";", 1) for part in response["Server-Timing"].split(", "))
+
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/gigs/")
+        timings = self.timings(response)
+        self.assertIn(f'desc="{len(queries)} queries"', timings["db"])
+        self.assertIn("serialize", timings)
+        self.assertIn("total", timings)
+        self.assertNotIn("razorpay", timings)
+
+        response = self.client.post("/api/create-order/", {"booking": self.booking.id})
+        self.assertIn("razorpay", self.timings(response))
+
+    def test_prometheus_endpoint(self):
+        self.client.get("/api/gigs/")
+        self.client.get("/api/gigs/")
+        self.client.get(f"/api/gigs/{self.booking.gig_id}/")
+        with override_settings(DEBUG=True):
+            body = self.client.get("/metrics").content.decode()
+        self.assertIn('http_requests_total{route="gig-list",method="GET",status="200"} 2', body)
+        self.assertIn('http_request_duration_seconds_count{route="gig-detail",method="GET"} 1', body)
+        self.assertIn('http_request_db_queries_bucket{route="gig-list",method="GET",le="+Inf"} 2', body)
+
+        with override_settings(METRICS_TOKEN="scrape-me"):
+            self.assertEqual(self.client.get("/metrics").status_code, 401)
+            allowed = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-me")
+            self.assertEqual(allowed.status_code, 200)
+        # no token configured: closed outside DEBUG
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+    def test_streamed_body_is_measured_when_it_ends(self):
+        self.user.is_staff = True
+        self.user.save()
+        Transaction.objects.create(booking=self.booking, amount=Decimal("15.00"), status="CREATED")
+        response = self.client.get("/api/exports/transactions.csv")
+        self.assertTrue(response.streaming)
+        self.assertIn("body", self.timings(response))
+        with override_settings(DEBUG=True):
+            self.assertNotIn('route="export"', self.client.get("/metrics").content.decode())
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIn(b"15.00", b"".join(response.streaming_content))
+        streamed = len(queries)
+        self.assertGreaterEqual(streamed, 1)
+        with override_settings(DEBUG=True):
+            body = self.client.get("/metrics").content.decode()
+        self.assertIn('http_requests_total{route="export",method="GET",status="200"} 1', body)
+        counted = re.search(r'http_request_db_queries_sum\{route="export",method="GET"\} (\d+)', body)
+        self.assertGreaterEqual(int(counted.group(1)), streamed)
+
+    def test_slow_request_log_lists_repeated_sql(self):
+        with override_settings(METRICS_SLOW_REQUEST_MS=1), \
+                mock.patch.object(metrics, "perf_counter", side_effect=range(0, 10**6, 5)), \
+                self.assertLogs("core.metrics", "WARNING") as logs:
+            self.client.get("/api/bookings/")
+        self.assertIn("GET /api/bookings/ (booking-list) -> 200", logs.output[0])
+
+        request = metrics.RequestMetrics(collect_sql=True)
+        for sql in ["SELECT 1", "SELECT 2", "SELECT 1"]:
+            request.record_query(lambda *args: None, sql, (), False, {})
+        self.assertEqual(request.queries, 3)
+        self.assertEqual(request.duplicates(), ["2x SELECT 1"])
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class ProjectionConformanceTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("olga")
+        freelancer = User.objects.create_user("pavel").profile
+        freelancer.bio = "Ünïcode \"quoted\" bio"
+        freelancer.skills = ["Django", "SQL"]
+        freelancer.portfolio_url = "https://example.com/p"
+        freelancer.contact_email = "p@example.com"
+        freelancer.save()
+        asset = ImageAsset.objects.create(
+            sha256="ab" * 32, original="gig_images/a.jpg", width=800, height=600,
+            variants=[{"name": "gig_images/variants/ab/a_320.webp", "width": 320,
+                       "height": 240, "format": "webp", "bytes": 1000}],
+        )
+        cls.gigs = [
+            Gig.objects.create(freelancer=freelancer, title="Plain", description="",
+                               price=Decimal("10"), delivery_time=1),
+            Gig.objects.create(freelancer=freelancer, title="Imaged", description="x" * 300,
+                               price=Decimal("1234.5"), delivery_time=7,
+                               image="gig_images/a.jpg", image_asset=asset,
+                               rating_avg=4.333333, rating_count=3,
+                               last_reviewed_at=timezone.now()),
+            Gig.objects.create(freelancer=cls.user.profile, title="Unprocessed", description="y",
+                               price=Decimal("0.99"), delivery_time=2, image="gig_images/b.png"),
+        ]
+        for gig in cls.gigs:
+            Booking.objects.create(gig=gig, client=cls.user.profile)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def assertSameBytes(self, projection, serializer_class, queryset):
+        request = self.client.get("/api/gigs/").wsgi_request
+        expected = serializer_class(queryset, many=True, context={"request": request}).data
+        actual = projection.dump(projection.project(queryset), request)
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_rows_match_the_serializers(self):
+        gigs = Gig.objects.select_related("freelancer__user", "image_asset").order_by("id")
+        self.assertSameBytes(GIG_PROJECTION, GigSerializer, gigs)
+        bookings = Booking.objects.select_related("gig__freelancer__user", "gig__image_asset").order_by("id")
+        self.assertSameBytes(BOOKING_PROJECTION, BookingSerializer, bookings)
+
+    def test_list_endpoints_match_the_serializer_path(self):
+        for view, url in [
+            (GigViewSet, "/api/gigs/?page_size=2"),
+            (GigViewSet, "/api/gigs/?ordering=rating&page_size=1"),
+            (BookingViewSet, "/api/bookings/?page_size=2"),
+        ]:
+            fast = self.client.get(url)
+            with mock.patch.object(view, "list_projection", None):
+                slow = self.client.get(url)
+            self.assertEqual(fast.status_code, 200)
+            self.assertEqual(fast.content, slow.content)
+            # and the cursor leads to the same next page
+            self.assertEqual(self.client.get(fast.data["next"]).content,
+                             self.client.get(slow.data["next"]).content)
+
+
+@override_settings(API_CACHE_TIMEOUT=0)
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("quinn")
+        self.freelancer = User.objects.create_user("rhea").profile
+        self.gig = Gig.objects.create(freelancer=self.freelancer, title="Logo", description="d" * 500,
+                                      price=Decimal("49.00"), delivery_time=3)
+        for _ in range(3):
+            Booking.objects.create(gig=self.gig, client=self.user.profile)
+        self.client.force_authenticate(self.user)
+
+    def test_parse_shape(self):
+        self.assertIsNone(parse_shape({}))
+        self.assertEqual(
+            parse_shape({"fields": "id, status,gig_detail.title", "expand": "gig_detail.freelancer"}),
+            Shape({"id", "status", "gig_detail"},
+                  {"gig_detail": Shape({"title"}, {"freelancer": Shape()})}),
+        )
+        self.assertEqual(parse_shape({"expand": "freelancer"}), Shape(None, {"freelancer": Shape()}))
+
+    def test_mobile_booking_list(self):
+        url = "/api/bookings/?fields=id,status,booked_at,gig_detail.title,gig_detail.price"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data["results"][0]), {"id", "status", "booked_at", "gig_detail"})
+        self.assertEqual(response.data["results"][0]["gig_detail"], {"title": "Logo", "price": "49.00"})
+        # the projection and the serializer agree on every shape
+        with mock.patch.object(BookingViewSet, "list_projection", None):
+            self.assertEqual(self.client.get(url).content, response.content)
+        full = self.client.get("/api/bookings/")
+        self.assertLess(len(response.content) * 5, len(full.content))
+
+    def test_relations_collapse_to_ids_unless_expanded(self):
+        self.assertEqual(self.client.get(f"/api/gigs/{self.gig.id}/?fields=id,freelancer").data,
+                         {"id": self.gig.id, "freelancer": self.freelancer.id})
+        data = self.client.get(f"/api/gigs/{self.gig.id}/?fields=id&expand=freelancer").data
+        self.assertEqual(data["freelancer"]["user"], "rhea")
+        self.assertEqual(self.client.get("/api/bookings/?fields=id,gig_detail").data["results"][0]["gig_detail"],
+                         self.gig.id)
+
+    def test_retrieve_loads_only_the_requested_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/gigs/{self.gig.id}/?fields=id,title,freelancer.user")
+        self.assertEqual(response.data, {"id": self.gig.id, "title": "Logo", "freelancer": {"user": "rhea"}})
+        sql = next(q["sql"] for q in queries if "core_gig" in q["sql"] and "title" in q["sql"])
+        self.assertNotIn("description", sql)
+        self.assertNotIn("core_imageasset", sql)
+
+    def test_unknown_names_are_rejected(self):
+        response = self.client.get("/api/gigs/?fields=id,secret")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("secret", response.data["fields"])
+        self.assertEqual(self.client.get("/api/bookings/?expand=status").status_code, 400)
+        token = AccessToken.for_user(self.user)
+        response = self.client.get("/api/async/gigs/?fields=nope", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(response.status_code, 400)
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("sana", password="pw-123456")
+        cache.clear()   # creating the user left an eviction marker
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def test_warm_requests_skip_the_user_and_profile_queries(self):
+        self.assertEqual(self.client.get("/api/profiles/me/").status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/profiles/me/")
+        self.assertEqual(response.data["user"], "sana")
+        self.assertEqual(len(queries), 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post("/api/gigs/", {"title": "Logo", "description": "x", "price": "10.00",
+                                            "delivery_time": 2})
+        self.assertFalse([q for q in queries if 'FROM "auth_user"' in q["sql"]
+                          or 'FROM "core_profile"' in q["sql"]])
+        self.assertEqual(Gig.objects.get().freelancer, self.user.profile)
+
+    def test_saves_and_deactivation_are_seen_at_once(self):
+        self.client.get("/api/profiles/me/")
+        self.client.patch("/api/profiles/me/", {"bio": "Illustrator"}, format="json")
+        self.assertEqual(self.client.get("/api/profiles/me/").data["bio"], "Illustrator")
+
+        cache.clear()
+        self.client.get("/api/profiles/me/")
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/profiles/me/").status_code, 401)
+
+    def test_cached_user_never_holds_the_password(self):
+        self.client.get("/api/profiles/me/")
+        entry = cache.get(f"auth:user:{self.user.pk}")
+        self.assertNotIn(self.user.password, entry["user"])
+
+
+@skipUnless(similar.np is not None, "NumPy is not installed")
+@override_settings(API_CACHE_TIMEOUT=0)
+class SimilarGigsTests(APITestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        override = override_settings(SIMILAR_GIGS_DIR=self.directory, SIMILAR_GIGS_K=3)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user("tara")
+        profile = self.user.profile
+        profile.skills = ["Django"]
+        profile.save()
+        gig = lambda title, description: Gig.objects.create(
+            freelancer=profile, title=title, description=description, price=Decimal("10"), delivery_time=1)
+        self.api = gig("Django REST API", "I build a Django REST API with Postgres")
+        self.api2 = gig("REST API in Django", "Postgres backed REST API, tested")
+        self.logo = gig("Minimal logo design", "A clean vector logo for your brand")
+        self.logo2 = gig("Logo design for startups", "Vector logo and brand colours")
+        self.client.force_authenticate(self.user)
+
+    def similar_ids(self, gig):
+        response = self.client.get(f"/api/gigs/{gig.id}/similar/")
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.data["results"]]
+
+    def test_similar_gigs_come_from_the_index(self):
+        self.assertEqual(self.client.get(f"/api/gigs/{self.api.id}/similar/").status_code, 503)
+        similar.build_full()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/gigs/{self.api.id}/similar/?fields=id,title&limit=1")
+        self.assertEqual(response.data["results"], [
+            {"id": self.api2.id, "title": "REST API in Django",
+             "similarity": response.data["results"][0]["similarity"]},
+        ])
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(self.similar_ids(self.logo)[0], self.logo2.id)
+        self.assertEqual(self.client.get("/api/gigs/999999/similar/").status_code, 404)
+
+    def test_incremental_build_follows_changes(self):
+        similar.build_full()
+        self.assertIsNone(similar.build_incremental())
+
+        self.logo2.delete()
+        newer = Gig.objects.create(freelancer=self.user.profile, title="Brand logo design",
+                                   description="Vector logo for your brand", price=Decimal("5"), delivery_time=2)
+        with mock.patch.object(similar, "FULL_REBUILD_SHARE", 1):
+            meta = similar.build_incremental()
+        self.assertEqual(meta["changed"], 2)
+        self.assertEqual(self.similar_ids(self.logo)[0], newer.id)
+        self.assertEqual(self.similar_ids(newer)[0], self.logo.id)
+        self.assertNotIn(self.logo2.id, self.similar_ids(self.api))
+        # and agrees with a rebuild from scratch
+        incremental = {gig.id: self.similar_ids(gig) for gig in Gig.objects.all()}
+        similar.build_full()
+        self.assertEqual({gig.id: self.similar_ids(gig) for gig in Gig.objects.all()}, incremental)
+
+
+class TrendingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("uma")
+        gig = lambda title: Gig.objects.create(
+            freelancer=self.user.profile, title=title, description="", price=Decimal("10"), delivery_time=1)
+        self.steady, self.fresh, self.quiet = gig("Steady"), gig("Fresh"), gig("Quiet")
+        self.client.force_authenticate(self.user)
+
+    def score(self, gig):
+        gig.refresh_from_db()
+        return gig.trending_score
+
+    def trending_titles(self):
+        response = self.client.get("/api/gigs/", {"ordering": "trending"})
+        return [g["title"] for g in response.data["results"]]
+
+    def test_bookings_and_payments_raise_the_score(self):
+        booking = Booking.objects.create(gig=self.steady, client=self.user.profile)
+        booked = self.score(self.steady)
+        self.assertAlmostEqual(trending.current_trend(booked), 1.0, places=3)
+        self.assertEqual(self.score(self.quiet), 0)
+
+        txn = Transaction.objects.create(booking=booking, amount=Decimal("10"), status="CREATED")
+        self.assertEqual(self.score(self.steady), booked)
+        txn.status = "PAID"
+        txn.save()
+        txn.save()    # counted once
+        self.assertAlmostEqual(trending.current_trend(self.score(self.steady)), 4.0, places=3)
+
+    def test_recent_activity_outranks_older_activity(self):
+        now = timezone.now()
+        ten_days_ago = now - timedelta(days=10)    # weight ~0.1 at a 72h half-life
+        trending.bump_many([(self.steady.id, 1.0, ten_days_ago)] * 3 + [(self.fresh.id, 1.0, now)])
+        self.assertAlmostEqual(
+            trending.current_trend(self.score(self.steady), now), 3 * 0.5 ** (240 / 72), places=6
+        )
+        self.assertEqual(self.trending_titles(), ["Fresh", "Steady", "Quiet"])
+        self.assertEqual(self.client.get("/api/gigs/", {"ordering": "hot"}).status_code, 400)
+
+    def test_bump_across_a_wide_gap_stays_in_range(self):
+        # e.g. at a 6h half-life an event today is ~1500 above the "no
+        # events" 0, and exp(-1500) underflows (an error on Postgres)
+        term = trending.event_score(1.0, timezone.now()) + 2000
+        with CaptureQueriesContext(connection) as queries:
+            trending.bump(self.quiet.id, term)
+        self.assertEqual(self.score(self.quiet), term)
+        # SQLite's exp() quietly returns 0, so check the exponent is clamped
+        self.assertIn(str(trending.MIN_EXPONENT), queries[0]["sql"])
+
+        trending.bump(self.quiet.id, term - 1000)
+        self.assertEqual(self.score(self.quiet), term)
+        trending.bump(self.quiet.id, term + 1000)
+        self.assertEqual(self.score(self.quiet), term + 1000)
+
+    def test_webhook_capture_counts_as_a_payment(self):
+        booking = Booking.objects.create(gig=self.quiet, client=self.user.profile)
+        txn = Transaction.objects.create(booking=booking, amount=Decimal("10"), status="CREATED")
+        WebhookEvent.objects.create(event_id="evt_t", event="payment.captured", payload={
+            "event": "payment.captured",
+            "payload": {"payment": {"entity": {
+                "id": "pay_t", "status": "captured", "notes": {"transaction_id": str(txn.id)},
+            }}},
+        })
+        self.assertEqual(process_batch(), (1, 0, 0))
+        self.assertAlmostEqual(trending.current_trend(self.score(self.quiet)), 4.0, places=3)
+
+    def test_rebuild_drops_cancelled_and_expired_activity(self):
+        Booking.objects.create(gig=self.steady, client=self.user.profile)
+        cancelled = Booking.objects.create(gig=self.fresh, client=self.user.profile)
+        expired = Booking.objects.create(gig=self.quiet, client=self.user.profile)
+        Booking.objects.filter(pk=cancelled.pk).update(status="CANCELLED")
+        Booking.objects.filter(pk=expired.pk).update(booked_at=timezone.now() - timedelta(days=60))
+        live = self.score(self.steady)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_trending", "--verify", stdout=StringIO())
+        call_command("rebuild_trending", stdout=StringIO())
+        call_command("rebuild_trending", "--verify", stdout=StringIO())
+        self.assertAlmostEqual(self.score(self.steady), live)
+        self.assertEqual((self.score(self.fresh), self.score(self.quiet)), (0, 0))
+
+
+class AdminChangelistTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser("ops", password="pw")
+        self.client.force_login(self.admin)
+        self.freelancer = User.objects.create_user("vic").profile
+        self.gig = Gig.objects.create(freelancer=self.freelancer, title="Audit", description="",
+                                      price=Decimal("10"), delivery_time=1)
+
+    def seed(self, n):
+        for i in range(n):
+            client = User.objects.create_user(f"client{Booking.objects.count()}").profile
+            booking = Booking.objects.create(gig=self.gig, client=client, status="PAID")
+            Transaction.objects.create(booking=booking, amount=Decimal("10"), status="PAID")
+            Review.objects.create(booking=booking, user=client.user, rating=1 + i % 5)
+            Dispute.objects.create(booking=booking, description="late")
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelists_run_a_fixed_number_of_queries(self):
+        urls = [
+            "/admin/core/booking/?status__exact=PAID", "/admin/core/transaction/?status=PAID",
+            "/admin/core/review/?rating=1", "/admin/core/dispute/?resolution_status__exact=OPEN",
+        ]
+        self.seed(2)
+        few = [self.changelist_queries(url) for url in urls]
+        self.seed(10)
+        self.assertEqual([self.changelist_queries(url) for url in urls], few)
+        year = timezone.localdate().year
+        self.changelist_queries(f"/admin/core/booking/?booked_at__year={year}")
+
+    def test_bulk_actions_update_in_one_statement(self):
+        self.seed(3)
+        bookings = list(Booking.objects.values_list("pk", flat=True))
+        pending = Booking.objects.get(pk=bookings[0])
+        pending.status = "PENDING"
+        pending.save()
+        self.client.post("/admin/core/booking/", {
+            "action": "mark_completed", "_selected_action": bookings,
+        })
+        self.assertEqual(
+            list(Booking.objects.order_by("pk").values_list("status", flat=True)),
+            ["PENDING", "COMPLETED", "COMPLETED"],
+        )
+        call_command("rebuild_booking_stats", "--verify", stdout=StringIO())
+
+        disputes = list(Dispute.objects.values_list("pk", flat=True))
+        self.client.post("/admin/core/dispute/", {"action": "resolve", "_selected_action": disputes[:2]})
+        self.assertEqual(Dispute.objects.filter(resolution_status="RESOLVED", resolved_at__isnull=False).count(), 2)
+
+    def test_large_counts_are_estimated(self):
+        self.seed(2)
+        paginator = core_admin.EstimatedCountPaginator(Booking.objects.order_by("-pk"), 50)
+        with mock.patch.object(core_admin, "_plan_rows", return_value=2_000_000):
+            self.assertEqual(paginator.count, 2_000_000)
+        paginator = core_admin.EstimatedCountPaginator(Booking.objects.order_by("-pk"), 50)
+        with mock.patch.object(core_admin, "_plan_rows", return_value=40):
+            self.assertEqual(paginator.count, 2)
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user("fin", is_staff=True)
+        freelancer = User.objects.create_user("wes").profile
+        client = User.objects.create_user("xia").profile
+        self.gig = Gig.objects.create(freelancer=freelancer, title="Ledger, cleanup", description="",
+                                      price=Decimal("99.50"), delivery_time=1)
+        self.bookings = [Booking.objects.create(gig=self.gig, client=client) for _ in range(5)]
+        for booking in self.bookings[:3]:
+            Transaction.objects.create(booking=booking, amount=Decimal("99.50"), status="PAID")
+        Booking.objects.filter(pk=self.bookings[0].pk).update(booked_at=datetime(2025, 1, 1, tzinfo=dt_timezone.utc))
+        self.client.force_authenticate(self.staff)
+
+    def download(self, url, params=None):
+        response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def test_csv_export_is_joined_and_filtered(self):
+        rows = list(csv.DictReader(self.download("/api/exports/transactions.csv").decode().splitlines()))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            (rows[0]["gig_title"], rows[0]["freelancer"], rows[0]["client"], rows[0]["amount"]),
+            ("Ledger, cleanup", "wes", "xia", "99.50"),
+        )
+        rows = list(csv.DictReader(self.download(
+            "/api/exports/bookings.csv", {"since": "2026-01-01", "status": "PENDING"}
+        ).decode().splitlines()))
+        self.assertEqual([int(r["id"]) for r in rows], [b.pk for b in self.bookings[1:]])
+        self.assertEqual([r["transaction_status"] for r in rows], ["PAID", "PAID", "", ""])
+
+        self.assertEqual(self.client.get("/api/exports/bookings.csv", {"status": "LOST"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/exports/transactions.csv", {"status": "paid"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/exports/transactions.csv", {"status": "PAID"}).status_code, 200)
+        self.assertEqual(self.client.get("/api/exports/bookings.csv", {"until": "soon"}).status_code, 400)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_ndjson_and_gzip_stream_in_chunks(self):
+        response = self.client.get("/api/exports/bookings.ndjson")
+        pieces = list(response.streaming_content)
+        self.assertEqual(len(pieces), 3)
+        lines = [json.loads(line) for line in b"".join(pieces).splitlines()]
+        self.assertEqual([line["id"] for line in lines], [b.pk for b in self.bookings])
+        self.assertEqual(lines[0]["booked_at"], "2025-01-01T00:00:00Z")
+        self.assertEqual(lines[0]["amount_paid"], "99.50")
+
+        compressed = self.download("/api/exports/bookings.ndjson.gz")
+        self.assertEqual(gzip.decompress(compressed), b"".join(pieces))
+
+    def test_staff_only(self):
+        self.client.force_authenticate(User.objects.create_user("yan"))
+        self.assertEqual(self.client.get("/api/exports/transactions.csv").status_code, 403)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get("/api/exports/transactions.csv").status_code, 401)
+
+    def test_command_writes_the_same_export(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, "bookings.csv.gz")
+        call_command("export_data", "bookings", "--gzip", "--output", path, stderr=StringIO())
+        with open(path, "rb") as f:
+            self.assertEqual(gzip.decompress(f.read()), self.download("/api/exports/bookings.csv"))
+
+        out = StringIO()
+        call_command("export_data", "transactions", "--format", "ndjson", "--status", "FAILED", stdout=out)
+        self.assertEqual(out.getvalue(), "")
+        with self.assertRaises(CommandError):
+            call_command("export_data", "bookings", "--since", "yesterday", stdout=StringIO())
+
+
+class FastJSONTests(APITestCase):
+    def sample(self):
+        utc = datetime(2026, 3, 1, 9, 30, 0, 250000, tzinfo=dt_timezone.utc)
+        return {
+            "gigs": GigSerializer([Gig(id=1, title="Logo \u2028 ✓", description="", price=Decimal("12.3"),
+                                       delivery_time=2, created_at=utc,
+                                       freelancer=Profile(id=2, user=User(username="q")))],
+                                  many=True).data,
+            "when": [utc, utc.astimezone(dt_timezone(timedelta(hours=5, minutes=30))), utc.date()],
+            "errors": {0: ["bad"], 3: [gettext_lazy("This field is required.")]},
+            "huge": 2 ** 70,
+        }
+
+    def test_renders_the_same_bytes_as_drf_with_and_without_orjson(self):
+        data = self.sample()
+        expected = JSONRenderer().render(data)
+        self.assertIn(b"\\u2028", expected)
+        self.assertEqual(renderers.FastJSONRenderer().render(data), expected)
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(renderers.FastJSONRenderer().render(data), expected)
+        # indented output (browsable API, ?indent) goes through the stdlib
+        self.assertEqual(renderers.FastJSONRenderer().render(data, "application/json; indent=2"),
+                         JSONRenderer().render(data, "application/json; indent=2"))
+
+        result = benchmarks.json_benchmark(rows=30, rounds=1)
+        self.assertTrue(result["fast_identical"] and result["stream_identical"] and result["fallback_identical"])
+
+    def test_raw_decimals_keep_their_digits(self):
+        for orjson in (renderers.orjson, None):
+            with mock.patch.object(renderers, "orjson", orjson):
+                self.assertEqual(renderers.FastJSONRenderer().render({"amount": Decimal("1200.50")}),
+                                 b'{"amount":"1200.50"}')
+
+    def test_parser(self):
+        parser = renderers.FastJSONParser()
+        parse = lambda raw: parser.parse(BytesIO(raw), parser_context={})
+        self.assertEqual(parse('{"a": [1, "ü"], "b": 123456789012345678901234}'.encode()),
+                         {"a": [1, "ü"], "b": 123456789012345678901234})
+        for bad in (b"{", b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                parse(bad)
+
+    @override_settings(API_CACHE_TIMEOUT=0)
+    def test_large_list_pages_are_streamed(self):
+        user = User.objects.create_user("rosa")
+        Gig.objects.bulk_create([
+            Gig(freelancer=user.profile, title=f"Gig {n}", description="", price=Decimal("9.99"),
+                delivery_time=1)
+            for n in range(60)
+        ])
+        self.client.force_authenticate(user)
+
+        streamed = self.client.get("/api/gigs/?page_size=60")
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(streamed["Content-Type"], "application/json")
+        body = b"".join(streamed.streaming_content)
+        with mock.patch.object(GigViewSet, "stream_min_items", 1000):
+            whole = self.client.get("/api/gigs/?page_size=60")
+        self.assertFalse(whole.streaming)
+        self.assertEqual(body, whole.content)
+        self.assertEqual(len(json.loads(body)["results"]), 60)
+        self.assertFalse(self.client.get("/api/gigs/?page_size=10").streaming)
@@ -0,0 +1,189 @@
+# core/trending.py
+#
+# Time-decayed "trending" score on Gig, behind /api/gigs/?ordering=trending.
+#
+# A gig's trend is the sum of its booking and payment events, each weighted
+# by exp(-age / tau), so an event loses half its weight every
+# TRENDING_HALF_LIFE_HOURS. Decaying every gig's stored sum as time passes
+# would mean rewriting the whole table; instead each event is stored at its
+# weight relative to a fixed EPOCH, where it never changes:
+#
+#     score = ln( sum of weight * exp((event time - EPOCH) / tau) )
+#
+# Every score is the true trend times the same factor exp((now - EPOCH) /
+# tau), so ranking by the stored column is ranking by trend, and the
+# (trending_score, id) index serves a top-N query directly. Kept as a
+# logarithm the value grows by only ln 2 per half-life, where the sum itself
+# would overflow a float within months. An event is then one UPDATE that
+# folds its term in with log-add-exp on the column, and needs no read:
+#
+#     score = max(score, x) + ln(1 + exp(-|score - x|))
+#
+# with the exponent clamped so it can't underflow, and a score of 0 (no
+# events yet) replaced by x outright.
+#
+# Bookings count when created and transactions when they become PAID; the
+# bulk paths, which send no signals (BulkWriteMixin, webhooks.process_batch),
+# report through record_bookings() / record_payments(). Nothing is taken
+# back when a booking is cancelled or deleted, so `manage.py
+# rebuild_trending` recomputes the scores from the last TRENDING_WINDOW_DAYS
+# of history, without cancelled bookings, and zeroes gigs whose events have
+# all aged out; run it periodically. Changing the half-life also needs a
+# rebuild.
+#
+# The scores aren't part of any representation and don't touch updated_at,
+# so they don't invalidate cached gig reads; a cached trending list page is
+# at most API_CACHE_TIMEOUT seconds behind.
+
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Booking, Gig, Transaction
+
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+BOOKING_WEIGHT = 1.0
+PAYMENT_WEIGHT = 3.0
+PAID = "PAID"
+
+
+def _tau():
+    return settings.TRENDING_HALF_LIFE_HOURS * 3600 / math.log(2)
+
+
+def event_score(weight, at):
+    """The log-domain term of one event of `weight` at time `at`."""
+    return math.log(weight) + (at - EPOCH).total_seconds() / _tau()
+
+
+def log_add(a, b):
+    """ln(e^a + e^b) without overflow."""
+    return max(a, b) + math.log1p(math.exp(-abs(a - b)))
+
+
+def current_trend(score, now=None):
+    """A stored score as the trend at `now`: the decayed event weights summed."""
+    if not score:
+        return 0.0
+    return math.exp(score - event_score(1.0, now or timezone.now()))
+
+
+# exp() of anything lower underflows, which Postgres raises as an error;
+# ln(1 + exp(-700)) is 0 to double precision anyway
+MIN_EXPONENT = -700.0
+
+
+def bump(gig_id, term):
+    """Fold one log-domain term into a gig's score, in a single UPDATE."""
+    score = F("trending_score")
+    gap = Greatest(-Abs(score - Value(term)), Value(MIN_EXPONENT))
+    Gig.objects.filter(pk=gig_id).update(
+        trending_score=Case(
+            # 0 is "no events yet", not a score to add to
+            When(trending_score=0, then=Value(term)),
+            default=Greatest(score, Value(term)) + Ln(Value(1.0) + Exp(gap)),
+        )
+    )
+
+
+def bump_many(events):
+    """Apply (gig_id, weight, at) events, combined to one UPDATE per gig."""
+    terms = {}
+    for gig_id, weight, at in events:
+        term = event_score(weight, at)
+        terms[gig_id] = log_add(terms[gig_id], term) if gig_id in terms else term
+    for gig_id, term in terms.items():
+        bump(gig_id, term)
+
+
+def record_bookings(bookings):
+    """Apply bulk-created bookings."""
+    bump_many((b.gig_id, BOOKING_WEIGHT, b.booked_at) for b in bookings)
+
+
+def record_payments(gig_ids, at=None):
+    """Apply payments captured outside Transaction.save(), one gig id each."""
+    at = at or timezone.now()
+    bump_many((gig_id, PAYMENT_WEIGHT, at) for gig_id in gig_ids)
+
+
+# ── signal receivers
+
+@receiver(post_save, sender=Booking)
+def trend_on_booking(sender, instance, created, **kwargs):
+    if created:
+        bump(instance.gig_id, event_score(BOOKING_WEIGHT, instance.booked_at))
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_paid(sender, instance, update_fields=None, **kwargs):
+    instance._trending_was_paid = False
+    if instance.pk and not (update_fields and "status" not in update_fields):
+        instance._trending_was_paid = (
+            Transaction.objects.filter(pk=instance.pk, status=PAID).exists()
+        )
+
+
+@receiver(post_save, sender=Transaction)
+def trend_on_payment(sender, instance, **kwargs):
+    if instance.status != PAID or getattr(instance, "_trending_was_paid", True):
+        return
+    gig_id = Booking.objects.filter(pk=instance.booking_id).values_list("gig_id", flat=True).first()
+    if gig_id is not None:
+        bump(gig_id, event_score(PAYMENT_WEIGHT, timezone.now()))
+
+
+# ── periodic rebuild
+
+def _history(since):
+    """(gig_id, weight, at) for every event since `since`, in id order."""
+    bookings = (
+        Booking.objects.filter(booked_at__gte=since)
+        .exclude(status="CANCELLED")
+        .order_by("pk")
+        .values_list("gig_id", "booked_at")
+    )
+    for gig_id, booked_at in bookings.iterator(chunk_size=2000):
+        yield gig_id, BOOKING_WEIGHT, booked_at
+    # Transaction keeps no capture time; the order's creation stands in for it
+    payments = (
+        Transaction.objects.filter(status=PAID, created_at__gte=since)
+        .exclude(booking__status="CANCELLED")
+        .order_by("pk")
+        .values_list("booking__gig_id", "created_at")
+    )
+    for gig_id, created_at in payments.iterator(chunk_size=2000):
+        yield gig_id, PAYMENT_WEIGHT, created_at
+
+
+def rebuild_trending(batch_size=1000, dry_run=False, now=None):
+    """
+    Recompute every score from the last TRENDING_WINDOW_DAYS of bookings and
+    payments and bulk_update the gigs that drifted. Returns the number of
+    gigs fixed.
+    """
+    now = now or timezone.now()
+    expected = {}
+    for gig_id, weight, at in _history(now - timedelta(days=settings.TRENDING_WINDOW_DAYS)):
+        term = event_score(weight, at)
+        expected[gig_id] = log_add(expected[gig_id], term) if gig_id in expected else term
+
+    stale = []
+    queryset = Gig.objects.only("pk", "trending_score").order_by("pk")
+    for gig in queryset.iterator(chunk_size=batch_size):
+        score = expected.get(gig.pk) or 0.0
+        if abs(gig.trending_score - score) > 1e-6:
+            gig.trending_score = score
+            stale.append(gig)
+    if stale and not dry_run:
+        with transaction.atomic():
+            Gig.objects.bulk_update(stale, ["trending_score"], batch_size=batch_size)
+    return len(stale)
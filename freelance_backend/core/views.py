@@ -1,11 +1,13 @@
 # core/views.py
 
-import hmac
-import hashlib
-import razorpay
+import json
+from datetime import timedelta
 from rest_framework.exceptions import PermissionDenied
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from .models import Gig
@@ -15,7 +17,15 @@ from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from . import analytics, exports, payments, similar, trending, webhooks
+from .bulk import BulkWriteMixin
+from .caching import CachedReadMixin, invalidate_gigs
+from .conditional import ConditionalGetMixin
+from .filters import filter_bookings, filter_gigs, filter_profiles, gig_ordering, skill_params
 from .models import Profile, Gig, Booking, Transaction, Review, Dispute
+from .projections import BOOKING_PROJECTION, GIG_PROJECTION, ProjectionListMixin
+from .renderers import StreamingListMixin
+from .routers import ReplicaReadMixin
 from .serializers import (
     ProfileSerializer,
     GigSerializer,
@@ -25,6 +35,7 @@ from .serializers import (
     DisputeSerializer,
     RegisterSerializer,
 )
+from .skills import skill_facets
 
 
 class RegisterAPIView(APIView):
@@ -40,68 +51,191 @@ class RegisterAPIView(APIView):
         )
 
 
-class ProfileViewSet(viewsets.ModelViewSet):
-    queryset = Profile.objects.all()
+class ProfileViewSet(ReplicaReadMixin, CachedReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
+    cache_resource = 'profile'
+    queryset = Profile.objects.select_related('user')
     serializer_class = ProfileSerializer
+    cursor_ordering = ('-id',)
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = filter_profiles(queryset, self.request.query_params)
+        return queryset
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        # a skill search also returns the skills most common among all
+        # matches (not just this page), for narrowing the search further
+        skills, _ = skill_params(self.request.query_params)
+        if skills:
+            response.data['facets'] = skill_facets(
+                self.filter_queryset(self.get_queryset()), exclude=skills
+            )
+        return response
+
     @action(detail=False, methods=['get', 'patch'],
             permission_classes=[permissions.IsAuthenticated],
             url_path='me')
     def me(self, request):
-        profile, _ = Profile.objects.get_or_create(user=request.user)
+        # resolved with the user by CachedJWTAuthentication
+        try:
+            profile = request.user.profile
+        except Profile.DoesNotExist:
+            profile, _ = Profile.objects.get_or_create(user=request.user)
 
         if request.method == 'GET':
             serializer = self.get_serializer(profile)
             return Response(serializer.data)
 
+        # save() writes every column: start from the row, not a cached copy
+        profile = Profile.objects.select_related('user').get(pk=profile.pk)
         serializer = self.get_serializer(profile, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data)
 
-
-class GigViewSet(viewsets.ModelViewSet):
-    queryset = Gig.objects.all()
+    @action(detail=False, methods=['get'],
+            permission_classes=[permissions.IsAuthenticated],
+            url_path='me/analytics')
+    def analytics(self, request):
+        # ?days=N (default 30, max 366) ending today; reads only the rollup
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            return Response({'days': ['Must be an integer.']}, status=status.HTTP_400_BAD_REQUEST)
+        days = min(max(days, 1), 366)
+        end = timezone.localdate()
+        start = end - timedelta(days=days - 1)
+        return Response(analytics.freelancer_analytics(request.user.profile, start, end))
+
+
+class GigViewSet(ReplicaReadMixin, BulkWriteMixin, CachedReadMixin, ConditionalGetMixin,
+                 StreamingListMixin, ProjectionListMixin, viewsets.ModelViewSet):
+    cache_resource = 'gig'
+    cache_embeds = ('profile', 'freelancer_id')
+    freshness_fields = ('updated_at', 'freelancer__updated_at')
+    # GigSerializer -> freelancer (ProfileSerializer) -> user.username,
+    # and image_variants -> image_asset
+    queryset = Gig.objects.select_related('freelancer__user', 'image_asset')
     serializer_class = GigSerializer
+    # list rows are built from values(), not Gig instances (core/projections.py)
+    list_projection = GIG_PROJECTION
     permission_classes = [IsAuthenticated]
 
-    def perform_create(self, serializer):
-        # get the Profile for the logged-in user
-        profile = Profile.objects.get(user=self.request.user)
-        serializer.save(freelancer=profile)
+    @property
+    def cursor_ordering(self):
+        return gig_ordering(self.request.query_params)
 
-class BookingViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = filter_gigs(queryset, self.request.query_params)
+        return queryset
+
+    def perform_create(self, serializer):
+        # the logged-in user's Profile, resolved at authentication
+        serializer.save(freelancer=self.request.user.profile)
+
+    def get_bulk_save_kwargs(self):
+        return {'freelancer': self.request.user.profile}
+
+    def get_bulk_queryset(self):
+        return Gig.objects.filter(freelancer__user=self.request.user)
+
+    def after_bulk_write(self, objs, created):
+        invalidate_gigs([gig.pk for gig in objs])
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        # neighbours come from the precomputed index (core/similar.py); the
+        # only query loads those gigs by primary key
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), settings.SIMILAR_GIGS_K)
+        except ValueError:
+            return Response({'limit': ['Must be an integer.']}, status=status.HTTP_400_BAD_REQUEST)
+        if not str(pk).isdigit():
+            raise Http404
+        try:
+            found = similar.similar_gigs(int(pk), limit)
+        except similar.IndexUnavailable:
+            return Response({'detail': 'Similar gigs are not available yet.'},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if found is None:
+            # created since the last index build, or no such gig
+            get_object_or_404(Gig, pk=pk)
+            found = []
+
+        rank = {gig_id: n for n, (gig_id, _) in enumerate(found)}
+        shape = self.get_shape()
+        rows = sorted(
+            self.list_projection.project(self.get_queryset().filter(pk__in=rank), shape=shape),
+            key=lambda row: rank[row['id']],
+        )
+        gigs = self.list_projection.dump(rows, request, shape)
+        for row, gig in zip(rows, gigs):
+            gig['similarity'] = round(found[rank[row['id']]][1], 4)
+        return Response({'results': gigs})
+
+class BookingViewSet(BulkWriteMixin, ConditionalGetMixin, StreamingListMixin, ProjectionListMixin,
+                     viewsets.ModelViewSet):
+    # MyBookings polls the list; the payload embeds gig and freelancer
+    conditional_actions = ('list', 'retrieve')
+    freshness_fields = ('updated_at', 'gig__updated_at', 'gig__freelancer__updated_at')
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
+    list_projection = BOOKING_PROJECTION
+    cursor_ordering = ('-booked_at', '-id')
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Booking.objects.filter(client=self.request.user.profile)
+        # BookingSerializer -> gig_detail -> freelancer -> user.username,
+        # and get_freelancer_contact reads gig.freelancer
+        queryset = Booking.objects.filter(
+            client=self.request.user.profile
+        ).select_related('gig__freelancer__user', 'gig__image_asset')
+        if self.action == 'list':
+            queryset = filter_bookings(queryset, self.request.query_params)
+        return queryset
 
     def perform_create(self, serializer):
         
               # The serializer’s create() method will handle gig & client
         serializer.save()
 
+    def get_bulk_save_kwargs(self):
+        return {'client': self.request.user.profile}
+
+    def before_bulk_write(self, instances):
+        self._rollup_before = analytics.snapshot(instances)
+
+    def after_bulk_write(self, objs, created):
+        analytics.record_bookings(objs, None if created else self._rollup_before)
+        if created:
+            trending.record_bookings(objs)
+
 class TransactionViewSet(viewsets.ModelViewSet):
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
+    cursor_ordering = ('-created_at', '-id')
     permission_classes = [permissions.IsAuthenticated]
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
-    queryset = Review.objects.all()
+class ReviewViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
+    queryset = Review.objects.select_related('user')
     serializer_class = ReviewSerializer
+    cursor_ordering = ('-reviewed_at', '-id')
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class DisputeViewSet(viewsets.ModelViewSet):
+class DisputeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Dispute.objects.all()
     serializer_class = DisputeSerializer
+    cursor_ordering = ('-opened_at', '-id')
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
@@ -116,61 +250,61 @@ class CreateOrderAPIView(APIView):
         booking = Booking.objects.filter(
             id=booking_id,
             client__user=request.user
-        ).first()
+        ).select_related('gig').first()
         if not booking:
             return Response({'detail': 'Invalid booking'},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        amount_paise = int(booking.gig.price * 100)
-        razor_client = razorpay.Client(
-            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-        )
-        order = razor_client.order.create({
-            'amount': amount_paise,
-            'currency': 'INR',
-            'receipt': f'booking_{booking.id}'
-        })
-        txn = Transaction.objects.create(
-            booking=booking,
-            amount=booking.gig.price,
-            status='CREATED'
+        try:
+            txn = payments.create_order(booking)
+        except payments.OrderInProgress:
+            return Response({'detail': 'Order creation already in progress for this booking.'},
+                            status=status.HTTP_409_CONFLICT)
+        except payments.GatewayTimeout:
+            return Response({'detail': 'Payment gateway timed out.'},
+                            status=status.HTTP_504_GATEWAY_TIMEOUT)
+        except payments.GatewayError:
+            return Response({'detail': 'Payment gateway error.'},
+                            status=status.HTTP_502_BAD_GATEWAY)
+        return Response(payments.order_payload(txn))
+
+
+class ExportAPIView(APIView):
+    """GET /api/exports/<name>.<csv|ndjson>[.gz]: a streamed finance export
+    (core/exports.py)."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def perform_content_negotiation(self, request, force=False):
+        # the export isn't rendered; errors fall back to the default renderer
+        # whatever the client Accepts
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, name, fmt, gz=None):
+        gzip = bool(gz)
+        body = exports.stream(name, fmt, request.query_params, gzip=gzip)
+        filename = f'{name}-{timezone.now():%Y%m%d-%H%M%S}.{fmt}' + ('.gz' if gzip else '')
+        response = StreamingHttpResponse(
+            body, content_type='application/gzip' if gzip else exports.FORMATS[fmt]
         )
-        return Response({
-            'order_id': order['id'],
-            'amount': order['amount'],
-            'currency': order['currency'],
-            'key': settings.RAZORPAY_KEY_ID,
-            'transaction_id': txn.id
-        })
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Cache-Control'] = 'no-store'
+        return response
 
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def razorpay_webhook(request):
+    # Verify and enqueue only; `manage.py process_webhooks` applies the event.
     sig = request.META.get('HTTP_X_RAZORPAY_SIGNATURE', '')
-    expected = hmac.new(
-        settings.RAZORPAY_KEY_SECRET.encode(),
-        request.body,
-        hashlib.sha256
-    ).hexdigest()
-    if not hmac.compare_digest(sig, expected):
+    if not webhooks.signature_is_valid(request.body, sig):
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
-    data = request.data['payload']['payment']['entity']
-    txn_id = data.get('notes', {}).get('transaction_id')
-    txn = Transaction.objects.filter(id=txn_id).first()
-    if not txn:
-        return Response(status=status.HTTP_404_NOT_FOUND)
-
-    txn.razorpay_payment_id = data['id']
-    is_captured = (data.get('status') == 'captured')
-    txn.status = 'PAID' if is_captured else data['status'].upper()
-    txn.save()
-
-    booking = txn.booking
-    booking.status = (
-        Booking.Status.CONFIRMED if is_captured else Booking.Status.FAILED
-    )
-    booking.save()
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return Response(status=status.HTTP_400_BAD_REQUEST)
+    if not isinstance(payload, dict):
+        return Response(status=status.HTTP_400_BAD_REQUEST)
 
+    webhooks.enqueue(payload, request.META.get('HTTP_X_RAZORPAY_EVENT_ID', ''))
     return Response(status=status.HTTP_200_OK)
@@ -0,0 +1,178 @@
+# core/webhooks.py
+#
+# Razorpay webhook ingestion. The HTTP handler only verifies the signature
+# and appends the raw event to WebhookEvent (deduplicated on event_id), so
+# payment bursts never touch request latency. process_batch() — driven by
+# `manage.py process_webhooks` — drains due events in batches and applies
+# every state transition of a batch with bulk updates in one transaction.
+
+import hashlib
+import hmac
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import analytics, trending
+from .models import Booking, Transaction, WebhookEvent
+
+
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = timedelta(seconds=2)
+BACKOFF_CAP = timedelta(hours=1)
+
+
+class InvalidEvent(Exception):
+    """The payload can never be applied; don't retry it."""
+
+
+def signature_is_valid(body, signature):
+    expected = hmac.new(
+        settings.RAZORPAY_KEY_SECRET.encode(),
+        body,
+        hashlib.sha256
+    ).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+def payment_entity(payload):
+    try:
+        return payload['payload']['payment']['entity']
+    except (KeyError, TypeError):
+        return {}
+
+
+def enqueue(payload, event_id=''):
+    """Store one verified webhook. Returns False if it was a duplicate."""
+    entity = payment_entity(payload)
+    event = str(payload.get('event', ''))[:50]
+    payment_id = str(entity.get('id', ''))[:100]
+    event_id = (event_id or f"{event}:{payment_id}")[:100]
+    _, created = WebhookEvent.objects.get_or_create(
+        event_id=event_id,
+        defaults={'event': event, 'payment_id': payment_id, 'payload': payload},
+    )
+    return created
+
+
+def backoff(attempts):
+    return min(BACKOFF_BASE * (2 ** (attempts - 1)), BACKOFF_CAP)
+
+
+def _transition(event, txn):
+    """Apply one payment event to its transaction/booking in memory.
+    Returns True if anything changed."""
+    entity = payment_entity(event.payload)
+    payment_status = entity.get('status')
+    if not payment_status:
+        raise InvalidEvent("payment entity has no status")
+
+    if txn.status == 'PAID':
+        return False    # terminal: late or re-sent events can't undo a capture
+
+    txn.razorpay_payment_id = entity.get('id', txn.razorpay_payment_id)
+    if payment_status == 'captured':
+        txn.status = 'PAID'
+        if txn.booking.status == 'PENDING':
+            txn.booking.status = 'PAID'
+    else:
+        # failed / authorized / ...; a failed payment leaves the booking
+        # PENDING so the client can pay again
+        txn.status = payment_status.upper()[:20]
+    return True
+
+
+def process_batch(batch_size=100):
+    """
+    Apply up to batch_size due events. Returns (processed, retried, failed).
+    """
+    now = timezone.now()
+    processed = retried = failed = 0
+
+    with transaction.atomic():
+        events = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(status=WebhookEvent.Status.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not events:
+            return 0, 0, 0
+
+        txn_ids = {}
+        for event in events:
+            notes = payment_entity(event.payload).get('notes') or {}
+            txn_ids[event.pk] = str(notes.get('transaction_id', '')) if isinstance(notes, dict) else ''
+        wanted = [int(t) for t in txn_ids.values() if t.isdigit()]
+        txns = Transaction.objects.select_related('booking__gig').in_bulk(wanted)
+        # razorpay_payment_id is unique; a payment already recorded on another
+        # transaction must not fail the whole batch's bulk_update
+        payment_ids = {event.payment_id for event in events if event.payment_id}
+        recorded = dict(
+            Transaction.objects.filter(razorpay_payment_id__in=payment_ids)
+            # spelled out so SQLite can use the partial txn_payment_id_unique index too
+            .exclude(razorpay_payment_id='')
+            .values_list('razorpay_payment_id', 'pk')
+        )
+
+        changed_txns, changed_bookings = {}, {}
+        captured = []
+        rollup = analytics.new_deltas()
+        for event in events:
+            event.attempts += 1
+            try:
+                txn_id = txn_ids[event.pk]
+                if not txn_id.isdigit():
+                    raise InvalidEvent("notes.transaction_id missing")
+                txn = txns.get(int(txn_id))
+                if txn is None:
+                    # may be an order created moments ago; retry with backoff
+                    raise LookupError(f"transaction {txn_id} not found")
+                payment_id = payment_entity(event.payload).get('id')
+                if payment_id and recorded.setdefault(payment_id, txn.pk) != txn.pk:
+                    raise InvalidEvent(f"payment {payment_id} belongs to another transaction")
+                booking_status = txn.booking.status
+                before = analytics.txn_contribution(txn)
+                if _transition(event, txn):
+                    changed_txns[txn.pk] = txn
+                    analytics.move(rollup, before, analytics.txn_contribution(txn))
+                    if txn.status == 'PAID':
+                        captured.append(txn.booking.gig_id)
+                if txn.booking.status != booking_status:
+                    changed_bookings[txn.booking.pk] = txn.booking
+            except InvalidEvent as exc:
+                event.status = WebhookEvent.Status.FAILED
+                event.last_error = str(exc)
+                failed += 1
+            except Exception as exc:
+                event.last_error = f"{type(exc).__name__}: {exc}"
+                if event.attempts >= MAX_ATTEMPTS:
+                    event.status = WebhookEvent.Status.FAILED
+                    failed += 1
+                else:
+                    event.next_attempt_at = now + backoff(event.attempts)
+                    retried += 1
+            else:
+                event.status = WebhookEvent.Status.PROCESSED
+                event.processed_at = now
+                event.last_error = ''
+                processed += 1
+
+        if changed_txns:
+            Transaction.objects.bulk_update(
+                changed_txns.values(), ['razorpay_payment_id', 'status']
+            )
+        if changed_bookings:
+            for booking in changed_bookings.values():
+                booking.updated_at = now    # bulk_update skips auto_now
+            Booking.objects.bulk_update(changed_bookings.values(), ['status', 'updated_at'])
+        # bulk_update sends no signals; keep the analytics rollup and the
+        # trending scores in step
+        analytics.apply_deltas(rollup)
+        trending.record_payments(captured, now)
+        WebhookEvent.objects.bulk_update(
+            events,
+            ['status', 'attempts', 'next_attempt_at', 'last_error', 'processed_at'],
+        )
+
+    return processed, retried, failed
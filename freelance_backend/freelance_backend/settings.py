@@ -1,6 +1,6 @@
 # freelance_backend/freelance_backend/settings.py
 
-from decouple import config
+from decouple import Csv, config
 from pathlib import Path
 import os
 
@@ -12,6 +12,12 @@ SECRET_KEY = config('SECRET_KEY')
 DEBUG      = config('DEBUG', default=False, cast=bool)
 RAZORPAY_KEY_ID     = config('RAZORPAY_KEY_ID', default='')
 RAZORPAY_KEY_SECRET = config('RAZORPAY_KEY_SECRET', default='')
+# core.payments.RazorpayGateway, or core.payments.FakeGateway for tests/benchmarks
+RAZORPAY_GATEWAY         = config('RAZORPAY_GATEWAY', default='core.payments.RazorpayGateway')
+RAZORPAY_CONNECT_TIMEOUT = config('RAZORPAY_CONNECT_TIMEOUT', default=3.05, cast=float)
+RAZORPAY_READ_TIMEOUT    = config('RAZORPAY_READ_TIMEOUT', default=10, cast=float)
+RAZORPAY_POOL_SIZE       = config('RAZORPAY_POOL_SIZE', default=10, cast=int)
+RAZORPAY_FAKE_LATENCY    = config('RAZORPAY_FAKE_LATENCY', default=0, cast=float)
 
 ALLOWED_HOSTS = []
 
@@ -36,15 +42,29 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.auth.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    # orjson-backed JSON, same bytes as DRF's (core/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    # many=True validation errors as {index: errors} (bulk endpoints)
+    'LIST_SERIALIZER_ERRORS_AS_DICT': True,
 }
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',      # ← must be first
+    'core.metrics.RequestMetricsMiddleware',      # times everything below it
     'django.middleware.common.CommonMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -75,17 +95,58 @@ WSGI_APPLICATION = 'freelance_backend.wsgi.application'
 
 
 # Database
-DATABASES = {
+PRIMARY_DATABASE = {
+    "ENGINE":   config("DB_ENGINE", default="django.db.backends.postgresql"),
+    "NAME":     config("DB_NAME"),
+    "USER":     config("DB_USER"),
+    "PASSWORD": config("DB_PASSWORD"),
+    "HOST":     config("DB_HOST"),
+    "PORT":     config("DB_PORT"),
+    # keep connections open between requests; ping before reusing one
+    "CONN_MAX_AGE":       config("DB_CONN_MAX_AGE", default=60, cast=int),
+    "CONN_HEALTH_CHECKS": True,
+}
+DATABASES = {"default": PRIMARY_DATABASE}
+
+# Read replicas for list/retrieve on the browse endpoints (core/routers.py):
+# DB_REPLICA_HOSTS=replica-a,replica-b adds aliases replica1, replica2, ...
+# with the primary's credentials. With SQLite every alias opens the same
+# file, which is enough to exercise the routing locally.
+DATABASE_REPLICAS = []
+for _n, _host in enumerate(config("DB_REPLICA_HOSTS", default="", cast=Csv()), 1):
+    DATABASES[f"replica{_n}"] = {**PRIMARY_DATABASE, "HOST": _host, "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(f"replica{_n}")
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+# seconds a replica may trail the primary; cached reads of anything written
+# more recently are rendered from the primary (core/caching.py)
+DATABASE_REPLICA_LAG = config("DB_REPLICA_LAG", default=5, cast=int)
+
+
+# Cache: local memory by default; point CACHE_BACKEND / CACHE_LOCATION at a
+# shared backend (e.g. django.core.cache.backends.redis.RedisCache) in production.
+CACHES = {
     "default": {
-        "ENGINE":   "django.db.backends.postgresql",
-        "NAME":     config("DB_NAME"),
-        "USER":     config("DB_USER"),
-        "PASSWORD": config("DB_PASSWORD"),
-        "HOST":     config("DB_HOST"),
-        "PORT":     config("DB_PORT"),
+        "BACKEND":  config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default="freelance-api"),
     }
 }
 
+# Response cache for gig/profile reads (core/caching.py)
+API_CACHE_ALIAS   = "default"
+API_CACHE_TIMEOUT = config("API_CACHE_TIMEOUT", default=300, cast=int)
+
+# Seconds an authenticated user + profile stay cached for JWT requests
+# (core/auth.py); 0 loads them on every request
+AUTH_CACHE_TIMEOUT = config("AUTH_CACHE_TIMEOUT", default=60, cast=int)
+
+# Request instrumentation (core/metrics.py): Server-Timing headers and
+# Prometheus histograms on /metrics. Scrapers must send "Authorization:
+# Bearer <METRICS_TOKEN>"; without a token /metrics is a 404 unless DEBUG
+# is on. Requests slower than METRICS_SLOW_REQUEST_MS (0 = off) are logged
+# with their repeated SQL.
+METRICS_TOKEN           = config("METRICS_TOKEN", default="")
+METRICS_SLOW_REQUEST_MS = config("METRICS_SLOW_REQUEST_MS", default=0, cast=int)
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -118,3 +179,18 @@ CORS_ALLOW_ALL_ORIGINS = True
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# "Similar gigs" index (core/similar.py), built by `manage.py build_similar_gigs`
+# and memory-mapped by every worker; neighbours kept per gig
+SIMILAR_GIGS_DIR = config("SIMILAR_GIGS_DIR", default=str(BASE_DIR / "similar_index"))
+SIMILAR_GIGS_K   = config("SIMILAR_GIGS_K", default=20, cast=int)
+
+
+# Trending gigs (core/trending.py): an event's weight halves every
+# TRENDING_HALF_LIFE_HOURS; `manage.py rebuild_trending` recomputes the
+# scores from the last TRENDING_WINDOW_DAYS of bookings and payments
+TRENDING_HALF_LIFE_HOURS = config("TRENDING_HALF_LIFE_HOURS", default=72, cast=float)
+TRENDING_WINDOW_DAYS     = config("TRENDING_WINDOW_DAYS", default=30, cast=int)
+
+# Finance exports (core/exports.py): rows fetched per server-side cursor
+# round trip, and per piece of the streamed response
+EXPORT_CHUNK_SIZE = config("EXPORT_CHUNK_SIZE", default=2000, cast=int)
@@ -1,7 +1,7 @@
 # freelance_backend/urls.py
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
@@ -17,8 +17,11 @@ from core.views import (
     DisputeViewSet,
     RegisterAPIView,
     CreateOrderAPIView,
+    ExportAPIView,
     razorpay_webhook,
 )
+from core import async_views
+from core.metrics import prometheus_metrics
 
 router = DefaultRouter()
 router.register(r'profiles',     ProfileViewSet)
@@ -44,7 +47,22 @@ urlpatterns = [
 
     # Create Razorpay order
     path('api/create-order/',    CreateOrderAPIView.as_view(), name='create_order'),
+    # Same, as a native async view for ASGI deployments
+    path('api/create-order/async/', async_views.create_order, name='create_order_async'),
+
+    # Native async read paths (same payloads as the viewsets above)
+    path('api/async/gigs/',               async_views.gig_list,       name='async_gig_list'),
+    path('api/async/gigs/<int:pk>/',      async_views.gig_detail,     name='async_gig_detail'),
+    path('api/async/profiles/<int:pk>/',  async_views.profile_detail, name='async_profile_detail'),
+    path('api/async/bookings/',           async_views.booking_list,   name='async_booking_list'),
+
+    # Staff-only streamed finance exports, e.g. /api/exports/transactions.csv.gz
+    re_path(r'^api/exports/(?P<name>transactions|bookings)\.(?P<fmt>csv|ndjson)(?P<gz>\.gz)?$',
+            ExportAPIView.as_view(), name='export'),
 
     # Razorpay webhook callback
     path('api/webhook/razorpay/', razorpay_webhook,           name='razorpay_webhook'),
+
+    # Prometheus scrape target (core/metrics.py)
+    path('metrics', prometheus_metrics, name='metrics'),
 ]
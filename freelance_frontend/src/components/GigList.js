@@ -1,6 +1,6 @@
 // src/components/GigList.jsx
 
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import client from "../api/client";
 import { StarIcon, CurrencyRupeeIcon } from "@heroicons/react/solid";
@@ -8,10 +8,7 @@ import { StarIcon, CurrencyRupeeIcon } from "@heroicons/react/solid";
 export default function GigList() {
   const navigate = useNavigate();
 
-  // All gigs fetched from the server
-  const [gigs, setGigs] = useState([]);
-
-  // The result of applying text + price filters
+  // Gigs matching the current filters, as returned by the server
   const [filtered, setFiltered] = useState([]);
 
   // Text‐search query
@@ -21,37 +18,35 @@ export default function GigList() {
   const [minPrice, setMinPrice] = useState("");
   const [maxPrice, setMaxPrice] = useState("");
 
-  // Fetch gig list once, on mount
-  useEffect(() => {
-    client.get("gigs/").then((res) => {
-      setGigs(res.data);
-      setFiltered(res.data);
-    });
-  }, []);
-
-  // Recompute `filtered` whenever gigs, query, minPrice, or maxPrice change
-  useEffect(() => {
-    // Convert strings to numbers where possible; else treat as “no limit”
-    const min = parseFloat(minPrice);
-    const max = parseFloat(maxPrice);
+  // The list endpoint is cursor-paginated: keep the `next` link for "Load more"
+  const [nextPage, setNextPage] = useState(null);
 
-    setFiltered(
-      gigs.filter((g) => {
-        // 1) Title must include the text query (case-insensitive)
-        const matchesText = g.title.toLowerCase().includes(query.toLowerCase());
+  // Bumped on every filter change, so a page requested under old filters
+  // is dropped instead of appended to the new results
+  const generation = useRef(0);
 
-        // 2) If minPrice is set (and is a valid number), gig.price must be >= min
-        const matchesMin =
-          !isNaN(min) ? parseFloat(g.price) >= min : true;
+  const loadPage = (url, params, append) => {
+    const current = generation.current;
+    return client.get(url, { params }).then((res) => {
+      if (current !== generation.current) return;
+      setFiltered((prev) => (append ? [...prev, ...res.data.results] : res.data.results));
+      setNextPage(res.data.next);
+    });
+  };
 
-        // 3) If maxPrice is set (and is a valid number), gig.price must be <= max
-        const matchesMax =
-          !isNaN(max) ? parseFloat(g.price) <= max : true;
+  // Ask the API for matching gigs whenever a filter changes; filtering runs
+  // in the database, so debounce to avoid one request per keystroke.
+  useEffect(() => {
+    const params = {};
+    if (query.trim()) params.search = query.trim();
+    if (!isNaN(parseFloat(minPrice))) params.min_price = minPrice;
+    if (!isNaN(parseFloat(maxPrice))) params.max_price = maxPrice;
 
-        return matchesText && matchesMin && matchesMax;
-      })
-    );
-  }, [gigs, query, minPrice, maxPrice]);
+    generation.current += 1;
+    setNextPage(null);
+    const timer = setTimeout(() => loadPage("gigs/", params, false), 300);
+    return () => clearTimeout(timer);
+  }, [query, minPrice, maxPrice]);
 
   return (
     <div className="p-6 bg-gray-50 min-h-screen">
@@ -104,8 +99,23 @@ export default function GigList() {
             className="bg-white rounded-xl shadow hover:shadow-xl transition overflow-hidden cursor-pointer"
             onClick={() => navigate(`/gigs/${gig.id}`)}
           >
-            <div className="h-40 bg-gray-100 flex items-center justify-center text-gray-400">
-              No Image
+            <div className="h-40 bg-gray-100 flex items-center justify-center text-gray-400 overflow-hidden">
+              {gig.image_variants?.length ? (
+                // Server-rendered WebP thumbnails; the browser picks a width
+                <img
+                  src={gig.image_variants[0].url}
+                  srcSet={gig.image_variants
+                    .filter((v) => v.format === "webp")
+                    .map((v) => `${v.url} ${v.width}w`)
+                    .join(", ")}
+                  sizes="(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
+                  alt={gig.title}
+                  loading="lazy"
+                  className="w-full h-full object-cover"
+                />
+              ) : (
+                "No Image"
+              )}
             </div>
 
             <div className="p-4">
@@ -126,12 +136,12 @@ export default function GigList() {
                     <StarIcon
                       key={i}
                       className={`w-4 h-4 ${
-                        i < (gig.rating || 4) ? "" : "text-gray-200"
+                        i < Math.round(gig.rating_avg) ? "" : "text-gray-200"
                       }`}
                     />
                   ))}
                   <span className="ml-2 text-gray-600 text-sm">
-                    {(gig.rating || 4).toFixed(1)}
+                    {gig.rating_count ? gig.rating_avg.toFixed(1) : "New"}
                   </span>
                 </div>
               </div>
@@ -145,6 +155,21 @@ export default function GigList() {
           </p>
         )}
       </div>
+
+      {/* The `next` link already carries the filters and the cursor */}
+      {nextPage && (
+        <div className="max-w-6xl mx-auto">
+          <button
+            onClick={() => {
+              setNextPage(null); // until this page arrives, so it isn't requested twice
+              loadPage(nextPage, undefined, true);
+            }}
+            className="mt-6 w-full py-2 rounded-lg bg-indigo-600 text-white hover:bg-indigo-700"
+          >
+            Load more
+          </button>
+        </div>
+      )}
     </div>
   );
 }
@@ -9,14 +9,22 @@ export default function MyBookings() {
   const [bookings, setBookings] = useState([]);
   const [loading, setLoading]   = useState(true);
   const [error, setError]       = useState("");
+  const [nextPage, setNextPage] = useState(null);
   const navigate = useNavigate();
 
-  useEffect(() => {
+  // The list endpoint is cursor-paginated: keep the `next` link for "Load more"
+  const loadPage = (url) =>
     client
-      .get("bookings/")
-      .then((res) => setBookings(res.data))
+      .get(url)
+      .then((res) => {
+        setBookings((prev) => [...prev, ...res.data.results]);
+        setNextPage(res.data.next);
+      })
       .catch(() => setError("Could not load your bookings."))
       .finally(() => setLoading(false));
+
+  useEffect(() => {
+    loadPage("bookings/");
   }, []);
 
   if (loading) return <div className="text-center py-10">Loading your bookings…</div>;
@@ -74,6 +82,15 @@ export default function MyBookings() {
             ))}
           </ul>
         )}
+
+        {nextPage && (
+          <button
+            onClick={() => loadPage(nextPage)}
+            className="mt-6 w-full py-2 rounded-lg bg-indigo-600 text-white hover:bg-indigo-700"
+          >
+            Load more
+          </button>
+        )}
       </div>
     </div>
   );